@@ -0,0 +1,189 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, NamedTuple, Tuple
+from metrics import registry
+
+# Pipeline requests (WS message, REST message, audio upload) processed at once
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "32"))
+# ...and per conversation, so one chatty room cannot take every slot
+ADMISSION_MAX_PER_CONVERSATION = int(os.getenv("ADMISSION_MAX_PER_CONVERSATION", "2"))
+# Requests allowed to wait for a slot (overall / per conversation); beyond that they are shed
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "128"))
+ADMISSION_MAX_QUEUE_PER_CONVERSATION = int(os.getenv("ADMISSION_MAX_QUEUE_PER_CONVERSATION", "8"))
+# Longest a request waits in the queue before it is shed
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+# Degraded mode (no TTS, summaries deferred to jobs, background jobs paused)
+# once this many requests are waiting, or a request waited this long
+ADMISSION_DEGRADE_QUEUE = int(os.getenv("ADMISSION_DEGRADE_QUEUE", "8"))
+ADMISSION_DEGRADE_WAIT = float(os.getenv("ADMISSION_DEGRADE_WAIT", "2"))
+
+ADMISSIONS = registry.counter(
+    "admission_total",
+    "Pipeline requests by kind and outcome (admitted, degraded, rejected, timeout).",
+    ["kind", "outcome"],
+)
+ADMISSION_WAIT = registry.histogram(
+    "admission_wait_seconds",
+    "Time pipeline requests spent queued for an admission slot.",
+    ["kind"],
+)
+
+
+class Overloaded(Exception):
+    """A request shed by admission control; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server busy ({reason}), please retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Admission(NamedTuple):
+    kind: str
+    waited: float  # Seconds spent queued
+    degraded: bool  # Under pressure: skip optional work (TTS)
+
+
+class AdmissionController:
+    """
+    Concurrency gate in front of the translation pipeline (Whisper, Llama,
+    TTS). A request runs when a global slot and a slot for its conversation
+    are free; otherwise it waits in a bounded FIFO queue. Waiters whose
+    conversation is at its limit are skipped so they never block other
+    rooms. A full queue or a wait longer than `queue_timeout` sheds the
+    request with Overloaded.
+
+    Before anything is shed, the controller degrades. Once the queue reaches
+    `degrade_queue`, admitted requests are marked degraded and skip TTS.
+    Callers also check under_pressure() to defer summaries and background
+    jobs. Limits are per process.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        max_per_conversation: int = ADMISSION_MAX_PER_CONVERSATION,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        max_queue_per_conversation: int = ADMISSION_MAX_QUEUE_PER_CONVERSATION,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        degrade_queue: int = ADMISSION_DEGRADE_QUEUE,
+        degrade_wait: float = ADMISSION_DEGRADE_WAIT,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_conversation = max_per_conversation
+        self.max_queue = max_queue
+        self.max_queue_per_conversation = max_queue_per_conversation
+        self.queue_timeout = queue_timeout
+        self.degrade_queue = degrade_queue
+        self.degrade_wait = degrade_wait
+        self._in_flight = 0
+        self._running: Dict[str, int] = {}
+        self._waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+        self._queued: Dict[str, int] = {}
+        self._avg_hold = 1.0  # EWMA of slot hold time, for Retry-After hints
+
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def under_pressure(self) -> bool:
+        return len(self._waiters) >= self.degrade_queue
+
+    def retry_after(self) -> int:
+        """Whole seconds until the current queue has likely drained."""
+        return max(1, math.ceil(self._avg_hold * (len(self._waiters) + 1) / max(1, self.max_concurrent)))
+
+    def _has_slot(self, conversation_id: str) -> bool:
+        return (
+            self._in_flight < self.max_concurrent
+            and self._running.get(conversation_id, 0) < self.max_per_conversation
+        )
+
+    def _take(self, conversation_id: str):
+        self._in_flight += 1
+        self._running[conversation_id] = self._running.get(conversation_id, 0) + 1
+
+    def _release(self, conversation_id: str):
+        self._in_flight -= 1
+        self._running[conversation_id] -= 1
+        if not self._running[conversation_id]:
+            del self._running[conversation_id]
+        self._grant_waiters()
+
+    def _grant_waiters(self):
+        for waiter in list(self._waiters):
+            if self._in_flight >= self.max_concurrent:
+                return
+            conversation_id, future = waiter
+            if not future.done() and self._has_slot(conversation_id):
+                self._waiters.remove(waiter)
+                self._take(conversation_id)
+                future.set_result(None)
+
+    def _reject(self, kind: str, outcome: str, reason: str):
+        ADMISSIONS.inc(kind=kind, outcome=outcome)
+        raise Overloaded(reason, self.retry_after())
+
+    @asynccontextmanager
+    async def admit(self, conversation_id: str, kind: str):
+        """Hold a pipeline slot for the block; raises Overloaded if the request is shed."""
+        start = time.perf_counter()
+        # Conversations with queued requests keep FIFO order among themselves
+        if not self._queued.get(conversation_id) and self._has_slot(conversation_id):
+            self._take(conversation_id)
+        else:
+            if len(self._waiters) >= self.max_queue:
+                self._reject(kind, "rejected", "queue full")
+            if self._queued.get(conversation_id, 0) >= self.max_queue_per_conversation:
+                self._reject(kind, "rejected", "too many pending requests for this conversation")
+            future = asyncio.get_running_loop().create_future()
+            waiter = (conversation_id, future)
+            self._waiters.append(waiter)
+            self._queued[conversation_id] = self._queued.get(conversation_id, 0) + 1
+            try:
+                await asyncio.wait_for(future, self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject(kind, "timeout", "timed out waiting for capacity")
+            except BaseException:
+                # Cancelled (client gone) right after being granted: hand the slot back
+                if future.done() and not future.cancelled():
+                    self._release(conversation_id)
+                raise
+            finally:
+                self._queued[conversation_id] -= 1
+                if not self._queued[conversation_id]:
+                    del self._queued[conversation_id]
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+        waited = time.perf_counter() - start
+        admission = Admission(kind, waited, self.under_pressure() or waited >= self.degrade_wait)
+        ADMISSION_WAIT.observe(waited, kind=kind)
+        ADMISSIONS.inc(kind=kind, outcome="degraded" if admission.degraded else "admitted")
+        held = time.perf_counter()
+        try:
+            yield admission
+        finally:
+            self._avg_hold += 0.2 * ((time.perf_counter() - held) - self._avg_hold)
+            self._release(conversation_id)
+
+
+def admit_request(kind: str):
+    """FastAPI dependency: the endpoint runs holding a slot for its {conversation_id}."""
+    async def dependency(conversation_id: str):
+        async with admission_controller.admit(conversation_id, kind) as admission:
+            yield admission
+    return dependency
+
+
+# Singleton shared by the WebSocket, REST message and audio paths
+admission_controller = AdmissionController()
+
+registry.gauge("admission_in_flight", "Pipeline requests currently holding an admission slot.", admission_controller.in_flight)
+registry.gauge("admission_queue_depth", "Pipeline requests waiting for an admission slot.", admission_controller.queue_depth)
@@ -0,0 +1,109 @@
+"""
+How many LLM translation calls does the medical glossary avoid?
+
+Runs a realistic en→es consultation transcript through translate_message
+with a fake provider that counts calls. Fully offline. The glossary is
+measured with the translation cache bypassed (otherwise repeated messages
+never reach it); a second pass shows what the cache saves on top.
+
+    python -m benchmarks.bench_glossary
+"""
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+from services import groq_service  # noqa: E402
+from services.glossary import glossary_store  # noqa: E402
+
+GLOSSARY_EN_ES = {
+    "yes": "sí",
+    "no": "no",
+    "thank you": "gracias",
+    "thank you, doctor": "gracias, doctor",
+    "okay": "de acuerdo",
+    "good morning": "buenos días",
+    "how are you feeling today": "¿cómo se siente hoy?",
+    "please sit down": "por favor, siéntese",
+    "take a deep breath": "respire hondo",
+    "does it hurt here": "¿le duele aquí?",
+    "any allergies": "¿alguna alergia?",
+    "take one tablet twice a day": "tome una tableta dos veces al día",
+    "take one tablet at night": "tome una tableta por la noche",
+    "come back in one week": "vuelva en una semana",
+    "paracetamol": "paracetamol",
+    "ibuprofen": "ibuprofeno",
+    "amoxicillin": "amoxicilina",
+    "metformin": "metformina",
+    "blood pressure": "presión arterial",
+    "blood test": "análisis de sangre",
+    "chest x-ray": "radiografía de tórax",
+    "shortness of breath": "dificultad para respirar",
+    "fever": "fiebre",
+    "headache": "dolor de cabeza",
+}
+
+TRANSCRIPT = [
+    "Good morning",
+    "How are you feeling today?",
+    "I have had a headache and fever for three days.",
+    "Please sit down",
+    "Does it hurt here?",
+    "Yes",
+    "Any allergies?",
+    "No",
+    "Your blood pressure is a little high today.",
+    "Take a deep breath",
+    "Do you have shortness of breath when you walk?",
+    "Sometimes, especially on the stairs.",
+    "We will do a blood test and a chest x-ray.",
+    "Okay",
+    "Take paracetamol 500 mg every six hours for the fever.",
+    "Take one tablet twice a day",
+    "Should I keep taking metformin 850 mg?",
+    "Yes, continue metformin with meals.",
+    "Take one tablet at night",
+    "Come back in one week",
+    "Thank you, doctor",
+    "Thank you",
+] * 5
+
+
+async def main():
+    calls = {"llm": 0}
+
+    async def fake_completion(system_prompt, text, *args):
+        calls["llm"] += 1
+        return text  # echo keeps every placeholder, like a well-behaved model
+
+    groq_service._complete_translation = fake_completion
+    glossary_store.set_terms("en", "es", GLOSSARY_EN_ES)
+    groq_service.translation_cache.clear()
+
+    # Glossary alone: every message is looked up, none answered from the cache
+    for line in TRANSCRIPT:
+        await groq_service.translate_message(line, "en", "es", lookup_cache=False)
+
+    total = len(TRANSCRIPT)
+    stats = glossary_store.stats()
+    print(f"messages:              {total}")
+    print(f"LLM calls:             {calls['llm']}")
+    print(f"LLM calls avoided:     {stats['phrase_hits']} ({100 * stats['phrase_hits'] / total:.1f}%)")
+    print(f"calls with locked terms: {stats['locked_calls']}")
+    print(f"no glossary match:     {stats['misses']}")
+
+    # Glossary + translation cache, as the live path runs them
+    groq_service.translation_cache.clear()
+    calls["llm"] = 0
+    phrase_hits = stats["phrase_hits"]
+    for line in TRANSCRIPT:
+        await groq_service.translate_message(line, "en", "es")
+    phrase_hits = glossary_store.stats()["phrase_hits"] - phrase_hits
+    cache_hits = total - calls["llm"] - phrase_hits
+    print(f"with translation cache: {calls['llm']} LLM calls, {cache_hits} cache hits, {phrase_hits} glossary hits")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
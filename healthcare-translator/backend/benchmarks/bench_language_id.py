@@ -0,0 +1,134 @@
+"""
+Accuracy/latency benchmark: local language ID vs the LLM detector.
+
+    python -m benchmarks.bench_language_id          # local identifier only
+    python -m benchmarks.bench_language_id --llm    # also call Groq (needs GROQ_API_KEY)
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness  # noqa: E402,F401 - backend path setup
+from services.language_id import identify_language  # noqa: E402
+
+# Same default as services/groq_service.py (importing it needs the Groq client)
+LANGUAGE_ID_THRESHOLD = float(os.getenv("LANGUAGE_ID_THRESHOLD", "0.8"))
+
+# Held-out sentences (not part of the identifier's seed text)
+SAMPLES = [
+    ("en", "My chest feels tight when I climb the stairs."),
+    ("en", "Have you noticed any swelling in your ankles?"),
+    ("en", "thank you doctor"),
+    ("es", "Me duele el estómago desde el lunes y tengo náuseas."),
+    ("es", "¿Ha notado hinchazón en los tobillos?"),
+    ("es", "muchas gracias doctora"),
+    ("fr", "J'ai une douleur dans la poitrine quand je monte les escaliers."),
+    ("fr", "Avez-vous remarqué un gonflement des chevilles ?"),
+    ("fr", "merci beaucoup docteur"),
+    ("de", "Ich habe seit Montag Bauchschmerzen und mir ist übel."),
+    ("de", "Haben Sie Schwellungen an den Knöcheln bemerkt?"),
+    ("de", "vielen Dank Frau Doktor"),
+    ("pt", "Estou com dor no estômago desde segunda-feira e sinto enjoo."),
+    ("pt", "Você notou algum inchaço nos tornozelos?"),
+    ("pt", "muito obrigada doutora"),
+    ("hi", "मुझे कल रात से बहुत तेज़ बुखार है।"),
+    ("hi", "क्या आपको सीने में दर्द होता है?"),
+    ("mr", "मला कालपासून खूप ताप आहे."),
+    ("mr", "तुम्हाला छातीत दुखते का?"),
+    ("bn", "আমার গতকাল থেকে খুব জ্বর।"),
+    ("ta", "எனக்கு நேற்றிலிருந்து காய்ச்சல் இருக்கிறது."),
+    ("te", "నాకు నిన్నటి నుండి జ్వరం ఉంది."),
+    ("kn", "ನನಗೆ ನಿನ್ನೆಯಿಂದ ಜ್ವರ ಇದೆ."),
+    ("ml", "എനിക്ക് ഇന്നലെ മുതൽ പനിയുണ്ട്."),
+    ("gu", "મને ગઈકાલથી તાવ છે."),
+    ("pa", "ਮੈਨੂੰ ਕੱਲ੍ਹ ਤੋਂ ਬੁਖਾਰ ਹੈ।"),
+    ("ar", "أشعر بألم في الصدر منذ يومين."),
+    ("ar", "هل تتناول أي أدوية أخرى؟"),
+    ("ur", "مجھے کل سے بخار ہے اور سر میں درد ہے۔"),
+    ("ur", "کیا آپ کوئی اور دوا لے رہے ہیں؟"),
+    ("ru", "У меня болит голова и высокая температура со вчерашнего дня."),
+    ("zh", "我从昨天开始发烧，头很痛。"),
+    ("ja", "昨日から熱があって、頭が痛いです。"),
+    ("ko", "어제부터 열이 나고 머리가 아파요."),
+]
+
+# Too little evidence to decide locally: drug/brand names, abbreviations and
+# mixed-script lines. These must fall below the threshold and go to the LLM.
+UNDECIDABLE = [
+    "Paracetamol 500 mg",
+    "Ibuprofen 400 mg",
+    "Take Lipitor 20 mg",
+    "Amoxicillin",
+    "Atorvastatin",
+    "MRI scan",
+    "Covid test",
+    "OK",
+    "मुझे Paracetamol 500 mg चाहिए",
+    "Dr. Müller",
+]
+
+
+def bench_local(repeat: int = 200):
+    correct = 0
+    confident = 0
+    misses = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, text in SAMPLES:
+            identify_language(text)
+    elapsed = time.perf_counter() - start
+
+    for expected, text in SAMPLES:
+        guess = identify_language(text)
+        if guess.language == expected:
+            correct += 1
+        else:
+            misses.append((expected, guess, text))
+        if guess.confidence >= 0.8:
+            confident += 1
+
+    n = len(SAMPLES)
+    print(f"local: accuracy {correct}/{n} ({100 * correct / n:.1f}%), "
+          f"confident {confident}/{n}, "
+          f"{1e6 * elapsed / (repeat * n):.1f} µs/call")
+    for expected, guess, text in misses:
+        print(f"  miss: expected {expected}, got {guess.language} ({guess.confidence:.2f}, {guess.method}): {text}")
+
+    overconfident = [(text, identify_language(text)) for text in UNDECIDABLE]
+    overconfident = [(text, guess) for text, guess in overconfident if guess.confidence >= LANGUAGE_ID_THRESHOLD]
+    print(f"local: short/brand-name/mixed inputs escalated {len(UNDECIDABLE) - len(overconfident)}/{len(UNDECIDABLE)} "
+          f"(confidence < {LANGUAGE_ID_THRESHOLD})")
+    for text, guess in overconfident:
+        print(f"  overconfident: {guess.language} ({guess.confidence:.2f}, {guess.method}): {text}")
+
+
+async def bench_llm():
+    from services.groq_service import detect_language_llm
+
+    correct = 0
+    latencies = []
+    for expected, text in SAMPLES:
+        start = time.perf_counter()
+        detected = await detect_language_llm(text)
+        latencies.append(time.perf_counter() - start)
+        correct += detected == expected
+
+    n = len(SAMPLES)
+    latencies.sort()
+    print(f"llm:   accuracy {correct}/{n} ({100 * correct / n:.1f}%), "
+          f"p50 {1000 * latencies[n // 2]:.0f} ms, max {1000 * latencies[-1]:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm", action="store_true", help="also benchmark the Groq detector")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    bench_local(args.repeat)
+    if args.llm:
+        asyncio.run(bench_llm())
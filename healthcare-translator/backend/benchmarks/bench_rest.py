@@ -0,0 +1,137 @@
+"""
+Latency and payload size of the REST list endpoints on a seeded database.
+
+Seeds conversations, a long conversation, summaries and a large message
+history, then times get_messages, list_conversations, get_summaries and
+search_messages in-process. Sizes are reported as sent on the wire
+(compressed when the response is) and decoded. Fully offline.
+
+--archived moves that share of the seeded conversations to cold storage
+first (services/archive.py), to compare hot-table query costs, and also
+reports the archive search and the time to restore one conversation.
+
+    python -m benchmarks.bench_rest
+    python -m benchmarks.bench_rest --conversations 500 --long 10000 --repeat 50
+    python -m benchmarks.bench_rest --archived 0.9
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness  # noqa: E402
+
+
+def seed_summaries(conversation_id: str, count: int):
+    from database import engine
+    from models import ConversationSummary
+    from datetime import datetime, timedelta, timezone
+
+    base = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    text = "## Patient Complaints & Symptoms\n- Fever, headache\n\n" * 20
+    rows = [{
+        "id": f"{conversation_id}-summary-{i:04d}",
+        "conversation_id": conversation_id,
+        "summary_text": text,
+        "created_at": base + timedelta(minutes=i),
+    } for i in range(count)]
+    with engine.begin() as conn:
+        conn.execute(ConversationSummary.__table__.insert(), rows)
+
+
+async def measure(http, path: str, params: dict, repeat: int) -> dict:
+    latencies, wire, size = [], 0, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await http.get(path, params=params)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        wire = response.num_bytes_downloaded
+        size = len(response.content)
+    latencies.sort()
+    return {
+        "p50": 1000 * harness.percentile(latencies, 50),
+        "p95": 1000 * harness.percentile(latencies, 95),
+        "wire_kb": wire / 1024,
+        "decoded_kb": size / 1024,
+    }
+
+
+def archive_share(conversation_ids: list, share: float) -> list:
+    """Archive the first `share` of the conversations; returns the archived ids."""
+    from database import SessionLocal
+    from services.archive import archive_conversation
+
+    chosen = conversation_ids[:int(len(conversation_ids) * share)]
+    raw = compressed = 0
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        for conversation_id in chosen:
+            archive = archive_conversation(db, conversation_id)
+            raw += archive.raw_bytes
+            compressed += len(archive.payload)
+    if chosen:
+        print(f"[Bench] Archived {len(chosen)} conversations in {time.perf_counter() - start:.1f}s "
+              f"({raw / 1024:.0f} KB → {compressed / 1024:.0f} KB)")
+    return chosen
+
+
+async def run(args):
+    workdir = harness.make_workdir()
+    try:
+        harness.prepare_environment(workdir)
+        import httpx
+        from benchmarks.fakes import FakeGroqClient, FakeTTSEngine
+        from benchmarks.load_test import seed_messages
+
+        app = harness.load_app(FakeGroqClient(), [FakeTTSEngine()], workdir)
+        seeded = seed_messages(args.conversations, args.messages, args.seed)
+        long_id = seed_messages(1, args.long, args.seed + 1, prefix="long")[0]
+        seed_summaries(long_id, args.summaries)
+        print(f"[Bench] Seeded {args.conversations} × {args.messages} messages + 1 × {args.long}")
+        archived = archive_share(seeded[1:], args.archived)  # seeded[0] stays hot for the per-conversation search
+
+        endpoints = [
+            ("get_messages (long)", f"/api/conversations/{long_id}/messages/", {}),
+            ("list_conversations", "/api/conversations/", {}),
+            ("get_summaries", f"/api/conversations/{long_id}/summary/", {}),
+            ("search (global)", "/api/search/", {"q": "fever"}),
+            ("search (1 conv)", "/api/search/", {"q": "blood", "conversation_id": seeded[0]}),
+        ]
+        if archived:
+            endpoints.append(("search (+archive)", "/api/search/", {"q": "fever", "include_archived": "true"}))
+        transport = httpx.ASGITransport(app=app)
+        headers = {"accept-encoding": os.getenv("BENCH_ACCEPT_ENCODING", "gzip")}
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", headers=headers, timeout=120) as http:
+            print(f"\n{'endpoint':<22} {'p50 ms':>9} {'p95 ms':>9} {'wire KB':>9} {'decoded KB':>11}")
+            for name, path, params in endpoints:
+                await http.get(path, params=params)  # warm-up
+                r = await measure(http, path, params, args.repeat)
+                print(f"{name:<22} {r['p50']:>9.2f} {r['p95']:>9.2f} {r['wire_kb']:>9.1f} {r['decoded_kb']:>11.1f}")
+            if archived:
+                start = time.perf_counter()
+                (await http.get(f"/api/conversations/{archived[-1]}/messages/")).raise_for_status()
+                print(f"\nrestore + get_messages of an archived conversation: {1000 * (time.perf_counter() - start):.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="REST list endpoint benchmark")
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--messages", type=int, default=100, help="Messages per seeded conversation")
+    parser.add_argument("--long", type=int, default=5000, help="Messages in the long conversation")
+    parser.add_argument("--summaries", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--archived", type=float, default=0.0, help="Share of the seeded conversations to archive first (0-1)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
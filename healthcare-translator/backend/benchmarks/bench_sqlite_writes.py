@@ -0,0 +1,170 @@
+"""
+Message write throughput on SQLite at increasing room counts.
+
+Every room is a task that stores chat messages back to back (a message row
+plus two per-language translation rows, as the WebSocket path does) while
+reader threads keep querying recent messages. Three modes, each on a fresh
+database file:
+
+  default       SQLite defaults (rollback journal, synchronous=FULL),
+                one commit per message on the event loop (the old path)
+  pragmas       WAL + synchronous=NORMAL + cache/mmap, one commit per message
+  group-commit  pragmas + GroupCommitWriter (one commit per batch, off-loop)
+
+Fully offline.
+
+    python -m benchmarks.bench_sqlite_writes
+    python -m benchmarks.bench_sqlite_writes --rooms 1 10 50 100 --messages 50 --readers 4
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness  # noqa: E402
+
+MODES = ("default", "pragmas", "group-commit")
+
+
+def make_store(path: str, tuned: bool):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database import Base, apply_sqlite_pragmas
+    import models  # noqa: F401 - registers the tables on Base
+
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if tuned:
+        apply_sqlite_pragmas(engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def seed_conversations(session_factory, rooms: int):
+    from models import Conversation
+
+    session = session_factory()
+    session.add_all([Conversation(id=f"room-{r:04d}", extra_languages="fr") for r in range(rooms)])
+    session.commit()
+    session.close()
+
+
+def stage_message(session, room: int, i: int):
+    from models import Message, MessageTranslation, RoleEnum
+
+    message = Message(
+        conversation_id=f"room-{room:04d}",
+        role=RoleEnum.doctor if i % 2 == 0 else RoleEnum.patient,
+        original_text=f"Message {i}: I have had a fever and a headache since yesterday.",
+        original_language="en",
+        translated_text="मुझे कल से बुखार और सिरदर्द है।",
+        target_language="hi",
+    )
+    session.add(message)
+    session.add(MessageTranslation(message=message, language="hi", translated_text=message.translated_text))
+    session.add(MessageTranslation(message=message, language="fr", translated_text="J'ai de la fièvre depuis hier."))
+    return message
+
+
+def reader(session_factory, rooms: int, stop: threading.Event, latencies: list):
+    from models import Message
+
+    i = 0
+    while not stop.is_set():
+        session = session_factory()
+        start = time.perf_counter()
+        session.query(Message.id, Message.original_text).filter(
+            Message.conversation_id == f"room-{i % rooms:04d}"
+        ).order_by(Message.seq.desc()).limit(50).all()
+        latencies.append(time.perf_counter() - start)
+        session.close()
+        i += 1
+
+
+async def run_mode(mode: str, rooms: int, messages: int, readers: int, workdir: str) -> dict:
+    from db_writer import GroupCommitWriter
+
+    path = os.path.join(workdir, f"{mode}-{rooms}.db")
+    engine, session_factory = make_store(path, tuned=mode != "default")
+    seed_conversations(session_factory, rooms)
+    writer = GroupCommitWriter(session_factory=session_factory, enabled=True) if mode == "group-commit" else None
+
+    commit_latencies, read_latencies, errors = [], [], []
+
+    async def room_task(room: int):
+        for i in range(messages):
+            start = time.perf_counter()
+            try:
+                if writer is not None:
+                    await writer.submit(lambda s, i=i: stage_message(s, room, i))
+                else:
+                    session = session_factory()
+                    stage_message(session, room, i)
+                    session.commit()
+                    session.close()
+            except Exception as e:
+                errors.append(str(e))
+            commit_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0)  # Let other rooms run, as awaiting the network would
+
+    stop = threading.Event()
+    threads = [threading.Thread(target=reader, args=(session_factory, rooms, stop, read_latencies)) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(room_task(r) for r in range(rooms)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for t in threads:
+        t.join()
+    if writer is not None:
+        await writer.stop()
+    engine.dispose()
+
+    commit_latencies.sort()
+    read_latencies.sort()
+    return {
+        "mode": mode,
+        "rooms": rooms,
+        "msgs_per_s": rooms * messages / elapsed,
+        "commit_p50_ms": 1000 * harness.percentile(commit_latencies, 50),
+        "commit_p95_ms": 1000 * harness.percentile(commit_latencies, 95),
+        "read_p95_ms": 1000 * harness.percentile(read_latencies, 95),
+        "reads": len(read_latencies),
+        "errors": len(errors),
+        "batches": writer.batches if writer is not None else rooms * messages,
+    }
+
+
+async def run(args):
+    workdir = harness.make_workdir()
+    try:
+        harness.prepare_environment(workdir)
+        print(f"\n{'rooms':>5} {'mode':<13} {'msgs/s':>9} {'commit p50':>11} {'commit p95':>11} "
+              f"{'read p95':>9} {'reads':>7} {'commits':>8} {'errors':>7}")
+        for rooms in args.rooms:
+            for mode in args.modes:
+                r = await run_mode(mode, rooms, args.messages, args.readers, workdir)
+                print(f"{rooms:>5} {mode:<13} {r['msgs_per_s']:>9.0f} {r['commit_p50_ms']:>9.2f}ms "
+                      f"{r['commit_p95_ms']:>9.2f}ms {r['read_p95_ms']:>7.2f}ms {r['reads']:>7} "
+                      f"{r['batches']:>8} {r['errors']:>7}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite message write benchmark")
+    parser.add_argument("--rooms", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--messages", type=int, default=40, help="Messages stored per room")
+    parser.add_argument("--readers", type=int, default=2, help="Concurrent reader threads")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
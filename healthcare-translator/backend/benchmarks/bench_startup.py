@@ -0,0 +1,117 @@
+"""
+Cold-start profile: import-time breakdown of `main` and time to first request.
+
+Runs each measurement in a fresh interpreter (that is what a cold start is):
+
+  1. `python -X importtime -c "import main"`, aggregated per top-level package
+  2. uvicorn started as a subprocess, polled until GET /api/health answers
+
+Uses a throwaway SQLite DB and a dummy API key; nothing leaves the machine.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 5 --top 15
+"""
+import os
+import sys
+import time
+import socket
+import shutil
+import argparse
+import statistics
+import subprocess
+import urllib.request
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks import harness  # noqa: E402
+
+
+def bench_env(workdir: str) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'startup.db')}"
+    env.setdefault("GROQ_API_KEY", "offline-benchmark")
+    return env
+
+
+def import_profile(env: dict):
+    """
+    (total seconds, {top-level package: seconds}) for `import main`. Each
+    module's self time is charged to its top-level package, so the
+    breakdown adds up to the total.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    per_package = defaultdict(int)
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cumulative_us, raw_name = line.split("|")
+        name = raw_name[1:]  # One separator space, then two spaces per nesting level
+        per_package[name.strip().split(".")[0]] += int(head.split(":")[1])
+        if not name.startswith(" "):
+            total += int(cumulative_us)
+    return total / 1e6, {k: v / 1e6 for k, v in per_package.items()}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_request(env: dict, timeout: float = 60.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1) as r:
+                    if r.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("server did not answer /api/health")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=12, help="Packages to list in the import breakdown")
+    args = parser.parse_args()
+
+    workdir = harness.make_workdir()
+    try:
+        env = bench_env(workdir)
+        totals, ttfr = [], []
+        packages = defaultdict(list)
+        for _ in range(args.runs):
+            total, per_package = import_profile(env)
+            totals.append(total)
+            for name, seconds in per_package.items():
+                packages[name].append(seconds)
+            ttfr.append(time_to_first_request(env))
+
+        print(f"\nimport main: {1000 * statistics.median(totals):.0f} ms (median of {args.runs})\n")
+        ranked = sorted(packages.items(), key=lambda kv: -statistics.median(kv[1]))
+        for name, values in ranked[:args.top]:
+            print(f"  {name:<28} {1000 * statistics.median(values):>8.1f} ms")
+        print(f"\ntime to first request: {1000 * statistics.median(ttfr):.0f} ms "
+              f"(min {1000 * min(ttfr):.0f}, max {1000 * max(ttfr):.0f})")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+CPU per broadcast and bytes per message for the WebSocket wire encodings.
+
+Compares the old path (stdlib json.dumps per connection, as send_json did)
+with the pre-encoded broadcast in ws_manager for each available encoding.
+Sizes are reported raw and after permessage-deflate (zlib raw deflate with
+context takeover, as browsers negotiate by default). Fully offline.
+
+    python -m benchmarks.bench_ws_encoding
+    python -m benchmarks.bench_ws_encoding --room-size 200 --messages 1000
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("TRACING_EXPORTER", "none")
+
+import ws_codec  # noqa: E402
+from ws_manager import manager  # noqa: E402
+from metrics import timed  # noqa: E402
+from tracing import tracer  # noqa: E402
+
+PHRASES = [
+    ("I have had a fever and a headache since yesterday.", "मुझे कल से बुखार और सिरदर्द है।"),
+    ("Take one tablet of paracetamol twice a day after meals.", "खाने के बाद दिन में दो बार पैरासिटामोल की एक गोली लें।"),
+    ("Do you have any allergies to penicillin?", "क्या आपको पेनिसिलिन से कोई एलर्जी है?"),
+    ("The pain gets worse when I climb stairs.", "सीढ़ियाँ चढ़ते समय दर्द बढ़ जाता है।"),
+    ("We will schedule a blood test and a chest x-ray.", "हम रक्त परीक्षण और छाती का एक्स-रे करवाएंगे।"),
+]
+
+
+class CountingSocket:
+    """Stands in for a WebSocket; records what would go on the wire."""
+
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def send_text(self, data: str):
+        self.frames += 1
+        self.bytes += len(data.encode("utf-8"))
+
+    async def send_bytes(self, data: bytes):
+        self.frames += 1
+        self.bytes += len(data)
+
+
+def make_payloads(n: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2025, 3, 1, 9, 30)
+    payloads = []
+    for i in range(n):
+        original, translated = rng.choice(PHRASES)
+        doctor = i % 2 == 0
+        payloads.append({
+            "type": "message",
+            "message": {
+                "id": f"{rng.getrandbits(128):032x}",
+                "conversation_id": "5f0c6f8e-2f7b-4b4e-9a53-1f0b6f1d2c3a",
+                "seq": i + 1,
+                "role": "doctor" if doctor else "patient",
+                "message_type": "text",
+                "original_text": original if doctor else translated,
+                "original_language": "en" if doctor else "hi",
+                "translated_text": translated if doctor else original,
+                "target_language": "hi" if doctor else "en",
+                "audio_file_path": None,
+                "audio_duration": None,
+                "tts_audio_path": f"tts_{rng.getrandbits(64):016x}.mp3",
+                "created_at": start + timedelta(seconds=7 * i),
+            },
+            "trace_id": f"{rng.getrandbits(128):032x}",
+        })
+    return payloads
+
+
+async def legacy_broadcast(sockets, message: dict):
+    """The previous broadcast: hand-built ISO timestamps, send_json (json.dumps) per connection."""
+    message = {**message, "message": {**message["message"], "created_at": message["message"]["created_at"].isoformat()}}
+    with timed("broadcast"), tracer.start_span("ws.broadcast", **{"ws.recipients": len(sockets)}):
+        for ws in sockets:
+            await ws.send_text(json.dumps(message, separators=(",", ":"), ensure_ascii=False))
+
+
+def deflated_size(frames) -> int:
+    """Total bytes after permessage-deflate with context takeover."""
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    total = 0
+    for frame in frames:
+        data = frame.encode("utf-8") if isinstance(frame, str) else frame
+        total += len(compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4  # trailer is stripped
+    return total
+
+
+async def run(room_size: int, messages: int, seed: int):
+    payloads = make_payloads(messages, seed)
+    results = []
+
+    # Old path
+    sockets = [CountingSocket() for _ in range(room_size)]
+    cpu = time.process_time()
+    for p in payloads:
+        await legacy_broadcast(sockets, p)
+    cpu = time.process_time() - cpu
+    legacy_frames = [
+        json.dumps({**p, "message": {**p["message"], "created_at": p["message"]["created_at"].isoformat()}},
+                   separators=(",", ":"), ensure_ascii=False)
+        for p in payloads
+    ]
+    results.append(("legacy json", cpu, sockets[0].bytes, deflated_size(legacy_frames)))
+
+    # Pre-encoded broadcast, one room per encoding
+    for encoding in ws_codec.available_encodings():
+        room = f"bench-{encoding}"
+        sockets = [CountingSocket() for _ in range(room_size)]
+        manager.active_connections[room] = list(sockets)
+        for ws in sockets:
+            manager.encodings[ws] = encoding
+        cpu = time.process_time()
+        for p in payloads:
+            await manager.broadcast_to_room(room, p)
+        cpu = time.process_time() - cpu
+        frames = [ws_codec.encode(p, encoding) for p in payloads]
+        label = encoding
+        if encoding == "json":
+            label = "json (orjson)" if ws_codec.orjson is not None else "json (stdlib)"
+        results.append((label, cpu, sockets[0].bytes, deflated_size(frames)))
+        del manager.active_connections[room]
+        for ws in sockets:
+            manager.encodings.pop(ws, None)
+
+    print(f"\nRoom of {room_size} connections, {messages} broadcasts\n")
+    print(f"{'encoding':<20} {'µs/broadcast':>13} {'µs/recipient':>13} {'bytes/msg':>10} {'deflated':>9}")
+    for label, cpu, raw, deflated in results:
+        per_broadcast = cpu / messages * 1e6
+        print(f"{label:<20} {per_broadcast:>13.1f} {per_broadcast / room_size:>13.2f} "
+              f"{raw / messages:>10.1f} {deflated / messages:>9.1f}")
+    if "msgpack" not in ws_codec.available_encodings():
+        print("\n(msgpack not installed — pip install msgpack to include it)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket encoding benchmark")
+    parser.add_argument("--room-size", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(run(args.room_size, args.messages, args.seed))
+
+
+if __name__ == "__main__":
+    main()
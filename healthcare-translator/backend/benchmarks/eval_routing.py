@@ -0,0 +1,159 @@
+"""
+Offline eval of tiered translation routing.
+
+Routes every utterance of a sample corpus (benchmarks/routing_corpus.json)
+through the routing policy and reports:
+  - how many go to each route/model
+  - clinically dense utterances (hand-labelled) that would land on a fast
+    model: these should be zero
+  - projected latency, all-large vs routed, from a per-model latency
+    profile (time to first token + output tokens/s)
+
+The default profile is a rough Groq figure; pass --profile with your own
+measurements, or --live to time both models against the real API
+(needs GROQ_API_KEY; one call per utterance per distinct model).
+
+    python -m benchmarks.eval_routing
+    python -m benchmarks.eval_routing --policy my_policy.json --profile llama-3.1-8b-instant=120:900
+    python -m benchmarks.eval_routing --live --show
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+
+from benchmarks import harness  # noqa: E402
+from services import groq_service  # noqa: E402
+from services.glossary import glossary_store  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "routing_corpus.json")
+
+# model → (time to first token in seconds, output tokens per second)
+DEFAULT_PROFILE = {
+    groq_service.TRANSLATION_MODEL: (0.30, 275.0),
+    groq_service.FAST_TRANSLATION_MODEL: (0.15, 750.0),
+}
+
+
+def parse_profile(values) -> dict:
+    profile = dict(DEFAULT_PROFILE)
+    for value in values or []:
+        model, _, numbers = value.partition("=")
+        ttft_ms, _, tokens_per_s = numbers.partition(":")
+        profile[model] = (float(ttft_ms) / 1000, float(tokens_per_s))
+    return profile
+
+
+def projected_latency(profile: dict, model: str, text: str) -> float:
+    ttft, tokens_per_s = profile[model]
+    output_tokens = max(1, len(text) // 3)  # Translations run about as long as the source
+    return ttft + output_tokens / tokens_per_s
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        corpus = json.load(f)
+    pairs = {(u["source"], u["target"]) for u in corpus["utterances"]}
+    for source, target in pairs:
+        # Install the corpus glossary (or none) so prepare() never reaches for the DB
+        glossary_store.set_terms(source, target, corpus.get("glossary", {}).get(f"{source}-{target}", {}))
+    return corpus["utterances"]
+
+
+def route_all(utterances, policy) -> list:
+    routed = []
+    for u in utterances:
+        prepared = glossary_store.prepare(u["text"], u["source"], u["target"])
+        if prepared.translation is not None:
+            routed.append({**u, "route": "glossary", "model": "glossary"})
+            continue
+        decision = groq_service.route_translation(
+            u["text"], u["source"], u["target"], locked_terms=len(prepared.locked), policy=policy,
+        )
+        routed.append({**u, "route": decision.route, "model": decision.model, "features": decision.features})
+    return routed
+
+
+async def time_live(utterance: dict, model: str) -> tuple:
+    prompt = groq_service.get_translation_prompt(utterance["source"], utterance["target"], utterance["role"])
+    start = time.perf_counter()
+    translated = await groq_service._complete_translation(
+        prompt, utterance["text"], utterance["source"], utterance["target"], groq_service.PRIORITY_LIVE, model,
+    )
+    return time.perf_counter() - start, translated
+
+
+def summarize(label: str, values: list) -> str:
+    values = sorted(values)
+    mean = sum(values) / len(values)
+    return (f"{label:<10} mean {1000 * mean:7.0f}ms   p50 {1000 * harness.percentile(values, 50):7.0f}ms"
+            f"   p95 {1000 * harness.percentile(values, 95):7.0f}ms")
+
+
+async def run(args):
+    policy = groq_service.load_routing_policy(args.policy) if args.policy else groq_service.routing_policy
+    profile = parse_profile(args.profile)
+    utterances = load_corpus(args.corpus)
+    routed = [r for r in route_all(utterances, policy) if r["model"] != "glossary"]
+    skipped = len(utterances) - len(routed)
+
+    counts = {}
+    for r in routed:
+        counts[(r["route"], r["model"])] = counts.get((r["route"], r["model"]), 0) + 1
+    print(f"\nutterances: {len(routed)} routed ({skipped} answered by the glossary, not counted)\n")
+    print(f"{'route':<12} {'model':<28} {'count':>6} {'share':>7}")
+    for (route, model), count in sorted(counts.items()):
+        print(f"{route:<12} {model:<28} {count:>6} {100 * count / len(routed):>6.1f}%")
+
+    large = groq_service.TRANSLATION_MODEL
+    unsafe = [r for r in routed if r.get("dense") and r["model"] != large]
+    cautious = [r for r in routed if not r.get("dense") and r["model"] == large]
+    print(f"\ndense utterances on a fast model: {len(unsafe)}")
+    for r in unsafe:
+        print(f"  ! [{r['source']}→{r['target']}] {r['text']}  ({r['features']})")
+    print(f"plain utterances kept on {large}: {len(cautious)} (missed savings, not errors)")
+
+    if args.live:
+        baseline, tiered = [], []
+        for r in routed:
+            large_latency, large_text = await time_live(r, large)
+            if r["model"] == large:
+                latency, text = large_latency, large_text
+            else:
+                latency, text = await time_live(r, r["model"])
+            baseline.append(large_latency)
+            tiered.append(latency)
+            if args.show and r["model"] != large:
+                print(f"\n  {r['text']}\n    {large}: {large_text}\n    {r['model']}: {text}")
+        source = "measured"
+    else:
+        baseline = [projected_latency(profile, large, r["text"]) for r in routed]
+        tiered = [projected_latency(profile, r["model"], r["text"]) for r in routed]
+        source = "projected from " + ", ".join(f"{m}={1000 * t:.0f}ms+{s:.0f}tok/s" for m, (t, s) in profile.items())
+
+    print(f"\nlatency ({source})")
+    print(summarize("all-large", baseline))
+    print(summarize("routed", tiered))
+    saved = 1 - sum(tiered) / sum(baseline)
+    print(f"total translation time saved: {100 * saved:.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Translation routing eval")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--policy", help="Routing policy to evaluate (inline JSON or file; default: the configured one)")
+    parser.add_argument("--profile", nargs="*", metavar="MODEL=TTFT_MS:TOKENS_PER_S",
+                        help="Latency profile overrides for the offline projection")
+    parser.add_argument("--live", action="store_true", help="Time both models against the Groq API instead")
+    parser.add_argument("--show", action="store_true", help="With --live: print both translations of fast-routed lines")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Deterministic stand-ins for Groq and the TTS engines.
+
+Latency is drawn from a seeded log-normal distribution and failures are
+injected at a fixed rate, so two runs with the same seed see the same
+provider behaviour.
+"""
+import math
+import random
+import asyncio
+from types import SimpleNamespace
+from typing import Optional
+
+import groq
+import httpx
+
+from services.tts_service import TTSEngine
+
+
+class LatencyModel:
+    """Log-normal latency with a given median (seconds) and spread, plus a failure rate."""
+
+    def __init__(self, median: float = 0.0, sigma: float = 0.5, failure_rate: float = 0.0, seed: int = 0):
+        self.median = median
+        self.sigma = sigma
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(self._rng.gauss(0, self.sigma))
+
+    def should_fail(self) -> bool:
+        return self.failure_rate > 0 and self._rng.random() < self.failure_rate
+
+
+def _provider_error(status: int = 503) -> Exception:
+    request = httpx.Request("POST", "https://api.groq.com/fake")
+    response = httpx.Response(status, request=request, headers={"retry-after": "0"})
+    if status == 429:
+        return groq.RateLimitError("fake rate limit", response=response, body=None)
+    return groq.InternalServerError("fake provider error", response=response, body=None)
+
+
+def _completion(content: str, prompt_chars: int):
+    usage = SimpleNamespace(
+        prompt_tokens=prompt_chars // 4,
+        completion_tokens=max(1, len(content) // 4),
+        queue_time=0.0,
+    )
+    choice = SimpleNamespace(finish_reason="stop", message=SimpleNamespace(content=content))
+    return SimpleNamespace(choices=[choice], usage=usage)
+
+
+class _FakeChatCompletions:
+    def __init__(self, latency: LatencyModel, calls: dict):
+        self.latency = latency
+        self.calls = calls
+
+    async def create(self, model: str, messages: list, max_tokens: Optional[int] = None, **kwargs):
+        self.calls["chat"] += 1
+        await asyncio.sleep(self.latency.sample())
+        if self.latency.should_fail():
+            raise _provider_error(503)
+
+        system = messages[0]["content"] if messages else ""
+        user = messages[-1]["content"] if messages else ""
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        if "Detect the language" in system:
+            return _completion("en", prompt_chars)
+        if "medical documentation assistant" in system:
+            return _completion(
+                "## Patient Complaints & Symptoms\n- Fever\n\n## Follow-up Actions\n- Review in one week",
+                prompt_chars,
+            )
+        # Translation: echo keeps glossary placeholders intact, like a well-behaved model
+        return _completion(f"(translated) {user}", prompt_chars)
+
+
+class _FakeTranscriptions:
+    def __init__(self, latency: LatencyModel, calls: dict, text: str):
+        self.latency = latency
+        self.calls = calls
+        self.text = text
+
+    async def create(self, model: str, file, language: Optional[str] = None, **kwargs):
+        self.calls["whisper"] += 1
+        file.read()
+        await asyncio.sleep(self.latency.sample())
+        if self.latency.should_fail():
+            raise _provider_error(503)
+        return SimpleNamespace(text=self.text, language=language or "english", duration=3.2)
+
+
+class FakeGroqClient:
+    """Drop-in for the AsyncGroq client used by services.groq_service."""
+
+    def __init__(
+        self,
+        chat_latency: Optional[LatencyModel] = None,
+        whisper_latency: Optional[LatencyModel] = None,
+        transcript: str = "I have had a fever and a headache since yesterday.",
+    ):
+        self.calls = {"chat": 0, "whisper": 0}
+        self.chat = SimpleNamespace(completions=_FakeChatCompletions(chat_latency or LatencyModel(), self.calls))
+        self.audio = SimpleNamespace(
+            transcriptions=_FakeTranscriptions(whisper_latency or LatencyModel(), self.calls, transcript)
+        )
+
+
+class FakeTTSEngine(TTSEngine):
+    """TTS engine that sleeps instead of synthesizing and never touches disk."""
+
+    def __init__(self, name: str = "fake-tts", latency: Optional[LatencyModel] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.latency = latency or LatencyModel()
+        self.calls = 0
+
+    async def synthesize(self, text: str, language: str, role: str, file_path: str):
+        self.calls += 1
+        await asyncio.sleep(self.latency.sample())
+        if self.latency.should_fail():
+            raise RuntimeError(f"{self.name}: injected failure")
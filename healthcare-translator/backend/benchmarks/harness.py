@@ -0,0 +1,198 @@
+"""
+Shared plumbing for the offline load tests: isolated app setup, an
+in-process ASGI WebSocket client, latency statistics and JSON results.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import platform
+import resource
+import tempfile
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def prepare_environment(workdir: str, unlimited_quota: bool = True):
+    """
+    Point the app at a throwaway SQLite DB. Must run before `main` (or
+    anything importing `database`) is imported.
+    """
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault("GROQ_API_KEY", "offline-benchmark")
+    os.environ.setdefault("TRACING_EXPORTER", "none")
+    if unlimited_quota:
+        # Measure our own overhead, not the provider quota
+        os.environ["GROQ_CHAT_RPM"] = "1000000000"
+        os.environ["GROQ_WHISPER_RPM"] = "1000000000"
+    # Scenarios burst into a single conversation; keep admission control's
+    # per-room limits out of the way unless a run sets them explicitly
+    os.environ.setdefault("ADMISSION_MAX_PER_CONVERSATION", "64")
+    os.environ.setdefault("ADMISSION_MAX_QUEUE_PER_CONVERSATION", "1024")
+
+
+def load_app(fake_client, tts_engines, workdir: str):
+    """Import the app, create the schema and swap in the fake providers."""
+    import main
+    from database import init_db
+    from routers import audio as audio_router
+    from services import groq_service, tts_service
+
+    init_db()  # The lifespan hook doesn't run under in-process transports
+    groq_service.client = fake_client
+    tts_service.registry.engines = list(tts_engines)
+    tts_service.registry.audio_dir = workdir
+    audio_dir = os.path.join(workdir, "audio")
+    os.makedirs(audio_dir, exist_ok=True)
+    audio_router.AUDIO_DIR = audio_dir
+    return main.app
+
+
+# ============================================================
+# In-process ASGI WebSocket client
+# ============================================================
+class ASGIWebSocket:
+    """Minimal WebSocket client that talks to an ASGI app without a network."""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._to_app: asyncio.Queue = asyncio.Queue()
+        self._from_app: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def connect(self):
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "query_string": b"",
+            "headers": [],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+            "subprotocols": [],
+        }
+        self._task = asyncio.create_task(self.app(scope, self._to_app.get, self._from_app.put))
+        await self._to_app.put({"type": "websocket.connect"})
+        event = await self._from_app.get()
+        if event["type"] != "websocket.accept":
+            raise RuntimeError(f"WebSocket rejected: {event}")
+        return self
+
+    async def send_json(self, data: dict):
+        await self._to_app.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive_json(self, timeout: float = 30.0) -> dict:
+        while True:
+            event = await asyncio.wait_for(self._from_app.get(), timeout)
+            if event["type"] == "websocket.send":
+                text = event.get("text")
+                return json.loads(text if text is not None else event["bytes"])
+            if event["type"] == "websocket.close":
+                raise ConnectionError("WebSocket closed by server")
+
+    async def receive_until(self, msg_type: str, timeout: float = 30.0) -> dict:
+        while True:
+            data = await self.receive_json(timeout)
+            if data.get("type") == msg_type:
+                return data
+
+    async def close(self):
+        await self._to_app.put({"type": "websocket.disconnect", "code": 1000})
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, 5)
+            except (asyncio.TimeoutError, Exception):
+                self._task.cancel()
+
+
+# ============================================================
+# Results
+# ============================================================
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class ScenarioResult:
+    def __init__(self, name: str, params: Optional[dict] = None):
+        self.name = name
+        self.params = params or {}
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.extra: Dict[str, float] = {}
+        self._start = 0.0
+        self.duration = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = time.perf_counter() - self._start
+        return False
+
+    def to_dict(self) -> dict:
+        values = sorted(self.latencies)
+        n = len(values)
+        return {
+            "params": self.params,
+            "requests": n,
+            "errors": self.errors,
+            "duration_s": round(self.duration, 4),
+            "throughput_rps": round(n / self.duration, 2) if self.duration else 0.0,
+            "latency_ms": {
+                "mean": round(1000 * sum(values) / n, 3) if n else 0.0,
+                "p50": round(1000 * percentile(values, 50), 3),
+                "p95": round(1000 * percentile(values, 95), 3),
+                "p99": round(1000 * percentile(values, 99), 3),
+                "max": round(1000 * values[-1], 3) if n else 0.0,
+            },
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            **self.extra,
+        }
+
+
+def run_metadata(args: dict) -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": args,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold_pct: float) -> List[str]:
+    """Regressions of p95 latency or throughput beyond `threshold_pct`."""
+    problems = []
+    for name, result in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        p95, base_p95 = result["latency_ms"]["p95"], base["latency_ms"]["p95"]
+        if base_p95 and (p95 - base_p95) / base_p95 * 100 > threshold_pct:
+            problems.append(f"{name}: p95 {base_p95:.1f} → {p95:.1f} ms")
+        rps, base_rps = result["throughput_rps"], base["throughput_rps"]
+        if base_rps and (base_rps - rps) / base_rps * 100 > threshold_pct:
+            problems.append(f"{name}: throughput {base_rps:.1f} → {rps:.1f} req/s")
+    return problems
+
+
+def make_workdir() -> str:
+    return tempfile.mkdtemp(prefix="meditranslate-bench-")
@@ -0,0 +1,294 @@
+"""
+Offline load test for the backend.
+
+Boots the real FastAPI app in-process against a throwaway SQLite DB, with
+Groq and the TTS engines replaced by seeded fakes (benchmarks/fakes.py),
+and drives four scenarios:
+
+    ws_rooms      N concurrent doctor/patient rooms over /ws/{conversation_id}
+    audio_burst   a burst of concurrent audio uploads (Whisper → translate → TTS)
+    search        keyword searches against a seeded large DB
+    summary       summary generation on long conversations
+
+Results are printed and optionally written as JSON; pass --compare to fail
+(exit 1) when p95 latency or throughput regresses past --threshold percent.
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --rooms 50 --messages 20 --out baseline.json
+    python -m benchmarks.load_test --compare baseline.json --threshold 15
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import harness  # noqa: E402
+
+SCENARIOS = ("ws_rooms", "audio_burst", "search", "summary")
+
+SEED_PHRASES = [
+    "I have had a fever since yesterday",
+    "The pain is in my lower back",
+    "Take one tablet of paracetamol twice a day",
+    "Do you have any allergies to penicillin",
+    "My blood pressure was high last week",
+    "I feel dizzy when I stand up",
+    "We will schedule a chest x-ray tomorrow",
+    "Please come back in one week for a blood test",
+    "The cough is worse at night",
+    "I am taking metformin for diabetes",
+]
+SEARCH_TERMS = ["fever", "paracetamol", "blood", "dizzy", "x-ray", "cough", "metformin", "nothing-matches"]
+
+
+# ============================================================
+# SCENARIOS
+# ============================================================
+async def create_conversation(http, title: str) -> str:
+    response = await http.post(
+        "/api/conversations/",
+        json={"title": title, "doctor_language": "en", "patient_language": "es"},
+    )
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def scenario_ws_rooms(app, http, args) -> harness.ScenarioResult:
+    """Each room: doctor and patient take turns; latency is send → peer receives broadcast."""
+    result = harness.ScenarioResult("ws_rooms", {"rooms": args.rooms, "messages": args.messages})
+    room_ids = [await create_conversation(http, f"ws-room-{i}") for i in range(args.rooms)]
+
+    async def run_room(conversation_id: str):
+        doctor = await harness.ASGIWebSocket(app, f"/ws/{conversation_id}").connect()
+        patient = await harness.ASGIWebSocket(app, f"/ws/{conversation_id}").connect()
+        try:
+            for i in range(args.messages):
+                sender, peer = (doctor, patient) if i % 2 == 0 else (patient, doctor)
+                role = "doctor" if sender is doctor else "patient"
+                start = time.perf_counter()
+                await sender.send_json({
+                    "type": "text",
+                    "role": role,
+                    "content": SEED_PHRASES[i % len(SEED_PHRASES)],
+                    "source_language": "en" if role == "doctor" else "es",
+                    "target_language": "es" if role == "doctor" else "en",
+                })
+                try:
+                    await peer.receive_until("message")
+                    await sender.receive_until("message")
+                    result.latencies.append(time.perf_counter() - start)
+                except (asyncio.TimeoutError, ConnectionError):
+                    result.errors += 1
+        finally:
+            await doctor.close()
+            await patient.close()
+
+    with result:
+        await asyncio.gather(*(run_room(cid) for cid in room_ids))
+    return result
+
+
+async def scenario_audio_burst(app, http, args) -> harness.ScenarioResult:
+    result = harness.ScenarioResult("audio_burst", {"uploads": args.uploads})
+    conversation_id = await create_conversation(http, "audio-burst")
+    payload = os.urandom(16 * 1024)  # Content is irrelevant to the fake Whisper
+
+    async def upload(i: int):
+        start = time.perf_counter()
+        response = await http.post(
+            f"/api/conversations/{conversation_id}/audio",
+            files={"audio": (f"clip-{i}.webm", payload, "audio/webm")},
+            data={"role": "patient" if i % 2 else "doctor", "source_language": "auto"},
+        )
+        if response.status_code == 200:
+            result.latencies.append(time.perf_counter() - start)
+        else:
+            result.errors += 1
+
+    with result:
+        await asyncio.gather(*(upload(i) for i in range(args.uploads)))
+    return result
+
+
+def seed_messages(conversations: int, per_conversation: int, seed: int, prefix: str = "seed"):
+    """Bulk-insert a large message history directly (much faster than the API)."""
+    from database import engine
+    from models import Conversation, Message, MessageTypeEnum, RoleEnum
+    from datetime import datetime, timedelta, timezone
+
+    rng = random.Random(seed)
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    conv_rows, msg_rows = [], []
+    for c in range(conversations):
+        cid = f"{prefix}-{c:05d}"
+        conv_rows.append({
+            "id": cid, "title": f"Seeded consultation {c}",
+            "doctor_language": "en", "patient_language": "es",
+            "created_at": base, "updated_at": base,
+        })
+        for m in range(per_conversation):
+            text = rng.choice(SEED_PHRASES)
+            msg_rows.append({
+                "id": f"{cid}-{m:05d}",
+                "conversation_id": cid,
+                "seq": m + 1,
+                "role": RoleEnum.doctor if m % 2 == 0 else RoleEnum.patient,
+                "message_type": MessageTypeEnum.text,
+                "original_text": text,
+                "original_language": "en",
+                "translated_text": f"(translated) {text}",
+                "target_language": "es",
+                "created_at": base + timedelta(seconds=c * per_conversation + m),
+            })
+    with engine.begin() as conn:
+        conn.execute(Conversation.__table__.insert(), conv_rows)
+        conn.execute(Message.__table__.insert(), msg_rows)
+    return [row["id"] for row in conv_rows]
+
+
+async def scenario_search(app, http, args, seeded) -> harness.ScenarioResult:
+    result = harness.ScenarioResult(
+        "search", {"queries": args.queries, "seeded_messages": args.seed_conversations * args.seed_messages}
+    )
+    rng = random.Random(args.seed)
+
+    with result:
+        for _ in range(args.queries):
+            params = {"q": rng.choice(SEARCH_TERMS)}
+            if rng.random() < 0.3:
+                params["conversation_id"] = rng.choice(seeded)
+            start = time.perf_counter()
+            response = await http.get("/api/search/", params=params)
+            if response.status_code == 200:
+                result.latencies.append(time.perf_counter() - start)
+            else:
+                result.errors += 1
+    return result
+
+
+async def scenario_summary(app, http, args, seeded) -> harness.ScenarioResult:
+    result = harness.ScenarioResult(
+        "summary", {"summaries": args.summaries, "messages_per_conversation": args.seed_messages}
+    )
+
+    async def summarize(conversation_id: str):
+        start = time.perf_counter()
+        response = await http.post(f"/api/conversations/{conversation_id}/summary/")
+        if response.status_code == 200:
+            result.latencies.append(time.perf_counter() - start)
+        else:
+            result.errors += 1
+
+    with result:
+        await asyncio.gather(*(summarize(seeded[i % len(seeded)]) for i in range(args.summaries)))
+    return result
+
+
+# ============================================================
+# RUNNER
+# ============================================================
+async def run(args) -> dict:
+    workdir = harness.make_workdir()
+    try:
+        harness.prepare_environment(workdir, unlimited_quota=not args.quota)
+
+        import httpx
+        from benchmarks.fakes import FakeGroqClient, FakeTTSEngine, LatencyModel
+
+        fake_client = FakeGroqClient(
+            chat_latency=LatencyModel(args.chat_ms / 1000, args.sigma, args.failure_rate, args.seed),
+            whisper_latency=LatencyModel(args.whisper_ms / 1000, args.sigma, args.failure_rate, args.seed + 1),
+        )
+        fake_tts = FakeTTSEngine(latency=LatencyModel(args.tts_ms / 1000, args.sigma, args.failure_rate, args.seed + 2))
+        app = harness.load_app(fake_client, [fake_tts], workdir)
+
+        scenarios = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver", timeout=60) as http:
+            seeded = []
+            if {"search", "summary"} & set(args.scenarios):
+                seeded = seed_messages(args.seed_conversations, args.seed_messages, args.seed)
+
+            for name in args.scenarios:
+                print(f"[Bench] Running {name}...")
+                if name == "ws_rooms":
+                    result = await scenario_ws_rooms(app, http, args)
+                elif name == "audio_burst":
+                    result = await scenario_audio_burst(app, http, args)
+                elif name == "search":
+                    result = await scenario_search(app, http, args, seeded)
+                else:
+                    result = await scenario_summary(app, http, args, seeded)
+                scenarios[name] = result.to_dict()
+
+        return {
+            "meta": {**harness.run_metadata(vars(args)), "provider_calls": dict(fake_client.calls), "tts_calls": fake_tts.calls},
+            "scenarios": scenarios,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_report(results: dict):
+    print(f"\n{'scenario':<12} {'reqs':>6} {'err':>4} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'rss MB':>8}")
+    for name, r in results["scenarios"].items():
+        lat = r["latency_ms"]
+        print(f"{name:<12} {r['requests']:>6} {r['errors']:>4} {r['throughput_rps']:>9.1f} "
+              f"{lat['p50']:>9.2f} {lat['p95']:>9.2f} {lat['p99']:>9.2f} {r['peak_rss_mb']:>8.1f}")
+    print(f"\nprovider calls: {results['meta']['provider_calls']}  tts calls: {results['meta']['tts_calls']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline backend load test")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--rooms", type=int, default=20, help="Concurrent WebSocket rooms")
+    parser.add_argument("--messages", type=int, default=10, help="Messages per room")
+    parser.add_argument("--uploads", type=int, default=30, help="Concurrent audio uploads")
+    parser.add_argument("--queries", type=int, default=200, help="Search queries")
+    parser.add_argument("--summaries", type=int, default=10, help="Summary requests")
+    parser.add_argument("--seed-conversations", type=int, default=200)
+    parser.add_argument("--seed-messages", type=int, default=100, help="Messages per seeded conversation")
+    parser.add_argument("--chat-ms", type=float, default=40.0, help="Median fake chat latency")
+    parser.add_argument("--whisper-ms", type=float, default=150.0, help="Median fake Whisper latency")
+    parser.add_argument("--tts-ms", type=float, default=80.0, help="Median fake TTS latency")
+    parser.add_argument("--sigma", type=float, default=0.4, help="Log-normal spread of fake latencies")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Injected provider failure rate")
+    parser.add_argument("--quota", action="store_true", help="Keep the real GROQ_*_RPM rate limits")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Allowed regression in percent")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        problems = harness.compare(results, baseline, args.threshold)
+        if problems:
+            print(f"\nRegressions beyond {args.threshold}%:")
+            for p in problems:
+                print(f"  - {p}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold}% against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
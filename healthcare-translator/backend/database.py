@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
@@ -9,10 +9,40 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./healthcare_translator.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
+# --- SQLite production mode ---
+# Set on every new connection. WAL lets reads run while the writer commits;
+# synchronous=NORMAL only fsyncs at checkpoints (durable against app
+# crashes, may lose the last commits on power loss). SQLITE_TUNED=false
+# keeps SQLite's defaults.
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "true").lower() != "false"
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -1024 * int(os.getenv("SQLITE_CACHE_MB", "64")),  # negative = KiB
+    "mmap_size": 1024 * 1024 * int(os.getenv("SQLITE_MMAP_MB", "256")),
+    "temp_store": "MEMORY",
+}
+
+
+def apply_sqlite_pragmas(engine, pragmas: dict = SQLITE_PRAGMAS):
+    """Run `PRAGMA name=value` for each entry on every connection the engine opens."""
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {}
 )
+if IS_SQLITE and SQLITE_TUNED:
+    apply_sqlite_pragmas(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -24,3 +54,54 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def sync_schema(engine, base=Base):
+    """
+    create_all() never alters existing tables. Add any model columns missing
+    from an existing table (nullable/defaulted columns only) and any missing
+    indexes, so databases created before they were introduced keep working
+    without migrations.
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                print(f"[DB] Added column {table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+
+
+def init_db():
+    """
+    Create missing tables, columns and indexes and backfill derived data.
+    Runs from the app's lifespan hook by default; deploys that migrate in a
+    separate step (`python migrate.py`) set DB_INIT_ON_STARTUP=false so
+    cold starts skip the schema inspection.
+    """
+    from models import backfill_message_seq  # models imports this module
+
+    Base.metadata.create_all(bind=engine)
+    sync_schema(engine)
+    backfill_message_seq(engine)
+
+
+def warm_pool(connections: int = 2):
+    """Open (and return to the pool) a few connections so first requests skip the connect."""
+    held = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            held.append(conn)
+    finally:
+        for conn in held:
+            conn.close()
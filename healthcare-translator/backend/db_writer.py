@@ -0,0 +1,146 @@
+import os
+import asyncio
+from typing import Any, Callable, List, Optional, Tuple
+from sqlalchemy.orm import Session, sessionmaker
+from database import engine, IS_SQLITE
+from metrics import registry
+
+# Group commit is on by default for SQLite (one writer at a time anyway, and
+# every commit is a WAL append + lock round-trip); off for Postgres, where
+# concurrent commits are fine. That relies on message seq numbers being
+# reserved under a per-conversation row lock (models._assign_message_seq),
+# not read as max(seq) + 1. Override with DB_GROUP_COMMIT=true|false.
+DB_GROUP_COMMIT = os.getenv("DB_GROUP_COMMIT", "true" if IS_SQLITE else "false").lower() == "true"
+# Extra time the writer waits for more writes before committing a batch.
+# Writes queued while the previous commit runs are batched regardless.
+DB_COMMIT_WINDOW_MS = float(os.getenv("DB_COMMIT_WINDOW_MS", "0"))
+DB_COMMIT_MAX_BATCH = int(os.getenv("DB_COMMIT_MAX_BATCH", "100"))
+
+BATCH_SIZE = registry.histogram(
+    "db_commit_batch_size",
+    "Writes committed together by the group-commit writer.",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200),
+)
+
+WriteOp = Callable[[Session], Any]
+
+
+class GroupCommitWriter:
+    """
+    Single writer for the hot insert paths (chat messages from every room).
+
+    Callers pass a function that stages rows on a Session and returns what
+    they need back (e.g. the new Message). The writer task collects the ops
+    submitted while it was busy (plus up to `window` seconds more, at most
+    `max_batch`), runs them in a worker thread in one transaction and
+    commits once. If the batch fails, each op is retried in its own
+    transaction so only the bad one reports an error. Reads never go
+    through the writer.
+
+    Returned objects are detached but keep their loaded attributes
+    (expire_on_commit=False); relationships are not loaded.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        enabled: bool = DB_GROUP_COMMIT,
+        window: float = DB_COMMIT_WINDOW_MS / 1000,
+        max_batch: int = DB_COMMIT_MAX_BATCH,
+    ):
+        self._session_factory = session_factory or sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        self.enabled = enabled
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.writes = 0
+
+    async def submit(self, op: WriteOp) -> Any:
+        """Run `op(session)` and commit; returns op's return value once it is durable."""
+        if not self.enabled:
+            ok, value = (await asyncio.to_thread(self._commit, [op]))[0]
+            if not ok:
+                raise value
+            return value
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((op, future))
+        return await future
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        """Commit what is queued, then stop the writer task."""
+        if self._task is None or self._task.done():
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            deadline = self._loop.time() + self.window
+            while len(batch) < self.max_batch:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            outcomes = await asyncio.to_thread(self._commit, [op for op, _ in batch])
+            BATCH_SIZE.observe(len(batch))
+            self.batches += 1
+            self.writes += len(batch)
+            for (_, future), (ok, value) in zip(batch, outcomes):
+                if future.cancelled():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+            if stopping:
+                return
+
+    def _commit(self, ops: List[WriteOp]) -> List[Tuple[bool, Any]]:
+        """
+        Worker thread: all ops in one transaction, returning (ok, result or
+        exception) per op. On failure, one transaction per op.
+        """
+        session = self._session_factory()
+        try:
+            results = [op(session) for op in ops]
+            session.commit()
+            return [(True, r) for r in results]
+        except Exception as e:
+            session.rollback()
+            if len(ops) == 1:
+                return [(False, e)]
+        finally:
+            session.close()
+        return [self._commit([op])[0] for op in ops]
+
+
+# Singleton writer shared by the WebSocket and REST message paths
+db_writer = GroupCommitWriter()
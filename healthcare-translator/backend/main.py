@@ -1,19 +1,90 @@
 import os
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+
+# Before anything reads the environment (database.py reads DATABASE_URL at import)
+load_dotenv()
+
+from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from database import engine, Base
-from routers import conversations, messages, audio, summary, search, websocket
+from database import engine, init_db, warm_pool
+from routers import conversations, messages, audio, summary, search, websocket, glossary, jobs, phrase_bank
 from schemas import SUPPORTED_LANGUAGES
+from services import groq_service
+from services import phrase_bank as phrase_bank_service
+from services import speculation
+from services.groq_service import usage_tracker, route_stats, TRANSLATION_PROMPT_VERSION
+from services.tts_service import registry as tts_registry
+from ws_manager import manager
+from services.jobs import job_queue
+from services.archive import archiver
+from services.reclaimer import reclaimer
+from db_writer import db_writer
+from admission import admission_controller, Overloaded
+import metrics
+from tracing import tracer, instrument_sqlalchemy
+from responses import FastJSONResponse, CompressionMiddleware
+
+# DB spans for every statement
+instrument_sqlalchemy(engine)
+
+# --- Startup ---
+# Schema setup runs here rather than at import; serverless deploys that
+# migrate in a separate step (python migrate.py) can skip it entirely.
+DB_INIT_ON_STARTUP = os.getenv("DB_INIT_ON_STARTUP", "true").lower() != "false"
+# Opt-in: prime DB connections, the Groq HTTP pool and the TTS libraries
+# in the background so the first real request doesn't pay for them.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true"
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "2"))
+
+
+async def warm_up():
+    start = asyncio.get_running_loop().time()
+    try:
+        await asyncio.to_thread(warm_pool, WARMUP_DB_CONNECTIONS)
+        await asyncio.to_thread(tts_registry.preload)
+        client = await asyncio.to_thread(groq_service.get_client)
+        try:
+            # Any cheap authenticated call opens the keep-alive connection
+            await asyncio.wait_for(client.models.list(), timeout=10)
+        except Exception as e:
+            print(f"[Startup] Groq warm-up call failed: {e}")
+    except Exception as e:
+        print(f"[Startup] Warm-up failed: {e}")
+    else:
+        print(f"[Startup] Warm-up done in {asyncio.get_running_loop().time() - start:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_INIT_ON_STARTUP:
+        init_db()
+    job_queue.start()
+    manager.start()  # WebSocket heartbeat / idle reaping
+    archiver.start()  # Idle conversations → cold storage
+    reclaimer.start()  # Rows and audio files of deleted conversations
+    phrase_bank_service.phrase_bank.index()  # Starts loading the bank in the background
+    warmup = asyncio.create_task(warm_up()) if WARMUP_ON_STARTUP else None
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    await archiver.stop()
+    await reclaimer.stop()
+    await manager.stop()
+    await job_queue.stop()
+    await db_writer.stop()  # Commit writes still queued
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Healthcare Doctor-Patient Translation API",
     description="Real-time translation bridge between doctors and patients using AI",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS - Allow frontend to connect
@@ -32,6 +103,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON/text responses with Brotli or GZip, per Accept-Encoding (long message lists shrink ~10x); audio is skipped
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("GZIP_MIN_SIZE", "1024")))
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """One span per HTTP request; continues an incoming W3C traceparent."""
+    with tracer.start_span(
+        f"HTTP {request.method}",
+        traceparent=request.headers.get("traceparent"),
+        **{"http.method": request.method, "http.target": request.url.path},
+    ) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            span.name = f"HTTP {request.method} {route.path}"
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.status = "error"
+        response.headers["traceparent"] = span.traceparent
+        return response
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed by admission control: 503 with a Retry-After hint."""
+    return FastJSONResponse(
+        {"detail": str(exc), "retry_after": exc.retry_after},
+        status_code=503,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 # Mount audio files directory for serving
 AUDIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_files")
 os.makedirs(AUDIO_DIR, exist_ok=True)
@@ -44,6 +147,9 @@ app.include_router(audio.router)
 app.include_router(summary.router)
 app.include_router(search.router)
 app.include_router(websocket.router)
+app.include_router(glossary.router)
+app.include_router(jobs.router)
+app.include_router(phrase_bank.router)
 
 
 # --- Health & Info Endpoints ---
@@ -71,9 +177,56 @@ def get_supported_languages():
 
 @app.get("/api/health")
 def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "active_rooms": len(manager.active_connections),
+        "active_connections": manager.get_total_connections(),
+        "pipeline_in_flight": admission_controller.in_flight(),
+        "pipeline_queued": admission_controller.queue_depth(),
+        "degraded": admission_controller.under_pressure(),
+        "reclaimed": reclaimer.stats(),
+    }
+
+
+@app.get("/api/traces")
+def list_traces(limit: int = 20):
+    """Most recent root spans (TRACING_EXPORTER=memory only; unauthenticated, keep it off in production)."""
+    if not hasattr(tracer.exporter, "recent_traces"):
+        return {"traces": []}
+    return {"traces": tracer.exporter.recent_traces(limit)}
+
+
+@app.get("/api/traces/{trace_id}")
+def get_trace(trace_id: str):
+    """All spans recorded for a trace, in start order."""
+    spans = tracer.exporter.get_trace(trace_id) if hasattr(tracer.exporter, "get_trace") else []
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "spans": [s.to_dict() for s in spans]}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Prometheus scrape endpoint: stage latency histograms, gauges, fallback/error counters."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/usage")
+def get_usage():
+    """
+    Token usage and provider latency per call kind and language pair, per
+    translation route, phrase-bank savings and speculative draft translation.
+    """
+    bank = phrase_bank_service.phrase_bank.stats()
+    return {
+        "prompt_version": TRANSLATION_PROMPT_VERSION,
+        "usage": usage_tracker.snapshot(),
+        "routes": route_stats.snapshot(),
+        "phrase_bank": {key: bank[key] for key in ("hits", "hit_rate", "saved_translation_calls", "saved_tts_calls")},
+        "speculation": speculation.stats.snapshot(),
+    }
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True, ws_per_message_deflate=True)
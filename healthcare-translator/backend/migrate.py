@@ -0,0 +1,16 @@
+"""
+Schema migration step for deploys that keep it out of the server's startup:
+
+    python migrate.py
+
+then run the server with DB_INIT_ON_STARTUP=false.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import init_db  # noqa: E402
+
+if __name__ == "__main__":
+    init_db()
+    print("[DB] Schema is up to date")
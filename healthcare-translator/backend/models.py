@@ -1,7 +1,9 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Enum as SAEnum
-from sqlalchemy.orm import relationship
+from collections import defaultdict
+from sqlalchemy import Column, String, Text, Integer, DateTime, LargeBinary, ForeignKey, Index, UniqueConstraint, Enum as SAEnum
+from sqlalchemy import bindparam, event, func, select
+from sqlalchemy.orm import Session, relationship
 from database import Base
 import enum
 
@@ -16,6 +18,18 @@ class MessageTypeEnum(str, enum.Enum):
     audio = "audio"
 
 
+class JobStatusEnum(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+def split_languages(value: str) -> list:
+    """Language codes from a comma-separated column value ("fr,ar" → ["fr", "ar"])."""
+    return [code for code in (value or "").split(",") if code]
+
+
 class Conversation(Base):
     __tablename__ = "conversations"
 
@@ -23,17 +37,42 @@ class Conversation(Base):
     title = Column(String, default="New Conversation")
     doctor_language = Column(String, default="en")
     patient_language = Column(String, default="hi")
+    # Further listener languages (relatives, interpreters), comma-separated: "fr,ar"
+    extra_languages = Column(String, default="")
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    # Set while the messages live in conversation_archives instead of the hot tables
+    archived_at = Column(DateTime, nullable=True)
+    # Set by DELETE; hidden from then on, rows and files removed by services/reclaimer.py
+    deleted_at = Column(DateTime, nullable=True, index=True)
+    # Highest Message.seq handed out (NULL until the first message since it existed)
+    last_seq = Column(Integer, nullable=True)
 
     messages = relationship("Message", back_populates="conversation", order_by="Message.created_at")
 
+    @property
+    def listener_languages(self) -> list:
+        """Every language the room listens in: doctor, patient, then extras (no duplicates)."""
+        return list(dict.fromkeys([self.doctor_language, self.patient_language, *split_languages(self.extra_languages)]))
+
+    def add_listener_language(self, language: str) -> bool:
+        """Add `language` to the extras; False if the room already listens in it."""
+        if language in self.listener_languages:
+            return False
+        self.extra_languages = ",".join(split_languages(self.extra_languages) + [language])
+        return True
+
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_seq", "conversation_id", "seq", unique=True),
+    )
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id = Column(String, ForeignKey("conversations.id"), nullable=False)
+    # Per-conversation sequence (1, 2, 3...), assigned on insert; clients resume from it
+    seq = Column(Integer, nullable=True)
     role = Column(SAEnum(RoleEnum), nullable=False)
     message_type = Column(SAEnum(MessageTypeEnum), default=MessageTypeEnum.text)
 
@@ -44,6 +83,7 @@ class Message(Base):
     # Translated content
     translated_text = Column(Text, nullable=True)
     target_language = Column(String, nullable=True)
+    translation_model = Column(String, nullable=True)  # Model routed to ("glossary" for phrase hits)
 
     # Audio fields
     audio_file_path = Column(String, nullable=True)
@@ -53,6 +93,107 @@ class Message(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     conversation = relationship("Conversation", back_populates="messages")
+    translations = relationship("MessageTranslation", back_populates="message")
+
+
+class ConversationDeleted(LookupError):
+    """A message was saved into a conversation that was deleted meanwhile."""
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_message_seq(session, flush_context, instances):
+    """
+    Give new messages the next sequence numbers of their conversation.
+    Each conversation's range is reserved with one UPDATE ... RETURNING on
+    Conversation.last_seq: the row lock it takes holds off concurrent
+    writers to the same conversation until this transaction ends, so two
+    transactions never hand out the same seq.
+
+    The UPDATE skips deleted conversations, which makes it the save-time
+    check that a message translated while its conversation was being
+    deleted is not written into it (raises ConversationDeleted).
+    """
+    pending = defaultdict(list)
+    for obj in session.new:
+        if isinstance(obj, Message) and obj.seq is None:
+            pending[obj.conversation_id].append(obj)
+    if not pending:
+        return
+    conversations = Conversation.__table__
+    with session.no_autoflush:
+        # Sorted, so group commits spanning many rooms lock them in the same order
+        for conversation_id in sorted(pending):
+            new_messages = pending[conversation_id]
+            current = select(func.coalesce(func.max(Message.seq), 0)).where(
+                Message.conversation_id == conversation_id
+            ).scalar_subquery()
+            last = session.execute(
+                conversations.update()
+                .where(conversations.c.id == conversation_id, conversations.c.deleted_at.is_(None))
+                .values(
+                    last_seq=func.coalesce(conversations.c.last_seq, current) + len(new_messages),
+                    updated_at=conversations.c.updated_at,  # Not a conversation edit
+                )
+                .returning(conversations.c.last_seq)
+            ).scalar()
+            if last is None:
+                if session.execute(select(conversations.c.id).where(conversations.c.id == conversation_id)).first():
+                    raise ConversationDeleted(conversation_id)
+                # No conversation row (foreign keys unenforced): nothing to lock
+                last = session.execute(select(current)).scalar() + len(new_messages)
+            for offset, msg in enumerate(new_messages):
+                msg.seq = last - len(new_messages) + 1 + offset
+
+
+def backfill_message_seq(engine):
+    """Number messages stored before `seq` existed, in created_at order."""
+    with engine.begin() as conn:
+        missing = conn.execute(
+            select(Message.conversation_id).where(Message.seq.is_(None)).distinct()
+        ).scalars().all()
+        for conversation_id in missing:
+            current = conn.execute(
+                select(func.max(Message.seq)).where(Message.conversation_id == conversation_id)
+            ).scalar() or 0
+            ids = conn.execute(
+                select(Message.id)
+                .where(Message.conversation_id == conversation_id, Message.seq.is_(None))
+                .order_by(Message.created_at.asc(), Message.id.asc())
+            ).scalars().all()
+            conn.execute(
+                Message.__table__.update().where(Message.__table__.c.id == bindparam("_id")),
+                [{"_id": mid, "seq": current + i} for i, mid in enumerate(ids, start=1)],
+            )
+            # Recomputed from max(seq) on the next insert
+            conn.execute(
+                Conversation.__table__.update()
+                .where(Conversation.__table__.c.id == conversation_id)
+                .values(last_seq=None, updated_at=Conversation.__table__.c.updated_at)
+            )
+        if missing:
+            print(f"[DB] Backfilled message sequence numbers for {len(missing)} conversation(s)")
+
+
+class MessageTranslation(Base):
+    """
+    One message rendered in one listener language. Multi-party rooms fan a
+    message out to every listener language; Message.translated_text keeps
+    the doctor/patient counterpart translation for two-party clients.
+    """
+    __tablename__ = "message_translations"
+    __table_args__ = (
+        UniqueConstraint("message_id", "language", name="uq_message_translations_message_language"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    message_id = Column(String, ForeignKey("messages.id"), nullable=False, index=True)
+    language = Column(String, nullable=False)
+    translated_text = Column(Text, nullable=True)
+    translation_model = Column(String, nullable=True)
+    tts_audio_path = Column(String, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    message = relationship("Message", back_populates="translations")
 
 
 class ConversationSummary(Base):
@@ -61,4 +202,104 @@ class ConversationSummary(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id = Column(String, ForeignKey("conversations.id"), nullable=False)
     summary_text = Column(Text, nullable=False)
+
+    # What was summarized: hash of the covered messages + their range, so an
+    # unchanged conversation reuses its summary instead of calling the LLM
+    content_fingerprint = Column(String, nullable=True, index=True)
+    first_message_id = Column(String, nullable=True)
+    last_message_id = Column(String, nullable=True)
+    message_count = Column(Integer, nullable=True)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class ConversationArchive(Base):
+    """
+    Cold storage for an idle conversation: its messages, translations and
+    summaries (audio file references included) as one compressed blob.
+    Restored into the hot tables on the next access (services/archive.py).
+    """
+    __tablename__ = "conversation_archives"
+
+    conversation_id = Column(String, ForeignKey("conversations.id"), primary_key=True)
+    codec = Column(String, nullable=False, default="zlib+json")
+    payload = Column(LargeBinary, nullable=False)
+    message_count = Column(Integer, nullable=False, default=0)
+    raw_bytes = Column(Integer, nullable=False, default=0)  # Uncompressed payload size
+    last_message_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class ArchiveSearchTerm(Base):
+    """Search index over archived conversations: one row per distinct token per conversation."""
+    __tablename__ = "archive_search_terms"
+
+    term = Column(String, primary_key=True)
+    conversation_id = Column(String, ForeignKey("conversations.id"), primary_key=True, index=True)
+
+
+class GlossaryTerm(Base):
+    __tablename__ = "glossary_terms"
+    __table_args__ = (
+        UniqueConstraint("source_language", "target_language", "source_term", name="uq_glossary_term"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    source_language = Column(String, nullable=False, index=True)
+    target_language = Column(String, nullable=False, index=True)
+    source_term = Column(String, nullable=False)  # normalize_phrase() form (lowercased, spacing collapsed, edge punctuation stripped)
+    target_term = Column(String, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class PhraseBankPhrase(Base):
+    """A canonical phrase whose translations and TTS audio are precomputed (services/phrase_bank.py)."""
+    __tablename__ = "phrase_bank"
+    __table_args__ = (
+        UniqueConstraint("source_language", "role", "normalized", name="uq_phrase_bank_phrase"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    text = Column(Text, nullable=False)  # As entered by the administrator
+    normalized = Column(Text, nullable=False)  # What live messages are matched on
+    source_language = Column(String, nullable=False, default="en")
+    role = Column(String, nullable=False, default="doctor")  # Who says it (translation prompts differ)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class PhraseBankEntry(Base):
+    """One phrase-bank phrase in one language, with its audio in both voices."""
+    __tablename__ = "phrase_bank_entries"
+    __table_args__ = (
+        UniqueConstraint("phrase_id", "language", name="uq_phrase_bank_entries_phrase_language"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    phrase_id = Column(String, ForeignKey("phrase_bank.id"), nullable=False, index=True)
+    language = Column(String, nullable=False)
+    translated_text = Column(Text, nullable=True)
+    translation_model = Column(String, nullable=True)
+    doctor_audio_path = Column(String, nullable=True)  # DOCTOR_VOICE_OVERRIDE voice (same file if none)
+    patient_audio_path = Column(String, nullable=True)  # VOICE_MAP voice
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+class Job(Base):
+    """Background work item (summary, bulk translation, re-TTS, export) run by the job queue."""
+
+    __tablename__ = "jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = Column(String, nullable=False, index=True)
+    conversation_id = Column(String, nullable=True, index=True)
+    status = Column(SAEnum(JobStatusEnum), nullable=False, default=JobStatusEnum.pending, index=True)
+    params = Column(Text, nullable=False, default="{}")  # JSON
+    dedup_key = Column(String, nullable=False, index=True)  # Identical pending/running jobs share this
+    progress = Column(Integer, nullable=False, default=0)  # Percent
+    result = Column(Text, nullable=True)  # JSON
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
@@ -0,0 +1,37 @@
+"""
+Storage reclamation outside the server:
+
+    python reclaim.py                      # remove conversations already marked deleted
+    python reclaim.py --orphans --dry-run  # report rows and audio/export files nothing refers to
+    python reclaim.py --orphans            # ...and remove them
+
+The server reclaims deleted conversations by itself; --orphans is the
+one-off cleanup for what older versions left behind when deleting.
+"""
+import argparse
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import init_db  # noqa: E402
+from services.reclaimer import reclaimer  # noqa: E402
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reclaim storage of deleted conversations")
+    parser.add_argument("--orphans", action="store_true", help="Also sweep orphaned rows and unreferenced files")
+    parser.add_argument("--dry-run", action="store_true", help="With --orphans: only report what would be removed")
+    parser.add_argument("--grace", type=float, default=None, help="Skip files modified within this many seconds")
+    args = parser.parse_args()
+
+    init_db()
+    if not args.dry_run:
+        print(f"[Reclaim] {reclaimer.run_once()} deleted conversation(s) reclaimed")
+    if args.orphans:
+        kwargs = {} if args.grace is None else {"grace": args.grace}
+        report = reclaimer.sweep_orphans(dry_run=args.dry_run, **kwargs)
+        verb = "Would remove" if args.dry_run else "Removed"
+        for name, count in report.items():
+            if name != "bytes":
+                print(f"[Reclaim] {verb} {count} {name.replace('_', ' ')}")
+        print(f"[Reclaim] {verb} {report['bytes'] / (1024 * 1024):.1f} MB of files")
+    print(f"[Reclaim] Freed {reclaimer.stats()['bytes'] / (1024 * 1024):.1f} MB")
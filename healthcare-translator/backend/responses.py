@@ -0,0 +1,151 @@
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterable, List, Sequence
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson (stdlib json if unavailable).
+
+    List endpoints return this directly with plain dicts built from
+    column-only selects, which skips per-row Pydantic validation and
+    FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default)
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def rows_to_dicts(rows: Iterable, keys: Sequence[str]) -> List[dict]:
+    """Turn result rows from a column-only select() into dicts keyed by `keys`."""
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Codings a client accepts ("gzip, br;q=1.0, deflate;q=0" → {"gzip", "br"})."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding.strip():
+            accepted.add(coding.strip())
+    return accepted
+
+
+class BrotliResponder:
+    """
+    Brotli counterpart of Starlette's GZipResponder: the response start is
+    held back until the first body chunk says whether to compress (not if
+    it is small and complete, or already has a Content-Encoding).
+    """
+
+    def __init__(self, app, minimum_size: int, quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+        self.start = None
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        async def send_br(message):
+            if message["type"] == "http.response.start":
+                self.start = message
+                self.passthrough = "content-encoding" in Headers(raw=message["headers"])
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if self.started:
+                if not self.passthrough:
+                    message = {**message, "body": self._compress(body, more_body)}
+                await send(message)
+                return
+
+            self.started = True
+            if self.passthrough or (len(body) < self.minimum_size and not more_body):
+                self.passthrough = True
+                await send(self.start)
+                await send(message)
+                return
+            compressed = self._compress(body, more_body)
+            headers = MutableHeaders(raw=self.start["headers"])
+            headers["Content-Encoding"] = "br"
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(compressed))
+            await send(self.start)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_br)
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        return data if more_body else data + self.compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when the `brotli` package is installed and the client sends
+    "br" in Accept-Encoding), else GZip, for HTTP responses above
+    `minimum_size`, except paths that serve already-compressed media
+    (audio) where it only costs CPU.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        compresslevel: int = 6,
+        brotli_quality: int = 4,
+        exclude_prefixes: Sequence[str] = ("/api/audio",),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        # Level 6: nearly level 9's ratio on JSON at a fraction of the CPU
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        # Quality 4: about gzip 6's CPU per response, with smaller output on JSON
+        self.brotli_quality = brotli_quality
+        self.exclude_prefixes = tuple(exclude_prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+        elif brotli is not None and "br" in accepted_encodings(Headers(scope=scope).get("Accept-Encoding", "")):
+            await BrotliResponder(self.app, self.minimum_size, self.brotli_quality)(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
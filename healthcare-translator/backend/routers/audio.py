@@ -4,15 +4,22 @@ from fastapi import APIRouter, UploadFile, File, Form, Query, Depends, HTTPExcep
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from database import get_db
-from models import Conversation, Message, MessageTypeEnum, RoleEnum
+from models import Conversation, ConversationDeleted, Message, MessageTypeEnum, RoleEnum
 from schemas import MessageResponse
-from services.groq_service import transcribe_audio, translate_message
-from services.tts_service import text_to_speech
+from services.groq_service import transcribe_audio, resolve_source_language
+from services.tts_service import text_to_speech, registry as tts_registry
+from services.fanout import fan_out, add_translations
+from metrics import timed
+from db_writer import db_writer
+from admission import Admission, admit_request
+from services.archive import ensure_hot_async
 
 router = APIRouter(prefix="/api", tags=["audio"])
 
 AUDIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "audio_files")
 os.makedirs(AUDIO_DIR, exist_ok=True)
+# Uploaded originals; the reclaimer's orphan sweep only touches files with this prefix
+UPLOAD_AUDIO_PREFIX = "upload_"
 
 
 @router.post("/conversations/{conversation_id}/audio", response_model=MessageResponse)
@@ -21,6 +28,7 @@ async def upload_and_process_audio(
     audio: UploadFile = File(...),
     role: str = Form(...),
     source_language: str = Form("auto"),
+    admission: Admission = Depends(admit_request("audio")),
     db: Session = Depends(get_db),
 ):
     """
@@ -32,14 +40,25 @@ async def upload_and_process_audio(
     5. Both text + audio stored & returned
     
     Result: Doctor speaks Korean → Patient HEARS Chinese
+
+    Under overload the TTS step is skipped (text only; a "re_tts" job can voice
+    it later) and excess uploads get 503 + Retry-After.
     """
-    conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
+    await ensure_hot_async(db, conv)
+
+    # Counterpart (primary) target language and all listener languages, read
+    # now so no pooled connection is held across the provider calls below
+    role_enum = RoleEnum.doctor if role == "doctor" else RoleEnum.patient
+    target_language = conv.patient_language if role == "doctor" else conv.doctor_language
+    languages = [target_language, *conv.listener_languages]
+    db.commit()
 
     # 1. Save original audio file
     file_ext = audio.filename.split(".")[-1] if audio.filename else "webm"
-    filename = f"{uuid.uuid4()}.{file_ext}"
+    filename = f"{UPLOAD_AUDIO_PREFIX}{uuid.uuid4()}.{file_ext}"
     file_path = os.path.join(AUDIO_DIR, filename)
 
     content = await audio.read()
@@ -49,58 +68,52 @@ async def upload_and_process_audio(
     # 2. Transcribe with Groq Whisper
     try:
         lang_hint = source_language if source_language != "auto" else None
-        transcription = await transcribe_audio(file_path, language=lang_hint)
+        with timed("transcription"):
+            transcription = await transcribe_audio(file_path, language=lang_hint)
         transcribed_text = transcription["text"]
         detected_language = transcription.get("language", source_language)
         audio_duration = str(transcription.get("duration", ""))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
 
-    # 3. Determine target language and translate
-    role_enum = RoleEnum.doctor if role == "doctor" else RoleEnum.patient
-    target_language = conv.patient_language if role == "doctor" else conv.doctor_language
+    # Whisper reports language names ("hindi"); normalize to our codes
+    with timed("detection"):
+        detected_language = await resolve_source_language(transcribed_text, detected_language)
 
-    translated_text = None
-    try:
-        translated_text = await translate_message(
-            text=transcribed_text,
-            source_language=detected_language,
+    # 3. Translate into every listener language and voice each one, so
+    #    the listener hears their language (multi-party rooms: all of them)
+    translations = await fan_out(
+        transcribed_text, detected_language, languages, role,
+        with_tts=not admission.degraded,
+    )
+    primary = translations.get(target_language, {"translated_text": transcribed_text, "model": None, "tts_audio_path": None})
+    translated_text = primary["translated_text"]
+    tts_file = primary["tts_audio_path"]
+
+    # 4. Save message to database
+    def save(session: Session) -> Message:
+        message = Message(
+            conversation_id=conversation_id,
+            role=role_enum,
+            message_type=MessageTypeEnum.audio,
+            original_text=transcribed_text,
+            original_language=detected_language,
+            translated_text=translated_text,
             target_language=target_language,
-            role=role,
+            translation_model=primary["model"],
+            audio_file_path=filename,
+            audio_duration=audio_duration,
+            tts_audio_path=tts_file,
         )
-    except Exception as e:
-        translated_text = f"[Translation unavailable: {str(e)}]"
+        session.add(message)
+        add_translations(session, message, translations)
+        return message
 
-    # 4. Generate TTS audio for the translated text
-    tts_file = None
-    try:
-        if translated_text and not translated_text.startswith("[Translation"):
-            # Generate speech in the TARGET language so the listener hears their language
-            listener_role = "patient" if role == "doctor" else "doctor"
-            tts_file = await text_to_speech(
-                text=translated_text,
-                language=target_language,
-                role=listener_role,
-            )
-    except Exception as e:
-        print(f"TTS generation failed (non-critical): {e}")
-
-    # 5. Save message to database
-    message = Message(
-        conversation_id=conversation_id,
-        role=role_enum,
-        message_type=MessageTypeEnum.audio,
-        original_text=transcribed_text,
-        original_language=detected_language,
-        translated_text=translated_text,
-        target_language=target_language,
-        audio_file_path=filename,
-        audio_duration=audio_duration,
-        tts_audio_path=tts_file,
-    )
-    db.add(message)
-    db.commit()
-    db.refresh(message)
+    with timed("db_commit"):
+        try:
+            message = await db_writer.submit(save)
+        except ConversationDeleted:
+            raise HTTPException(status_code=404, detail="Conversation not found")
 
     return MessageResponse.model_validate(message)
 
@@ -123,6 +136,12 @@ async def generate_tts(
         raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
 
 
+@router.get("/tts/engines")
+def get_tts_engines():
+    """Health of each TTS engine (circuit breaker state, rolling latency/error rate)."""
+    return {"engines": tts_registry.status()}
+
+
 @router.get("/audio/{filename}")
 async def serve_audio(filename: str):
     """Serve stored audio files (original recordings + TTS generated)."""
@@ -1,21 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from typing import List
+from datetime import datetime, timezone
 from database import get_db
-from models import Conversation, Message
-from schemas import ConversationCreate, ConversationResponse
+from models import Conversation, ConversationArchive, Message, split_languages
+from schemas import ConversationCreate, ConversationResponse, SUPPORTED_LANGUAGES
+from responses import FastJSONResponse, rows_to_dicts
+from services.archive import archive_conversation, ensure_hot
+from services.reclaimer import reclaimer
+from ws_manager import manager
 
 router = APIRouter(prefix="/api/conversations", tags=["conversations"])
 
+CONVERSATION_FIELDS = list(ConversationResponse.model_fields)  # Matches the select in list_conversations
+
 
 @router.post("/", response_model=ConversationResponse)
 def create_conversation(data: ConversationCreate, db: Session = Depends(get_db)):
+    unsupported = [code for code in data.extra_languages if code not in SUPPORTED_LANGUAGES]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported language(s): {', '.join(unsupported)}")
     conversation = Conversation(
         title=data.title,
         doctor_language=data.doctor_language,
         patient_language=data.patient_language,
     )
+    for code in data.extra_languages:
+        conversation.add_listener_language(code)
     db.add(conversation)
     db.commit()
     db.refresh(conversation)
@@ -24,6 +36,7 @@ def create_conversation(data: ConversationCreate, db: Session = Depends(get_db))
         title=conversation.title,
         doctor_language=conversation.doctor_language,
         patient_language=conversation.patient_language,
+        extra_languages=split_languages(conversation.extra_languages),
         created_at=conversation.created_at,
         updated_at=conversation.updated_at,
         message_count=0,
@@ -32,33 +45,49 @@ def create_conversation(data: ConversationCreate, db: Session = Depends(get_db))
 
 @router.get("/", response_model=List[ConversationResponse])
 def list_conversations(db: Session = Depends(get_db)):
-    conversations = db.query(Conversation).order_by(Conversation.updated_at.desc()).all()
-    result = []
-    for conv in conversations:
-        msg_count = db.query(func.count(Message.id)).filter(Message.conversation_id == conv.id).scalar()
-        result.append(ConversationResponse(
-            id=conv.id,
-            title=conv.title,
-            doctor_language=conv.doctor_language,
-            patient_language=conv.patient_language,
-            created_at=conv.created_at,
-            updated_at=conv.updated_at,
-            message_count=msg_count,
-        ))
-    return result
+    # One grouped count instead of a COUNT query per conversation
+    counts = (
+        select(Message.conversation_id, func.count(Message.id).label("message_count"))
+        .group_by(Message.conversation_id)
+        .subquery()
+    )
+    rows = db.connection().execute(
+        select(
+            Conversation.id,
+            Conversation.title,
+            Conversation.doctor_language,
+            Conversation.patient_language,
+            Conversation.extra_languages,
+            Conversation.created_at,
+            Conversation.updated_at,
+            # Archived conversations keep their count on the archive row
+            func.coalesce(counts.c.message_count, ConversationArchive.message_count, 0),
+            Conversation.archived_at,
+        )
+        .outerjoin(counts, counts.c.conversation_id == Conversation.id)
+        .outerjoin(ConversationArchive, ConversationArchive.conversation_id == Conversation.id)
+        .where(Conversation.deleted_at.is_(None))
+        .order_by(Conversation.updated_at.desc())
+    )
+    conversations = rows_to_dicts(rows, CONVERSATION_FIELDS)
+    for conversation in conversations:
+        conversation["extra_languages"] = split_languages(conversation["extra_languages"])
+    return FastJSONResponse(conversations)
 
 
 @router.get("/{conversation_id}", response_model=ConversationResponse)
 def get_conversation(conversation_id: str, db: Session = Depends(get_db)):
-    conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+    conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
+    ensure_hot(db, conv)
     msg_count = db.query(func.count(Message.id)).filter(Message.conversation_id == conv.id).scalar()
     return ConversationResponse(
         id=conv.id,
         title=conv.title,
         doctor_language=conv.doctor_language,
         patient_language=conv.patient_language,
+        extra_languages=split_languages(conv.extra_languages),
         created_at=conv.created_at,
         updated_at=conv.updated_at,
         message_count=msg_count,
@@ -66,11 +95,38 @@ def get_conversation(conversation_id: str, db: Session = Depends(get_db)):
 
 
 @router.delete("/{conversation_id}")
-def delete_conversation(conversation_id: str, db: Session = Depends(get_db)):
-    conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+async def delete_conversation(conversation_id: str, db: Session = Depends(get_db)):
+    """
+    Delete a conversation. It disappears at once (lists, search, lookups);
+    its messages, summaries and audio files are removed in the background.
+    """
+    conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
-    db.query(Message).filter(Message.conversation_id == conversation_id).delete()
-    db.delete(conv)
+    conv.deleted_at = datetime.now(timezone.utc)
     db.commit()
+    await manager.close_room(conversation_id, code=4004, reason="Conversation deleted")
+    reclaimer.wake()
     return {"message": "Conversation deleted"}
+
+
+@router.post("/{conversation_id}/archive")
+def archive(conversation_id: str, db: Session = Depends(get_db)):
+    """Move a conversation to cold storage now instead of waiting for the idle sweep."""
+    conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
+    if not conv:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if conv.archived_at is not None:
+        return {"message": "Conversation already archived", "archived_at": conv.archived_at}
+    if manager.get_room_count(conversation_id):
+        raise HTTPException(status_code=409, detail="Conversation has connected clients")
+    stored = archive_conversation(db, conversation_id)
+    if stored is None:
+        raise HTTPException(status_code=409, detail="Conversation changed while archiving, try again")
+    return {
+        "message": "Conversation archived",
+        "archived_at": stored.archived_at,
+        "message_count": stored.message_count,
+        "raw_bytes": stored.raw_bytes,
+        "compressed_bytes": len(stored.payload),
+    }
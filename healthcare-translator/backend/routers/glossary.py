@@ -0,0 +1,95 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from database import get_db
+from models import GlossaryTerm
+from schemas import GlossaryTermCreate, GlossaryTermResponse
+from services.glossary import glossary_store, normalize_phrase
+
+router = APIRouter(prefix="/api/glossary", tags=["glossary"])
+
+
+@router.get("/", response_model=List[GlossaryTermResponse])
+def list_terms(
+    source_language: Optional[str] = Query(None),
+    target_language: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """List glossary terms, optionally for a single language pair."""
+    query = db.query(GlossaryTerm)
+    if source_language:
+        query = query.filter(GlossaryTerm.source_language == source_language)
+    if target_language:
+        query = query.filter(GlossaryTerm.target_language == target_language)
+    terms = query.order_by(GlossaryTerm.source_term.asc()).all()
+    return [GlossaryTermResponse.model_validate(t) for t in terms]
+
+
+@router.post("/", response_model=List[GlossaryTermResponse])
+def upsert_terms(data: List[GlossaryTermCreate], db: Session = Depends(get_db)):
+    """
+    Add or update glossary terms (bulk). Source terms are stored normalized
+    (lowercase, single spaces, no trailing punctuation), which is how
+    messages are matched; an existing term for the same language pair and
+    normalized source gets its translation replaced.
+    """
+    saved = {}
+    pairs = set()
+    for item in data:
+        source_term = normalize_phrase(item.source_term)
+        target_term = item.target_term.strip()
+        if not source_term or not target_term:
+            raise HTTPException(status_code=400, detail="Glossary terms cannot be empty")
+
+        key = (item.source_language, item.target_language, source_term)
+        term = saved.get(key)
+        if term is None:
+            # Rows stored before normalization may differ in case only; merge them into one
+            variants = db.query(GlossaryTerm).filter(
+                GlossaryTerm.source_language == item.source_language,
+                GlossaryTerm.target_language == item.target_language,
+                func.lower(GlossaryTerm.source_term) == source_term,
+            ).order_by(GlossaryTerm.created_at.asc()).all()
+            term = variants[0] if variants else None
+            for duplicate in variants[1:]:
+                db.delete(duplicate)
+            db.flush()  # Deletes first, or renaming the kept row could collide with one
+        if term:
+            term.source_term = source_term
+            term.target_term = target_term
+        else:
+            term = GlossaryTerm(
+                source_language=item.source_language,
+                target_language=item.target_language,
+                source_term=source_term,
+                target_term=target_term,
+            )
+            db.add(term)
+        saved[key] = term
+        pairs.add((item.source_language, item.target_language))
+    db.commit()
+
+    for source_language, target_language in pairs:
+        glossary_store.invalidate(source_language, target_language)
+    for term in saved.values():
+        db.refresh(term)
+    return [GlossaryTermResponse.model_validate(t) for t in saved.values()]
+
+
+@router.delete("/{term_id}")
+def delete_term(term_id: str, db: Session = Depends(get_db)):
+    term = db.query(GlossaryTerm).filter(GlossaryTerm.id == term_id).first()
+    if not term:
+        raise HTTPException(status_code=404, detail="Glossary term not found")
+    pair = (term.source_language, term.target_language)
+    db.delete(term)
+    db.commit()
+    glossary_store.invalidate(*pair)
+    return {"message": "Glossary term deleted"}
+
+
+@router.get("/stats")
+def glossary_stats():
+    """How often the glossary answered a message outright or locked terms in it."""
+    return glossary_store.stats()
@@ -0,0 +1,73 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from typing import List
+from database import get_db
+from models import Conversation, Job, JobStatusEnum
+from schemas import JobCreate, JobResponse
+from services.jobs import job_queue, job_to_dict, EXPORT_DIR
+
+router = APIRouter(prefix="/api", tags=["jobs"])
+
+
+@router.post("/conversations/{conversation_id}/jobs", response_model=JobResponse, status_code=202)
+def create_job(conversation_id: str, data: JobCreate, db: Session = Depends(get_db)):
+    """
+    Queue background work for a conversation: "summary", "bulk_translate"
+    (params: target_language), "re_tts" (params: only_missing) or "export"
+    (params: format = json | txt). Progress and completion are pushed to the
+    conversation's WebSocket room as {"type": "job", "job": {...}}.
+
+    An identical job that is still pending or running is returned instead of
+    queueing a duplicate (200, deduplicated=true).
+    """
+    conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
+    if not conv:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if data.kind not in job_queue.handlers:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job kind '{data.kind}'. Available: {', '.join(sorted(job_queue.handlers))}",
+        )
+
+    job, created = job_queue.enqueue(db, data.kind, conversation_id, data.params)
+    body = JobResponse(**job_to_dict(job, deduplicated=not created))
+    if not created:
+        return JSONResponse(status_code=200, content=jsonable_encoder(body))
+    return body
+
+
+@router.get("/conversations/{conversation_id}/jobs", response_model=List[JobResponse])
+def list_conversation_jobs(conversation_id: str, db: Session = Depends(get_db)):
+    """Jobs for a conversation, newest first."""
+    jobs = db.query(Job).filter(
+        Job.conversation_id == conversation_id
+    ).order_by(Job.created_at.desc()).limit(50).all()
+    return [JobResponse(**job_to_dict(j)) for j in jobs]
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job_to_dict(job))
+
+
+@router.get("/jobs/{job_id}/download")
+def download_export(job_id: str, db: Session = Depends(get_db)):
+    """Download the file produced by a finished export job."""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job or job.kind != "export":
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != JobStatusEnum.succeeded:
+        raise HTTPException(status_code=409, detail=f"Export is {job.status.value}")
+
+    filename = job_to_dict(job)["result"]["filename"]
+    path = os.path.join(EXPORT_DIR, filename)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Export file no longer available")
+    media_type = "application/json" if filename.endswith(".json") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=f"conversation-{job.conversation_id}{os.path.splitext(filename)[1]}")
@@ -1,68 +1,119 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import and_, case, literal, null, or_, select
+from typing import List, Optional
 from database import get_db
-from models import Conversation, Message, MessageTypeEnum
+from models import Conversation, ConversationDeleted, Message, MessageTranslation, MessageTypeEnum
 from schemas import MessageCreate, MessageResponse
-from services.groq_service import translate_message
+from services.groq_service import resolve_source_language
+from services.fanout import fan_out, add_translations
+from metrics import timed
+from db_writer import db_writer
+from admission import Admission, admit_request
+from responses import FastJSONResponse, rows_to_dicts
+from services.archive import ensure_hot, ensure_hot_async
 
 router = APIRouter(prefix="/api/conversations/{conversation_id}/messages", tags=["messages"])
 
+MESSAGE_FIELDS = list(MessageResponse.model_fields)
+MESSAGE_COLUMNS = [getattr(Message, name) for name in MESSAGE_FIELDS]
+
+
+def _localized_columns(language: str) -> list:
+    """MESSAGE_COLUMNS with the translation fields taken from `language`'s row (same rules as localize_message)."""
+    own = Message.original_language == language
+    found = MessageTranslation.id.isnot(None)
+    replaced = {
+        "translated_text": case((own, null()), (found, MessageTranslation.translated_text), else_=Message.translated_text),
+        "target_language": case((or_(own, found), literal(language)), else_=Message.target_language),
+        "translation_model": case((own, null()), (found, MessageTranslation.translation_model), else_=Message.translation_model),
+        "tts_audio_path": case((own, null()), (found, MessageTranslation.tts_audio_path), else_=Message.tts_audio_path),
+    }
+    return [replaced.get(name, column).label(name) for name, column in zip(MESSAGE_FIELDS, MESSAGE_COLUMNS)]
+
 
 @router.get("/", response_model=List[MessageResponse])
-def get_messages(conversation_id: str, db: Session = Depends(get_db)):
-    """Get all messages for a conversation (with translations)."""
-    conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+def get_messages(
+    conversation_id: str,
+    after_seq: Optional[int] = Query(None, description="Only messages with a higher sequence number"),
+    language: Optional[str] = Query(None, description="Listener language: translations into it instead of the doctor/patient pair"),
+    db: Session = Depends(get_db),
+):
+    """Get all messages for a conversation (with translations), or only those after `after_seq`."""
+    conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
+    ensure_hot(db, conv)
 
-    messages = db.query(Message).filter(
-        Message.conversation_id == conversation_id
-    ).order_by(Message.created_at.asc()).all()
+    if language is None:
+        query = select(*MESSAGE_COLUMNS)
+    else:
+        query = select(*_localized_columns(language)).outerjoin(
+            MessageTranslation,
+            and_(MessageTranslation.message_id == Message.id, MessageTranslation.language == language),
+        )
+    query = query.where(Message.conversation_id == conversation_id)
+    if after_seq is not None:
+        query = query.where(Message.seq > after_seq).order_by(Message.seq.asc())
+    else:
+        query = query.order_by(Message.created_at.asc())
 
-    return [MessageResponse.model_validate(msg) for msg in messages]
+    # Column-only select straight to orjson: no ORM objects or per-row Pydantic models
+    return FastJSONResponse(rows_to_dicts(db.connection().execute(query), MESSAGE_FIELDS))
 
 
 @router.post("/", response_model=MessageResponse)
-async def send_message(conversation_id: str, data: MessageCreate, db: Session = Depends(get_db)):
-    """Send a message and get automatic translation."""
-    conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
+async def send_message(
+    conversation_id: str,
+    data: MessageCreate,
+    admission: Admission = Depends(admit_request("rest_message")),
+    db: Session = Depends(get_db),
+):
+    """Send a message and get automatic translation. 503 + Retry-After when the server is overloaded."""
+    conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
     if not conv:
         raise HTTPException(status_code=404, detail="Conversation not found")
+    await ensure_hot_async(db, conv)  # New messages continue the archived sequence
 
     # Determine target language based on role
     if data.role.value == "doctor":
         target_language = conv.patient_language
     else:
         target_language = conv.doctor_language
+    languages = [target_language, *conv.listener_languages]
+    db.commit()  # Don't hold a pooled connection across the provider calls below
+
+    source_language = data.original_language
+    if source_language == "auto":
+        with timed("detection"):
+            source_language = await resolve_source_language(data.original_text, source_language)
+
+    # Translate into every listener language (text only; REST messages are not voiced)
+    translations = await fan_out(data.original_text, source_language, languages, data.role.value, with_tts=False)
+    primary = translations.get(target_language, {"translated_text": data.original_text, "model": None})
 
-    # Translate the message
-    translated_text = None
-    try:
-        translated_text = await translate_message(
-            text=data.original_text,
-            source_language=data.original_language,
+    # Save message to database
+    def save(session: Session) -> Message:
+        message = Message(
+            conversation_id=conversation_id,
+            role=data.role,
+            message_type=data.message_type,
+            original_text=data.original_text,
+            original_language=source_language,
+            translated_text=primary["translated_text"],
             target_language=target_language,
-            role=data.role.value,
+            translation_model=primary["model"],
+            audio_file_path=data.audio_file_path,
+            audio_duration=data.audio_duration,
         )
-    except Exception as e:
-        print(f"Translation failed: {e}")
-        translated_text = f"[Translation unavailable: {str(e)}]"
+        session.add(message)
+        add_translations(session, message, translations)
+        return message
 
-    # Save message to database
-    message = Message(
-        conversation_id=conversation_id,
-        role=data.role,
-        message_type=data.message_type,
-        original_text=data.original_text,
-        original_language=data.original_language,
-        translated_text=translated_text,
-        target_language=target_language,
-        audio_file_path=data.audio_file_path,
-        audio_duration=data.audio_duration,
-    )
-    db.add(message)
-    db.commit()
-    db.refresh(message)
+    with timed("db_commit"):
+        try:
+            message = await db_writer.submit(save)
+        except ConversationDeleted:
+            raise HTTPException(status_code=404, detail="Conversation not found")
 
     return MessageResponse.model_validate(message)
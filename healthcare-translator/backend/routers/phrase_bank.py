@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from typing import List
+from database import get_db
+from models import PhraseBankPhrase, PhraseBankEntry
+from schemas import PhraseBankCreate, PhraseBankPhraseResponse, PhraseBankBuild, JobResponse, SUPPORTED_LANGUAGES
+from services.glossary import normalize_phrase
+from services.phrase_bank import phrase_bank
+from services.jobs import job_queue, job_to_dict
+
+router = APIRouter(prefix="/api/phrase-bank", tags=["phrase-bank"])
+
+
+def _enqueue_build(db: Session, params: dict) -> JobResponse:
+    job, created = job_queue.enqueue(db, "phrase_bank", params=params)
+    return JobResponse(**job_to_dict(job, deduplicated=not created))
+
+
+@router.get("/", response_model=List[PhraseBankPhraseResponse])
+def list_phrases(db: Session = Depends(get_db)):
+    """Bank phrases with how many languages each is translated and voiced in."""
+    translated = dict(db.query(PhraseBankEntry.phrase_id, func.count(PhraseBankEntry.id)).filter(
+        PhraseBankEntry.translated_text.isnot(None)
+    ).group_by(PhraseBankEntry.phrase_id).all())
+    voiced = dict(db.query(PhraseBankEntry.phrase_id, func.count(PhraseBankEntry.id)).filter(
+        PhraseBankEntry.patient_audio_path.isnot(None)
+    ).group_by(PhraseBankEntry.phrase_id).all())
+    phrases = db.query(PhraseBankPhrase).order_by(PhraseBankPhrase.text.asc()).all()
+    return [
+        PhraseBankPhraseResponse.model_validate(p).model_copy(update={
+            "translated": translated.get(p.id, 0), "voiced": voiced.get(p.id, 0),
+        })
+        for p in phrases
+    ]
+
+
+@router.post("/")
+def add_phrases(data: PhraseBankCreate, db: Session = Depends(get_db)):
+    """
+    Add canonical phrases (bulk). Phrases already in the bank (same
+    normalized text, language and speaker) are skipped. Unless build=false,
+    a "phrase_bank" job is queued to translate and voice them.
+    """
+    if data.source_language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(status_code=400, detail=f"Unsupported language: {data.source_language}")
+    added, existing = [], 0
+    seen = set()
+    for text in data.phrases:
+        normalized = normalize_phrase(text)
+        if not normalized:
+            raise HTTPException(status_code=400, detail="Phrases cannot be empty")
+        if normalized in seen or db.query(PhraseBankPhrase.id).filter(
+            PhraseBankPhrase.source_language == data.source_language,
+            PhraseBankPhrase.role == data.role.value,
+            PhraseBankPhrase.normalized == normalized,
+        ).first():
+            existing += 1
+            continue
+        seen.add(normalized)
+        phrase = PhraseBankPhrase(
+            text=text.strip(), normalized=normalized, source_language=data.source_language, role=data.role.value,
+        )
+        db.add(phrase)
+        added.append(phrase)
+    db.commit()
+    phrase_bank.invalidate()
+
+    job = _enqueue_build(db, {}) if data.build and added else None
+    return {"added": len(added), "existing": existing, "job": job}
+
+
+@router.post("/build", response_model=JobResponse)
+def build(data: PhraseBankBuild, db: Session = Depends(get_db)):
+    """Queue a "phrase_bank" job: fill missing translations and audio (or redo all with rebuild=true)."""
+    unsupported = [code for code in data.languages or [] if code not in SUPPORTED_LANGUAGES]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"Unsupported language(s): {', '.join(unsupported)}")
+    params = {}
+    if data.languages:
+        params["languages"] = sorted(set(data.languages))
+    if data.rebuild:
+        params["rebuild"] = True
+    return _enqueue_build(db, params)
+
+
+@router.delete("/{phrase_id}")
+def delete_phrase(phrase_id: str, db: Session = Depends(get_db)):
+    """
+    Remove a phrase from the bank. Its audio stays on disk for messages that
+    already played it; `python reclaim.py --orphans` removes what nothing uses.
+    """
+    phrase = db.query(PhraseBankPhrase).filter(PhraseBankPhrase.id == phrase_id).first()
+    if not phrase:
+        raise HTTPException(status_code=404, detail="Phrase not found")
+    db.query(PhraseBankEntry).filter(PhraseBankEntry.phrase_id == phrase_id).delete()
+    db.delete(phrase)
+    db.commit()
+    phrase_bank.invalidate()
+    return {"message": "Phrase deleted"}
+
+
+@router.get("/stats")
+def phrase_bank_stats():
+    """Coverage per language, hit rate on live messages and the provider calls it saved (this process)."""
+    return phrase_bank.stats(list(SUPPORTED_LANGUAGES))
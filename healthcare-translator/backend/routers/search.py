@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 from database import get_db
 from models import Message, Conversation
-from schemas import SearchResponse, SearchResult
+from schemas import SearchResponse
+from responses import FastJSONResponse
+from services.archive import search_archive
 
 router = APIRouter(prefix="/api/search", tags=["search"])
 
@@ -12,47 +14,62 @@ router = APIRouter(prefix="/api/search", tags=["search"])
 def search_messages(
     q: str = Query(..., min_length=1, description="Search query"),
     conversation_id: str = Query(None, description="Optional: limit search to a specific conversation"),
+    include_archived: bool = Query(False, description="Also search archived conversations (whole words or word prefixes)"),
     db: Session = Depends(get_db),
 ):
     """Search keyword/phrases across all logged conversations."""
-    query = db.query(Message, Conversation).join(
-        Conversation, Message.conversation_id == Conversation.id
-    )
+    query = select(
+        Message.id,
+        Message.conversation_id,
+        Conversation.title,
+        Message.role,
+        Message.original_text,
+        Message.translated_text,
+        Message.created_at,
+    ).join(Conversation, Message.conversation_id == Conversation.id).where(Conversation.deleted_at.is_(None))
 
     if conversation_id:
-        query = query.filter(Message.conversation_id == conversation_id)
+        query = query.where(Message.conversation_id == conversation_id)
 
     # Search in both original and translated text
     search_filter = or_(
         Message.original_text.ilike(f"%{q}%"),
         Message.translated_text.ilike(f"%{q}%"),
     )
-    query = query.filter(search_filter)
-    results = query.order_by(Message.created_at.desc()).limit(50).all()
+    query = query.where(search_filter).order_by(Message.created_at.desc()).limit(50)
+
+    rows = list(db.connection().execute(query))
+    archived_ids = set()
+    if include_archived:
+        # Separate index; results merged newest first with the live ones
+        archived = search_archive(db, q, conversation_id, limit=50)
+        archived_ids = {row[0] for row in archived}
+        rows = sorted(rows + archived, key=lambda row: row[-1], reverse=True)[:50]
 
     search_results = []
-    for msg, conv in results:
+    for message_id, conv_id, title, role, original_text, translated_text, created_at in rows:
         # Create highlighted context snippet
-        match_context = _highlight_match(msg.original_text, q)
-        if not match_context and msg.translated_text:
-            match_context = _highlight_match(msg.translated_text, q)
+        match_context = _highlight_match(original_text, q)
+        if not match_context and translated_text:
+            match_context = _highlight_match(translated_text, q)
 
-        search_results.append(SearchResult(
-            message_id=msg.id,
-            conversation_id=msg.conversation_id,
-            conversation_title=conv.title,
-            role=msg.role,
-            original_text=msg.original_text,
-            translated_text=msg.translated_text,
-            created_at=msg.created_at,
-            match_context=match_context,
-        ))
+        search_results.append({
+            "message_id": message_id,
+            "conversation_id": conv_id,
+            "conversation_title": title,
+            "role": role,
+            "original_text": original_text,
+            "translated_text": translated_text,
+            "created_at": created_at,
+            "match_context": match_context,
+            "archived": message_id in archived_ids,
+        })
 
-    return SearchResponse(
-        query=q,
-        total_results=len(search_results),
-        results=search_results,
-    )
+    return FastJSONResponse({
+        "query": q,
+        "total_results": len(search_results),
+        "results": search_results,
+    })
 
 
 def _highlight_match(text: str, query: str, context_chars: int = 80) -> str:
@@ -1,50 +1,67 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from typing import List
 from database import get_db
-from models import Conversation, Message, ConversationSummary
-from schemas import SummaryResponse
-from services.groq_service import generate_medical_summary
+from models import Conversation, ConversationSummary
+from schemas import SummaryResponse, JobResponse
+from services.summary_service import summarize_conversation
+from services.archive import ensure_hot
+from services.jobs import job_queue, job_to_dict
+from admission import admission_controller
+from responses import FastJSONResponse, rows_to_dicts
 
 router = APIRouter(prefix="/api/conversations/{conversation_id}/summary", tags=["summary"])
 
+SUMMARY_FIELDS = [name for name in SummaryResponse.model_fields if name != "cached"]
+SUMMARY_COLUMNS = [getattr(ConversationSummary, name) for name in SUMMARY_FIELDS]
+
 
 @router.post("/", response_model=SummaryResponse)
 async def create_summary(conversation_id: str, db: Session = Depends(get_db)):
-    """Generate an AI-powered medical summary of the conversation."""
-    conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
-    if not conv:
-        raise HTTPException(status_code=404, detail="Conversation not found")
-
-    messages = db.query(Message).filter(
-        Message.conversation_id == conversation_id
-    ).order_by(Message.created_at.asc()).all()
+    """
+    Generate an AI-powered medical summary of the conversation.
+    An unchanged conversation returns its existing summary (cached=true)
+    without calling the LLM. For long conversations, prefer a "summary" job
+    (POST /api/conversations/{id}/jobs).
 
-    if not messages:
-        raise HTTPException(status_code=400, detail="No messages to summarize")
+    While live translation traffic is queueing, the summary is deferred: a
+    "summary" job is queued instead and returned with 202 (the result is
+    pushed to the room when it finishes).
+    """
+    if admission_controller.under_pressure():
+        if not db.query(Conversation.id).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first():
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        job, created = job_queue.enqueue(db, "summary", conversation_id)
+        body = JobResponse(**job_to_dict(job, deduplicated=not created))
+        return FastJSONResponse(jsonable_encoder(body), status_code=202)
 
-    # Generate summary using Groq
     try:
-        summary_text = await generate_medical_summary(messages)
+        summary, cached = await summarize_conversation(db, conversation_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Summary generation failed: {str(e)}")
 
-    # Save summary
-    summary = ConversationSummary(
-        conversation_id=conversation_id,
-        summary_text=summary_text,
-    )
-    db.add(summary)
-    db.commit()
-    db.refresh(summary)
-
-    return SummaryResponse.model_validate(summary)
+    return SummaryResponse.model_validate(summary).model_copy(update={"cached": cached})
 
 
 @router.get("/", response_model=List[SummaryResponse])
 def get_summaries(conversation_id: str, db: Session = Depends(get_db)):
     """Get all summaries for a conversation."""
-    summaries = db.query(ConversationSummary).filter(
-        ConversationSummary.conversation_id == conversation_id
-    ).order_by(ConversationSummary.created_at.desc()).all()
-    return [SummaryResponse.model_validate(s) for s in summaries]
+    conv = db.get(Conversation, conversation_id)
+    if conv is None or conv.deleted_at is not None:
+        return FastJSONResponse([])
+    ensure_hot(db, conv)
+    rows = db.connection().execute(
+        select(*SUMMARY_COLUMNS)
+        .where(ConversationSummary.conversation_id == conversation_id)
+        .order_by(ConversationSummary.created_at.desc())
+    )
+    summaries = rows_to_dicts(rows, SUMMARY_FIELDS)
+    for summary in summaries:
+        summary["cached"] = False
+    return FastJSONResponse(summaries)
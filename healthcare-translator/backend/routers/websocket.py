@@ -1,15 +1,29 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.orm import Session
 from database import SessionLocal
-from models import Conversation, Message, MessageTypeEnum, RoleEnum
-from services.groq_service import translate_message
-from services.tts_service import text_to_speech
+from models import Conversation, ConversationDeleted, Message, MessageTranslation, MessageTypeEnum, RoleEnum
+from schemas import SUPPORTED_LANGUAGES
+from services.groq_service import resolve_source_language
+from services.fanout import fan_out, add_translations, localize_message
+from services.speculation import DraftSession, PRIORITY_SPECULATIVE
 from ws_manager import manager
+from db_writer import db_writer
+from admission import admission_controller, Overloaded
+from ws_codec import receive_payload
+from services.archive import ensure_hot_async
+from metrics import timed, DEBUG_TIMINGS
+from tracing import tracer
+import os
 import json
+import time
+from typing import Optional
 from datetime import datetime, timezone
 
 router = APIRouter(tags=["websocket"])
 
+# Most messages replayed in one "sync" frame; the rest via GET /messages?after_seq=
+WS_SYNC_LIMIT = int(os.getenv("WS_SYNC_LIMIT", "500"))
+
 
 @router.websocket("/ws/{conversation_id}")
 async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
@@ -25,24 +39,83 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
         "target_language": "hi"
     }
 
+    Multi-party rooms: connect with ?language=<code> to receive every message
+    in that language only (text and TTS). The language joins the room's
+    listener languages, and each message is translated into all of them.
+    Without ?language the socket gets the doctor/patient translation.
+
+    Wire encoding: JSON text frames by default; MessagePack binary frames via
+    subprotocol "meditranslate.msgpack" or ?encoding=msgpack (see ws_codec).
+
     Server broadcasts to room:
     {
         "type": "message",
-        "message": { ...full message object with tts_audio_path... }
+        "message": { ...full message object with seq and tts_audio_path... }
     }
-    """
-    # Get DB session
-    db = SessionLocal()
 
+    Resuming after a reconnect: connect with ?since_seq=<last seen seq> (or
+    ?last_message_id=<id>), or send {"type": "sync", "since_seq": N}. The
+    server replies with everything missed, in order, before live messages:
+    {
+        "type": "sync",
+        "messages": [ ... ],
+        "last_seq": 42,
+        "has_more": false   # true → fetch the rest via GET /messages?after_seq=
+    }
+    A message broadcast while the sync is being sent may arrive in both the
+    sync frame and live; clients should de-duplicate by seq.
+
+    Heartbeat: the server sends {"type": "ping"} every WS_HEARTBEAT_INTERVAL
+    seconds; clients answer {"type": "pong"}. A socket that sends nothing
+    for WS_IDLE_TIMEOUT seconds is closed (4408). A full room or worker
+    refuses new sockets with 1013 (try again later).
+
+    Under overload messages are delivered without TTS audio. When the server
+    sheds a message it is not stored, and the sender gets it back to resend:
+    {"type": "error", "code": "overloaded", "retry_after": 3, "retry": {...}}
+    A message that fails otherwise (e.g. its write) comes back the same way
+    with "code": "failed" and no retry_after; the socket stays open.
+
+    Drafts (optional): while the speaker types, send the input so far, a
+    few hundred ms after they pause, with the fields of a message:
+    {"type": "draft", "role": ..., "content": "text so far", "source_language": ..., "target_language": ...}
+    Nothing is broadcast; it is translated in the background, and the
+    message sent next from this socket reuses those translations if it is
+    the same text. An empty draft (input cleared) drops the speculative work.
+    """
+    drafts = DraftSession()
     try:
-        # Verify conversation exists
-        conv = db.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if not conv:
+        # Short-lived DB sessions (join, then one per message or replay), closed
+        # before anything is sent, so idle or slow sockets never hold a pooled
+        # connection
+        with SessionLocal() as db:
+            # Verify conversation exists
+            conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
+            if conv is not None:
+                await ensure_hot_async(db, conv)
+
+                since_seq = _resolve_since_seq(
+                    db, conversation_id,
+                    websocket.query_params.get("since_seq"),
+                    websocket.query_params.get("last_message_id"),
+                )
+
+                language = websocket.query_params.get("language")
+                if language not in SUPPORTED_LANGUAGES:
+                    language = None
+                elif conv.add_listener_language(language):
+                    db.commit()
+        if conv is None:
             await websocket.close(code=4004, reason="Conversation not found")
             return
 
-        # Connect to room
-        await manager.connect(websocket, conversation_id)
+        # Connect to room, then replay what was missed (joining first means no gap)
+        if not await manager.connect(websocket, conversation_id, language=language):
+            return  # Room or worker at its connection cap
+        if since_seq is not None:
+            with SessionLocal() as db:
+                replay = _load_sync(db, conversation_id, since_seq, language)
+            await manager.send_personal(websocket, replay)
 
         # Notify room about new connection
         room_count = manager.get_room_count(conversation_id)
@@ -54,14 +127,27 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
 
         # Listen for messages
         while True:
-            data = await websocket.receive_json()
+            data = await receive_payload(websocket)
+            manager.touch(websocket)
 
-            msg_type = data.get("type", "text")
-            role_str = data.get("role", "doctor")
-            content = data.get("content", "")
-            source_language = data.get("source_language", "en")
-            target_language = data.get("target_language", "hi")
+            if data.get("type") == "pong":
+                continue  # Heartbeat reply; touch() was all it needed
+            if data.get("type") == "ping":
+                await manager.send_personal(websocket, {"type": "pong"})
+                continue
+
+            if data.get("type") == "sync":
+                with SessionLocal() as db:
+                    since = _resolve_since_seq(db, conversation_id, data.get("since_seq"), data.get("last_message_id"))
+                    replay = _load_sync(db, conversation_id, since or 0, manager.languages.get(websocket))
+                await manager.send_personal(websocket, replay)
+                continue
 
+            if data.get("type") == "draft":
+                _handle_draft(drafts, conversation_id, data)
+                continue
+
+            content = data.get("content", "")
             if not content.strip():
                 await manager.send_personal(websocket, {
                     "type": "error",
@@ -69,65 +155,37 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
                 })
                 continue
 
-            # Translate the message
-            role_enum = RoleEnum.doctor if role_str == "doctor" else RoleEnum.patient
-            translated_text = ""
+            # One trace per message; clients may continue their own via "traceparent".
+            # working(): no frames (pongs) are read until this returns, which can
+            # outlast WS_IDLE_TIMEOUT under load; the reaper must not count it as idle
             try:
-                translated_text = await translate_message(
-                    text=content,
-                    source_language=source_language,
-                    target_language=target_language,
-                    role=role_str,
-                )
-            except Exception as e:
-                translated_text = f"[Translation error: {str(e)}]"
-
-            # Generate TTS for the translated text
-            tts_file = None
-            try:
-                if translated_text and not translated_text.startswith("[Translation"):
-                    listener_role = "patient" if role_str == "doctor" else "doctor"
-                    tts_file = await text_to_speech(
-                        text=translated_text,
-                        language=target_language,
-                        role=listener_role,
-                    )
+                with manager.working(websocket):
+                    async with admission_controller.admit(conversation_id, "ws_message") as admission:
+                        with tracer.start_span(
+                            "ws.message",
+                            traceparent=data.get("traceparent"),
+                            **{"ws.conversation_id": conversation_id, "ws.role": data.get("role", "doctor")},
+                        ), SessionLocal() as db:
+                            await _handle_message(db, conversation_id, data, with_tts=not admission.degraded, drafts=drafts)
+            except Overloaded as e:
+                await manager.send_personal(websocket, {
+                    "type": "error",
+                    "code": "overloaded",
+                    "error": str(e),
+                    "retry_after": e.retry_after,
+                    "retry": data,
+                })
+            except WebSocketDisconnect:
+                raise
             except Exception as e:
-                print(f"TTS generation failed (non-critical): {e}")
-
-            # Save to database
-            message = Message(
-                conversation_id=conversation_id,
-                role=role_enum,
-                message_type=MessageTypeEnum.text,
-                original_text=content,
-                original_language=source_language,
-                translated_text=translated_text,
-                target_language=target_language,
-                tts_audio_path=tts_file,
-            )
-            db.add(message)
-            db.commit()
-            db.refresh(message)
-
-            # Broadcast translated message + TTS audio to all in room
-            await manager.broadcast_to_room(conversation_id, {
-                "type": "message",
-                "message": {
-                    "id": message.id,
-                    "conversation_id": message.conversation_id,
-                    "role": message.role.value,
-                    "message_type": message.message_type.value,
-                    "original_text": message.original_text,
-                    "original_language": message.original_language,
-                    "translated_text": message.translated_text,
-                    "target_language": message.target_language,
-                    "audio_file_path": message.audio_file_path,
-                    "audio_duration": message.audio_duration,
-                    "tts_audio_path": message.tts_audio_path,
-                    "created_at": message.created_at.isoformat(),
-                }
-            })
+                # Not stored (e.g. the write failed): tell the sender and keep reading
+                print(f"[WS] Message failed: {e}")
+                await manager.send_personal(websocket, {
+                    "type": "error",
+                    "code": "failed",
+                    "error": "Message could not be delivered",
+                    "retry": data,
+                })
 
     except WebSocketDisconnect:
         manager.disconnect(websocket, conversation_id)
@@ -141,4 +199,157 @@ async def websocket_endpoint(websocket: WebSocket, conversation_id: str):
         print(f"[WS] Error: {e}")
         manager.disconnect(websocket, conversation_id)
     finally:
-        db.close()
+        drafts.reset()
+
+
+def _handle_draft(drafts: DraftSession, conversation_id: str, data: dict):
+    """Start speculating on a draft; detection and the room lookup run in the background."""
+    if not data.get("content", "").strip() or admission_controller.under_pressure():
+        drafts.reset()  # Input cleared, or no spare capacity for work that may be thrown away
+        return
+    drafts.prepare(_speculate(drafts, conversation_id, data))
+
+
+async def _speculate(drafts: DraftSession, conversation_id: str, data: dict):
+    """Speculatively translate a draft into the room's listener languages."""
+    content = data.get("content", "")
+    source_language = data.get("source_language", "en")
+    if source_language == "auto":
+        source_language = await resolve_source_language(content, source_language, priority=PRIORITY_SPECULATIVE)
+    with SessionLocal() as db:
+        conv = db.get(Conversation, conversation_id)
+        if conv is None or conv.deleted_at is not None:
+            return
+        languages = [data.get("target_language", "hi"), *conv.listener_languages, *manager.room_languages(conversation_id)]
+    drafts.update(content, source_language, data.get("role", "doctor"), languages)
+
+
+async def _handle_message(
+    db: Session, conversation_id: str, data: dict, with_tts: bool = True, drafts: Optional[DraftSession] = None,
+):
+    """Translate, voice, persist and broadcast one incoming chat message."""
+    role_str = data.get("role", "doctor")
+    content = data.get("content", "")
+    source_language = data.get("source_language", "en")
+    target_language = data.get("target_language", "hi")
+
+    started = time.perf_counter()
+    timings = {}
+
+    if source_language == "auto":
+        with timed("detection", timings):
+            source_language = await resolve_source_language(content, source_language)
+
+    # Translate into every listener language (room config + connected sockets), voicing each
+    role_enum = RoleEnum.doctor if role_str == "doctor" else RoleEnum.patient
+    conv = db.get(Conversation, conversation_id, populate_existing=True)  # Languages may have been added by other sockets
+    if conv is None or conv.deleted_at is not None:
+        return  # Deleted while this message was queued; the room is being closed
+    languages = [target_language, *conv.listener_languages, *manager.room_languages(conversation_id)]
+    db.commit()  # Don't hold a pooled connection across the provider calls below
+    speculation = drafts.claim(content, source_language, role_str, languages) if drafts is not None else None
+    translations = await fan_out(
+        content, source_language, languages, role_str, with_tts=with_tts, timings=timings, speculation=speculation,
+    )
+    primary = translations.get(target_language, {"translated_text": content, "model": None, "tts_audio_path": None})
+
+    # Save to database (group-committed with writes from other rooms)
+    def save(session: Session) -> Message:
+        message = Message(
+            conversation_id=conversation_id,
+            role=role_enum,
+            message_type=MessageTypeEnum.text,
+            original_text=content,
+            original_language=source_language,
+            translated_text=primary["translated_text"],
+            target_language=target_language,
+            translation_model=primary["model"],
+            tts_audio_path=primary["tts_audio_path"],
+        )
+        session.add(message)
+        add_translations(session, message, translations)
+        return message
+
+    with timed("db_commit", timings):
+        try:
+            message = await db_writer.submit(save)
+        except ConversationDeleted:
+            return  # Deleted while this message was being translated; the room is being closed
+
+    # Broadcast: each socket gets its own language's text + TTS audio
+    message_dict = _message_dict(message)
+    payload = {
+        "type": "message",
+        "message": message_dict,
+        "trace_id": tracer.current_trace_id(),
+    }
+    if DEBUG_TIMINGS:
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        payload["timings"] = timings
+    await manager.broadcast_to_room(
+        conversation_id, payload,
+        localize=lambda language: {
+            **payload, "message": localize_message(message_dict, language, translations.get(language)),
+        },
+    )
+
+
+def _message_dict(message: Message) -> dict:
+    return {
+        "id": message.id,
+        "conversation_id": message.conversation_id,
+        "seq": message.seq,
+        "role": message.role.value,
+        "message_type": message.message_type.value,
+        "original_text": message.original_text,
+        "original_language": message.original_language,
+        "translated_text": message.translated_text,
+        "target_language": message.target_language,
+        "translation_model": message.translation_model,
+        "audio_file_path": message.audio_file_path,
+        "audio_duration": message.audio_duration,
+        "tts_audio_path": message.tts_audio_path,
+        "created_at": message.created_at,  # Encoded by ws_codec (ISO string / msgpack timestamp)
+    }
+
+
+def _resolve_since_seq(db: Session, conversation_id: str, since_seq, last_message_id) -> Optional[int]:
+    """Sequence number the client has seen up to, from either form of resume token."""
+    if since_seq is not None and str(since_seq).strip() != "":
+        try:
+            return max(0, int(since_seq))
+        except (TypeError, ValueError):
+            return 0
+    if last_message_id:
+        seq = db.query(Message.seq).filter(
+            Message.conversation_id == conversation_id, Message.id == last_message_id
+        ).scalar()
+        return seq or 0  # Unknown id → replay from the start
+    return None
+
+
+def _load_sync(db: Session, conversation_id: str, since_seq: int, language: Optional[str]) -> dict:
+    """The "sync" frame: every message after `since_seq` (single indexed range query), in `language` if set."""
+    with timed("sync"):
+        missed = db.query(Message).filter(
+            Message.conversation_id == conversation_id, Message.seq > since_seq
+        ).order_by(Message.seq.asc()).limit(WS_SYNC_LIMIT + 1).all()
+    has_more = len(missed) > WS_SYNC_LIMIT
+    missed = missed[:WS_SYNC_LIMIT]
+    messages = [_message_dict(m) for m in missed]
+    if language is not None and missed:
+        rows = db.query(MessageTranslation).filter(
+            MessageTranslation.message_id.in_([m.id for m in missed]),
+            MessageTranslation.language == language,
+        ).all()
+        found = {
+            t.message_id: {"translated_text": t.translated_text, "model": t.translation_model, "tts_audio_path": t.tts_audio_path}
+            for t in rows
+        }
+        messages = [localize_message(m, language, found.get(m["id"])) for m in messages]
+    return {
+        "type": "sync",
+        "messages": messages,
+        "last_seq": missed[-1].seq if missed else since_seq,
+        "has_more": has_more,
+    }
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Any, Dict
 from datetime import datetime
 from enum import Enum
 
@@ -20,6 +20,7 @@ class ConversationCreate(BaseModel):
     title: Optional[str] = "New Conversation"
     doctor_language: str = "en"
     patient_language: str = "hi"
+    extra_languages: List[str] = []  # Further listener languages (relatives, interpreters)
 
 
 class ConversationResponse(BaseModel):
@@ -27,9 +28,11 @@ class ConversationResponse(BaseModel):
     title: str
     doctor_language: str
     patient_language: str
+    extra_languages: List[str] = []
     created_at: datetime
     updated_at: datetime
     message_count: Optional[int] = 0
+    archived_at: Optional[datetime] = None  # In cold storage; restored when opened
 
     class Config:
         from_attributes = True
@@ -48,12 +51,14 @@ class MessageCreate(BaseModel):
 class MessageResponse(BaseModel):
     id: str
     conversation_id: str
+    seq: Optional[int] = None  # Per-conversation sequence number
     role: RoleEnum
     message_type: MessageTypeEnum
     original_text: str
     original_language: str
     translated_text: Optional[str] = None
     target_language: Optional[str] = None
+    translation_model: Optional[str] = None  # Model that produced translated_text
     audio_file_path: Optional[str] = None
     audio_duration: Optional[str] = None
     tts_audio_path: Optional[str] = None  # TTS audio of translated text
@@ -99,12 +104,39 @@ class SummaryResponse(BaseModel):
     id: str
     conversation_id: str
     summary_text: str
+    content_fingerprint: Optional[str] = None
+    first_message_id: Optional[str] = None
+    last_message_id: Optional[str] = None
+    message_count: Optional[int] = None
     created_at: datetime
+    cached: bool = False  # True when an existing summary of identical content was returned
 
     class Config:
         from_attributes = True
 
 
+# --- Job Schemas ---
+class JobCreate(BaseModel):
+    kind: str  # "summary" | "bulk_translate" | "re_tts" | "export"
+    params: Dict[str, Any] = {}
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    conversation_id: Optional[str] = None
+    status: str  # "pending" | "running" | "succeeded" | "failed"
+    progress: int
+    params: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    deduplicated: bool = False  # True when an identical pending/running job was returned
+
+
 # --- Search Schemas ---
 class SearchResult(BaseModel):
     message_id: str
@@ -115,6 +147,7 @@ class SearchResult(BaseModel):
     translated_text: Optional[str]
     created_at: datetime
     match_context: str  # Highlighted snippet
+    archived: bool = False  # Found in the archive index
 
     class Config:
         from_attributes = True
@@ -126,6 +159,51 @@ class SearchResponse(BaseModel):
     results: List[SearchResult]
 
 
+# --- Glossary Schemas ---
+class GlossaryTermCreate(BaseModel):
+    source_language: str
+    target_language: str
+    source_term: str
+    target_term: str
+
+
+class GlossaryTermResponse(BaseModel):
+    id: str
+    source_language: str
+    target_language: str
+    source_term: str
+    target_term: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PhraseBankCreate(BaseModel):
+    phrases: List[str]
+    source_language: str = "en"
+    role: RoleEnum = RoleEnum.doctor
+    build: bool = True  # Queue a phrase_bank job to translate and voice the new phrases
+
+
+class PhraseBankPhraseResponse(BaseModel):
+    id: str
+    text: str
+    source_language: str
+    role: str
+    created_at: datetime
+    translated: int = 0  # Languages with a translation
+    voiced: int = 0  # Languages with audio
+
+    class Config:
+        from_attributes = True
+
+
+class PhraseBankBuild(BaseModel):
+    languages: Optional[List[str]] = None  # Default: every supported language
+    rebuild: bool = False  # Redo existing translations and audio too
+
+
 # --- Supported Languages ---
 SUPPORTED_LANGUAGES = {
     "en": "English",
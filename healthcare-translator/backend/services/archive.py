@@ -0,0 +1,372 @@
+"""
+Cold storage for finished conversations.
+
+Conversations idle for ARCHIVE_AFTER_DAYS are compacted into one compressed
+blob each (conversation_archives): every message, listener translation and
+summary row, audio file references included. The rows then leave the hot
+tables, so the message queries, indexes and the SQLite page cache only
+cover live conversations. The conversation row itself stays (listing shows
+it with archived_at set).
+
+Opening an archived conversation (messages, a new message, a WebSocket
+join, a job) restores its rows with their original ids and sequence
+numbers first: ensure_hot(), or ensure_hot_async() from async code. Search over archived conversations goes
+through a separate token index (archive_search_terms) and only decompresses
+the conversations that contain every query word.
+
+Audio files stay where they are on disk; the archive keeps their paths.
+"""
+import os
+import re
+import zlib
+import json
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import DateTime, delete, func, select, update
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import (
+    Conversation, Message, MessageTranslation, ConversationSummary,
+    ConversationArchive, ArchiveSearchTerm,
+)
+from metrics import registry
+from ws_manager import manager
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+# Archive conversations with no message for this many days (0 disables the sweeper)
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_SWEEP_INTERVAL = float(os.getenv("ARCHIVE_SWEEP_INTERVAL", "3600"))  # Seconds
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "50"))  # Conversations per sweep
+ARCHIVE_COMPRESSION_LEVEL = int(os.getenv("ARCHIVE_COMPRESSION_LEVEL", "6"))
+
+PAYLOAD_VERSION = 1
+CODEC = "zlib+json"
+MAX_TERM_LENGTH = 64
+
+ARCHIVE_OPS = registry.counter(
+    "archive_total",
+    "Conversation archive operations (archived, restored, skipped).",
+    ["op"],
+)
+ARCHIVE_BYTES = registry.counter(
+    "archive_bytes_total",
+    "Payload bytes of archived conversations, before and after compression.",
+    ["stage"],
+)
+
+_WORD_RE = re.compile(r"\w+")
+# Scripts written without spaces: every character is indexed as its own term
+_UNSPACED_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯฀-๿]")
+
+# Serializes restores of the same conversation within the process (striped by id)
+_RESTORE_LOCKS = [threading.Lock() for _ in range(32)]
+
+# Tables in the payload: key → (table, filter on the conversation id)
+_ARCHIVED_TABLES = {
+    "messages": (Message.__table__, lambda cid: Message.conversation_id == cid),
+    "translations": (
+        MessageTranslation.__table__,
+        lambda cid: MessageTranslation.message_id.in_(select(Message.id).where(Message.conversation_id == cid)),
+    ),
+    "summaries": (ConversationSummary.__table__, lambda cid: ConversationSummary.conversation_id == cid),
+}
+
+
+def search_terms(text: str) -> set:
+    """Index terms of `text`: lowercased words, plus single characters of unspaced scripts."""
+    terms = set()
+    for word in _WORD_RE.findall((text or "").lower()):
+        terms.add(word[:MAX_TERM_LENGTH])
+        terms.update(_UNSPACED_RE.findall(word))
+    return terms
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+
+def encode_payload(payload: dict) -> Tuple[bytes, int]:
+    """(compressed blob, uncompressed size)."""
+    if orjson is not None:
+        raw = orjson.dumps(payload)
+    else:
+        raw = json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, ARCHIVE_COMPRESSION_LEVEL), len(raw)
+
+
+def decode_payload(archive: ConversationArchive) -> dict:
+    if archive.codec != CODEC:
+        raise ValueError(f"Unknown archive codec: {archive.codec}")
+    raw = zlib.decompress(archive.payload)
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def _dump_rows(db: Session, table, where) -> List[dict]:
+    # Both encoders write datetimes as ISO strings and (str) enums as their values
+    return [dict(row._mapping) for row in db.execute(select(table).where(where))]
+
+
+def _load_rows(table, rows: List[dict]) -> List[dict]:
+    """Payload rows back into insertable values (ISO strings → datetimes)."""
+    dates = [c.name for c in table.columns if isinstance(c.type, DateTime)]
+    for row in rows:
+        for name in dates:
+            if row.get(name):
+                row[name] = datetime.fromisoformat(row[name])
+    return rows
+
+
+def archive_conversation(db: Session, conversation_id: str) -> Optional[ConversationArchive]:
+    """
+    Move a conversation's rows into cold storage, in one transaction.
+    Returns None if there is nothing to archive (unknown, already archived,
+    or a message arrived while archiving).
+    """
+    conv = db.get(Conversation, conversation_id)
+    if conv is None or conv.archived_at is not None or conv.deleted_at is not None:
+        return None
+
+    payload = {"version": PAYLOAD_VERSION}
+    for key, (table, where) in _ARCHIVED_TABLES.items():
+        payload[key] = _dump_rows(db, table, where(conversation_id))
+    messages = payload["messages"]
+    payload["audio"] = sorted({
+        path
+        for row in messages + payload["translations"]
+        for path in (row.get("audio_file_path"), row.get("tts_audio_path"))
+        if path
+    })
+    blob, raw_bytes = encode_payload(payload)
+
+    terms = set()
+    for row in messages:
+        terms |= search_terms(row["original_text"]) | search_terms(row["translated_text"])
+    for row in payload["translations"]:
+        terms |= search_terms(row["translated_text"])
+
+    now = datetime.now(timezone.utc)
+    archive = ConversationArchive(
+        conversation_id=conversation_id,
+        codec=CODEC,
+        payload=blob,
+        message_count=len(messages),
+        raw_bytes=raw_bytes,
+        last_message_at=max((m["created_at"] for m in messages), default=None),
+        archived_at=now,
+    )
+    db.add(archive)
+    db.add_all(ArchiveSearchTerm(term=term, conversation_id=conversation_id) for term in terms)
+
+    # Delete exactly the rows that were copied (translations first: they reference messages)
+    message_ids = [m["id"] for m in messages]
+    db.execute(delete(MessageTranslation.__table__).where(
+        MessageTranslation.id.in_([t["id"] for t in payload["translations"]])
+    ))
+    db.execute(delete(Message.__table__).where(Message.id.in_(message_ids)))
+    db.execute(delete(ConversationSummary.__table__).where(
+        ConversationSummary.id.in_([s["id"] for s in payload["summaries"]])
+    ))
+    # A message saved meanwhile would be orphaned: leave the conversation hot
+    if db.query(Message.id).filter(Message.conversation_id == conversation_id).first() is not None:
+        db.rollback()
+        ARCHIVE_OPS.inc(op="skipped")
+        return None
+    conv.archived_at = now
+    db.commit()
+
+    ARCHIVE_OPS.inc(op="archived")
+    ARCHIVE_BYTES.inc(raw_bytes, stage="raw")
+    ARCHIVE_BYTES.inc(len(blob), stage="compressed")
+    return archive
+
+
+def restore_conversation(db: Session, conversation_id: str) -> bool:
+    """Move an archived conversation back into the hot tables; False if it was not archived."""
+    archive = db.get(ConversationArchive, conversation_id)
+    if archive is None:
+        db.execute(update(Conversation).where(Conversation.id == conversation_id).values(archived_at=None))
+        db.commit()
+        return False
+    payload = decode_payload(archive)
+
+    # Claim the archive: a concurrent restore (another worker) deletes 0 rows and backs off
+    claimed = db.execute(
+        delete(ConversationArchive.__table__).where(ConversationArchive.conversation_id == conversation_id)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        return False
+    db.execute(delete(ArchiveSearchTerm.__table__).where(ArchiveSearchTerm.conversation_id == conversation_id))
+    for key, (table, _) in _ARCHIVED_TABLES.items():
+        if payload[key]:
+            db.execute(table.insert(), _load_rows(table, payload[key]))
+    db.execute(update(Conversation).where(Conversation.id == conversation_id).values(archived_at=None))
+    db.commit()
+    ARCHIVE_OPS.inc(op="restored")
+    return True
+
+
+def ensure_hot(db: Session, conv: Conversation) -> bool:
+    """
+    Restore `conv` if it is archived, before its messages are read or
+    written. Cheap no-op for live conversations. True if it restored.
+    """
+    if conv.archived_at is None:
+        return False
+    with _RESTORE_LOCKS[hash(conv.id) % len(_RESTORE_LOCKS)]:
+        db.refresh(conv)  # Another request may have restored it while we waited
+        if conv.archived_at is None:
+            return False
+        restored = restore_conversation(db, conv.id)
+        db.refresh(conv)
+        if restored:
+            print(f"[ARCHIVE] Restored conversation {conv.id}")
+        return restored
+
+
+
+async def ensure_hot_async(db: Session, conv: Conversation) -> bool:
+    """ensure_hot() for async code: the restore (and its lock wait) runs in a worker thread."""
+    if conv.archived_at is None:
+        return False
+    return await asyncio.to_thread(ensure_hot, db, conv)
+
+def search_archive(db: Session, q: str, conversation_id: Optional[str] = None, limit: int = 50) -> List[tuple]:
+    """
+    Archived messages matching `q` (case-insensitive substring, like the live
+    search), newest first, as (message_id, conversation_id, title, role,
+    original_text, translated_text, created_at).
+
+    The term index narrows the candidates to conversations containing every
+    query word as a word prefix; only those are decompressed, newest first,
+    until older ones can no longer make the top `limit`. A query that starts
+    mid-word ("ever" for "fever") does not find archived messages.
+    """
+    terms = search_terms(q)
+    if not terms:
+        return []
+    candidates = None
+    for term in terms:
+        query = select(ArchiveSearchTerm.conversation_id).where(
+            ArchiveSearchTerm.term >= term, ArchiveSearchTerm.term < term + "\U0010ffff",
+        )
+        if conversation_id:
+            query = query.where(ArchiveSearchTerm.conversation_id == conversation_id)
+        found = set(db.execute(query.distinct()).scalars())
+        candidates = found if candidates is None else candidates & found
+        if not candidates:
+            return []
+
+    needle = q.lower()
+    results = []
+    newest_first = db.execute(
+        select(ConversationArchive.conversation_id, ConversationArchive.last_message_at, Conversation.title)
+        .join(Conversation, Conversation.id == ConversationArchive.conversation_id)
+        .where(ConversationArchive.conversation_id.in_(candidates), Conversation.deleted_at.is_(None))
+        .order_by(ConversationArchive.last_message_at.desc())
+    ).all()
+    for archived_id, last_message_at, title in newest_first:
+        if len(results) >= limit and last_message_at is not None and last_message_at < results[-1][-1]:
+            break  # Everything from here on is older than the current top `limit`
+        archive = db.get(ConversationArchive, archived_id)
+        for m in decode_payload(archive)["messages"]:
+            if needle in m["original_text"].lower() or needle in (m["translated_text"] or "").lower():
+                results.append((
+                    m["id"], archived_id, title, m["role"],
+                    m["original_text"], m["translated_text"], datetime.fromisoformat(m["created_at"]),
+                ))
+        db.expunge(archive)  # Don't keep decoded blobs in the session
+        results.sort(key=lambda r: r[-1], reverse=True)
+        del results[limit:]
+    return results
+
+
+def delete_archive(db: Session, conversation_id: str):
+    """Drop the archive and its index rows (caller commits)."""
+    db.execute(delete(ArchiveSearchTerm.__table__).where(ArchiveSearchTerm.conversation_id == conversation_id))
+    db.execute(delete(ConversationArchive.__table__).where(ConversationArchive.conversation_id == conversation_id))
+
+
+class Archiver:
+    """Periodically archives conversations idle for `after_days` (skipping rooms with open sockets)."""
+
+    def __init__(
+        self,
+        after_days: float = ARCHIVE_AFTER_DAYS,
+        interval: float = ARCHIVE_SWEEP_INTERVAL,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+    ):
+        self.after_days = after_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def candidates(self, db: Session, now: Optional[datetime] = None) -> List[str]:
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=self.after_days)
+        last_message = (
+            select(Message.conversation_id, func.max(Message.created_at).label("last_at"))
+            .group_by(Message.conversation_id)
+            .subquery()
+        )
+        ids = db.execute(
+            select(Conversation.id)
+            .outerjoin(last_message, last_message.c.conversation_id == Conversation.id)
+            .where(
+                Conversation.archived_at.is_(None),
+                Conversation.deleted_at.is_(None),
+                func.coalesce(last_message.c.last_at, Conversation.created_at) < cutoff,
+            )
+            .order_by(Conversation.updated_at.asc())
+            .limit(self.batch_size + len(manager.active_connections))
+        ).scalars().all()
+        return [cid for cid in ids if not manager.get_room_count(cid)][:self.batch_size]
+
+    def sweep(self) -> int:
+        """Archive one batch of idle conversations; returns how many were archived."""
+        archived = 0
+        with SessionLocal() as db:
+            for conversation_id in self.candidates(db):
+                try:
+                    if archive_conversation(db, conversation_id) is not None:
+                        archived += 1
+                except Exception as e:
+                    db.rollback()
+                    print(f"[ARCHIVE] Failed to archive {conversation_id}: {e}")
+        if archived:
+            print(f"[ARCHIVE] Archived {archived} idle conversation(s)")
+        return archived
+
+    def start(self):
+        if self.after_days > 0 and self.interval > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                # Full batches mean more are waiting: keep going without sleeping
+                while await asyncio.to_thread(self.sweep) >= self.batch_size:
+                    pass
+            except Exception as e:
+                print(f"[ARCHIVE] Sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# Singleton started by the app lifespan
+archiver = Archiver()
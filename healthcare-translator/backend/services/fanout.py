@@ -0,0 +1,142 @@
+import os
+import asyncio
+from typing import Dict, Iterable, Optional
+from sqlalchemy.orm import Session
+from models import Message, MessageTranslation
+from services.groq_service import translate_with_model, translation_cache, PRIORITY_LIVE
+from services.tts_service import text_to_speech, MESSAGE_AUDIO_PREFIX
+from services.phrase_bank import phrase_bank
+from services.speculation import Speculation
+from metrics import timed
+from tracing import tracer
+
+# Translation + TTS calls in flight per message (the Groq quota is enforced separately)
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "4"))
+
+# language → {"translated_text": ..., "model": ..., "tts_audio_path": ...}
+Translations = Dict[str, Dict[str, Optional[str]]]
+
+
+def is_failed(translated_text: Optional[str]) -> bool:
+    return not translated_text or translated_text.startswith("[Translation")
+
+
+async def fan_out(
+    text: str,
+    source_language: str,
+    languages: Iterable[str],
+    role: str,
+    priority: int = PRIORITY_LIVE,
+    with_tts: bool = True,
+    timings: Optional[dict] = None,
+    speculation: Optional[Speculation] = None,
+) -> Translations:
+    """
+    Translate `text` into every distinct listener language except the source,
+    concurrently but at most FANOUT_CONCURRENCY provider calls at a time.
+    A phrase-bank phrase is answered from the bank (text and audio) for the
+    languages it covers. The other targets are looked up in the translation
+    cache in one pass; only misses reach the model. Languages a `speculation`
+    (the last draft, translated while the speaker typed, when it is exactly
+    this text) covers reuse its translations instead. Each translation is voiced as soon as it is ready when
+    `with_tts`. A failed language gets a "[Translation error: ...]" text and
+    no audio; the others are unaffected.
+    """
+    targets = [code for code in dict.fromkeys(languages) if code and code != source_language]
+    results: Translations = phrase_bank.serve(text, source_language, role, targets, with_tts)
+    banked = len(results)
+    results.update(
+        (language, {"translated_text": translated, "model": model, "tts_audio_path": None})
+        for language, (translated, model) in translation_cache.get_many(
+            text, source_language,
+            [code for code in targets if code not in results and not (speculation and speculation.covers(code))], role,
+        ).items()
+    )
+    gate = asyncio.Semaphore(FANOUT_CONCURRENCY)
+    listener_role = "patient" if role == "doctor" else "doctor"
+
+    async def render(language: str):
+        entry = results.get(language)
+        if entry is None:
+            async with gate:
+                try:
+                    with timed("translation", timings):
+                        if speculation is not None and speculation.covers(language):
+                            translated, model = await speculation.translate(language, priority)
+                        else:
+                            translated, model = await translate_with_model(
+                                text=text,
+                                source_language=source_language,
+                                target_language=language,
+                                role=role,
+                                priority=priority,
+                                lookup_cache=False,
+                            )
+                except Exception as e:
+                    translated, model = f"[Translation error: {str(e)}]", None
+            entry = results[language] = {"translated_text": translated, "model": model, "tts_audio_path": None}
+        if not with_tts or entry["tts_audio_path"] or is_failed(entry["translated_text"]):
+            return
+        async with gate:
+            try:
+                with timed("tts", timings):
+                    entry["tts_audio_path"] = await text_to_speech(
+                        text=entry["translated_text"],
+                        language=language,
+                        role=listener_role,
+                        prefix=MESSAGE_AUDIO_PREFIX,
+                    )
+            except Exception as e:
+                print(f"TTS generation failed for '{language}' (non-critical): {e}")
+
+    with tracer.start_span(
+        "translation.fan_out",
+        **{
+            "fanout.languages": len(targets), "fanout.banked": banked,
+            "fanout.cached": len(results) - banked, "fanout.tts": with_tts,
+            "fanout.speculated": speculation is not None,
+        },
+    ):
+        try:
+            await asyncio.gather(*(render(language) for language in targets))
+        finally:
+            if speculation is not None:
+                speculation.settle()
+    return results
+
+
+def add_translations(db: Session, message: Message, translations: Translations):
+    """Stage one MessageTranslation row per language (committed with the message)."""
+    for language, entry in translations.items():
+        db.add(MessageTranslation(
+            message=message,
+            language=language,
+            translated_text=entry["translated_text"],
+            translation_model=entry["model"],
+            tts_audio_path=entry["tts_audio_path"],
+        ))
+
+
+def localize_message(message: dict, language: Optional[str], translation: Optional[dict]) -> dict:
+    """
+    A message dict as one listener should see it: translated_text,
+    target_language, translation_model and tts_audio_path in their language. Listeners without
+    a language (two-party clients) get the message unchanged; listeners who
+    speak the original language get no translation.
+    """
+    if language is None:
+        return message
+    if language == message["original_language"]:
+        return {
+            **message, "translated_text": None, "target_language": language,
+            "translation_model": None, "tts_audio_path": None,
+        }
+    if translation is None:
+        return message  # Not fanned out to this language (listener joined mid-message)
+    return {
+        **message,
+        "translated_text": translation["translated_text"],
+        "target_language": language,
+        "translation_model": translation["model"],
+        "tts_audio_path": translation["tts_audio_path"],
+    }
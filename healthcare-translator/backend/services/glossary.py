@@ -0,0 +1,233 @@
+import re
+import asyncio
+import threading
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# ============================================================
+# MEDICAL GLOSSARY (term locking + phrase pre-translation)
+# ============================================================
+# Terms live in the `glossary_terms` table, one row per (source, target,
+# term), the source term stored normalized (normalize_phrase), so
+# "Paracetamol" and "paracetamol" are one term. Each language pair is
+# compiled on first use into an Aho-Corasick automaton and cached until the
+# pair's terms change.
+
+PLACEHOLDER = "⟦T{}⟧"
+_PLACEHOLDER_RE = re.compile(r"⟦T(\d+)⟧")
+
+# Dosages and units are locked verbatim so the model can never alter a number
+_DOSAGE_RE = re.compile(
+    r"\b\d+(?:[.,]\d+)?\s?(?:mg|mcg|µg|g|kg|ml|mL|l|L|IU|iu|units?|mmHg|mmol/L|mg/dL|%)(?![\w])"
+)
+
+# Trailing punctuation ignored when checking for a whole-phrase hit
+_PHRASE_STRIP = " \t\n.!?¿¡,;:।؟。！？"
+
+
+def normalize_phrase(text: str) -> str:
+    return " ".join(text.strip(_PHRASE_STRIP).lower().split())
+
+
+class AhoCorasick:
+    """Multi-pattern matcher over lowercased text (leftmost-longest, whole words)."""
+
+    def __init__(self, patterns: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]  # pattern lengths ending at each state
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(len(pattern))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int]]:
+        """All (start, end) matches in `text` that sit on word boundaries."""
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length in self._out[state]:
+                start, end = i - length + 1, i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    matches.append((start, end))
+        return matches
+
+    def find(self, text: str) -> List[Tuple[int, int]]:
+        """Non-overlapping matches, preferring the leftmost, then the longest."""
+        chosen = []
+        last_end = 0
+        for start, end in sorted(self.find_all(text), key=lambda m: (m[0], -(m[1] - m[0]))):
+            if start >= last_end:
+                chosen.append((start, end))
+                last_end = end
+        return chosen
+
+
+class PreparedText(NamedTuple):
+    text: str  # source text with locked spans replaced by placeholders
+    locked: Dict[str, str]  # placeholder → text to restore in the translation
+    translation: Optional[str]  # set when the whole message is a glossary phrase
+
+    def restore(self, translated: str) -> Optional[str]:
+        """Put locked terms back. Returns None if the model dropped a placeholder."""
+        if any(ph not in translated for ph in self.locked):
+            return None
+        return _PLACEHOLDER_RE.sub(lambda m: self.locked.get(m.group(0), m.group(0)), translated)
+
+
+class CompiledGlossary:
+    def __init__(self, terms: Dict[str, str]):
+        # normalized source phrase → target translation
+        self.terms = {normalize_phrase(src): tgt for src, tgt in terms.items() if normalize_phrase(src)}
+        self.matcher = AhoCorasick(list(self.terms))
+
+    def prepare(self, text: str) -> PreparedText:
+        phrase = normalize_phrase(text)
+        if phrase in self.terms:
+            return PreparedText(text, {}, self.terms[phrase])
+
+        lowered = text.lower()
+        spans = []
+        if len(lowered) == len(text):  # lower() can change length for a few exotic chars
+            spans = [(s, e, self.terms[lowered[s:e]]) for s, e in self.matcher.find(lowered)]
+        taken = [(s, e) for s, e, _ in spans]
+        for m in _DOSAGE_RE.finditer(text):
+            if not any(s < m.end() and m.start() < e for s, e in taken):
+                spans.append((m.start(), m.end(), m.group(0)))
+        spans.sort()
+        return _lock(text, spans)
+
+
+def _lock(text: str, spans: List[Tuple[int, int, str]]) -> PreparedText:
+    out = []
+    locked = {}
+    pos = 0
+    for i, (start, end, replacement) in enumerate(spans, 1):
+        ph = PLACEHOLDER.format(i)
+        out.append(text[pos:start])
+        out.append(ph)
+        locked[ph] = replacement
+        pos = end
+    out.append(text[pos:])
+    return PreparedText("".join(out), locked, None)
+
+
+class GlossaryStore:
+    """Per-language-pair compiled glossaries, loaded lazily from the DB."""
+
+    def __init__(self, session_factory=None):
+        self._session_factory = session_factory
+        self._compiled: Dict[Tuple[str, str], CompiledGlossary] = {}
+        self._lock = threading.Lock()
+        # Bumped whenever terms change; caches of glossary-aware output key on it
+        self.generation = 0
+        self.phrase_hits = 0
+        self.locked_calls = 0
+        self.misses = 0
+
+    def _load_terms(self, source_language: str, target_language: str) -> Dict[str, str]:
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        from models import GlossaryTerm
+
+        db = self._session_factory()
+        try:
+            # Oldest first: of case variants stored before terms were normalized, the newest wins
+            rows = db.query(GlossaryTerm.source_term, GlossaryTerm.target_term).filter(
+                GlossaryTerm.source_language == source_language,
+                GlossaryTerm.target_language == target_language,
+            ).order_by(GlossaryTerm.created_at.asc()).all()
+            return {src: tgt for src, tgt in rows}
+        finally:
+            db.close()
+
+    def get(self, source_language: str, target_language: str) -> CompiledGlossary:
+        key = (source_language, target_language)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(key)
+                if compiled is None:
+                    try:
+                        terms = self._load_terms(source_language, target_language)
+                    except Exception as e:
+                        # Never let the glossary break translation; retry the load next time
+                        print(f"[Glossary] Could not load terms for {key}: {e}")
+                        return CompiledGlossary({})
+                    compiled = CompiledGlossary(terms)
+                    self._compiled[key] = compiled
+        return compiled
+
+    async def load(self, source_language: str, target_language: str) -> CompiledGlossary:
+        """get() for async callers: a pair's first load queries the DB off the event loop."""
+        compiled = self._compiled.get((source_language, target_language))
+        if compiled is not None:
+            return compiled
+        return await asyncio.to_thread(self.get, source_language, target_language)
+
+    def set_terms(self, source_language: str, target_language: str, terms: Dict[str, str]):
+        """Install terms directly (benchmarks / tests) without touching the DB."""
+        self._compiled[(source_language, target_language)] = CompiledGlossary(terms)
+        self.generation += 1
+
+    def invalidate(self, source_language: Optional[str] = None, target_language: Optional[str] = None):
+        """Drop compiled glossaries so the next request recompiles from the DB."""
+        with self._lock:
+            if source_language is None:
+                self._compiled.clear()
+            else:
+                self._compiled.pop((source_language, target_language), None)
+            self.generation += 1
+
+    def prepare(
+        self, text: str, source_language: str, target_language: str, glossary: Optional[CompiledGlossary] = None,
+    ) -> PreparedText:
+        """Lock terms in `text` (or answer it outright); pass `glossary` from load() to skip the lookup."""
+        prepared = (glossary or self.get(source_language, target_language)).prepare(text)
+        if prepared.translation is not None:
+            self.phrase_hits += 1
+        elif prepared.locked:
+            self.locked_calls += 1
+        else:
+            self.misses += 1
+        return prepared
+
+    def stats(self) -> dict:
+        return {
+            "pairs_loaded": len(self._compiled),
+            "phrase_hits": self.phrase_hits,
+            "locked_calls": self.locked_calls,
+            "misses": self.misses,
+        }
+
+
+# Singleton store shared by the translation service and the glossary router
+glossary_store = GlossaryStore()
@@ -1,115 +1,758 @@
 import os
+import re
+import sys
 import json
-from groq import Groq
-from typing import Optional
+import time
+import heapq
+import random
+import asyncio
+import itertools
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
 from schemas import SUPPORTED_LANGUAGES
-from dotenv import load_dotenv
-
-load_dotenv()
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+from services.language_id import identify_language
+from services.glossary import glossary_store
+from services.prompts import TRANSLATION_PROMPT_VERSION, MAX_MAX_TOKENS, get_translation_prompt, estimate_max_tokens
+from metrics import FALLBACKS, TRANSLATION_CACHE, TRANSLATION_ROUTE_LATENCY
+from tracing import tracer
+
+# Created on first use (get_client): importing the Groq SDK and building its
+# HTTP client costs ~100 ms, which a cold start should not pay up front.
+# Tests and benchmarks may assign a stand-in here before the first call.
+client = None
+
+
+def get_client():
+    global client
+    if client is None:
+        from groq import AsyncGroq
+        # Retries are handled by the call scheduler below, not by the SDK
+        client = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"), max_retries=0)
+    return client
 
 # --- Model Configuration ---
 TRANSLATION_MODEL = "llama-3.3-70b-versatile"
 SUMMARY_MODEL = "llama-3.3-70b-versatile"
 WHISPER_MODEL = "whisper-large-v3"
+# Small model for short, non-clinical utterances (see ROUTING POLICY below)
+FAST_TRANSLATION_MODEL = os.getenv("FAST_TRANSLATION_MODEL", "llama-3.1-8b-instant")
+TRANSLATION_ROUTING = os.getenv("TRANSLATION_ROUTING", "true").lower() == "true"
+# JSON list of route rules, or a path to a JSON file with one; empty = DEFAULT_ROUTING_POLICY
+TRANSLATION_ROUTING_POLICY = os.getenv("TRANSLATION_ROUTING_POLICY", "")
+
+# --- Quota / Resilience Configuration ---
+GROQ_CHAT_RPM = float(os.getenv("GROQ_CHAT_RPM", "30"))
+GROQ_WHISPER_RPM = float(os.getenv("GROQ_WHISPER_RPM", "20"))
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+GROQ_HEDGE_AFTER = float(os.getenv("GROQ_HEDGE_AFTER", "0"))  # seconds, 0 = hedging off
+
+# Finished translations kept in memory (LRU); 0 disables the cache
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "2048"))
+
+# Local language ID answers on its own above this confidence; below it we ask the LLM
+LANGUAGE_ID_THRESHOLD = float(os.getenv("LANGUAGE_ID_THRESHOLD", "0.8"))
+
+# --- Priority classes (lower = served first) ---
+PRIORITY_LIVE = 0  # WebSocket / interactive translation
+PRIORITY_SUMMARY = 1
+PRIORITY_BULK = 2
+
+
+# ============================================================
+# 0. CALL SCHEDULER (rate limits, retries, hedging)
+# ============================================================
+class TokenBucket:
+    """Request-rate token bucket. A 429 can pause it until Retry-After expires."""
+
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, rate_per_minute / 6.0)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self._refill()
+        pause = max(0.0, self._paused_until - self._clock())
+        if self._tokens >= 1:
+            return pause
+        return max(pause, (1 - self._tokens) / self.rate)
+
+    def consume(self):
+        self._refill()
+        self._tokens -= 1
+
+    def try_consume(self) -> bool:
+        if self.delay() > 0:
+            return False
+        self.consume()
+        return True
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Parse the Retry-After header (seconds) from a Groq API error, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _is_quota_error(error: Exception) -> bool:
+    """Rate limited (429): more calls, on any model, only add to the overload."""
+    groq = sys.modules.get("groq")
+    if groq is not None and isinstance(error, groq.RateLimitError):
+        return True
+    return getattr(error, "status_code", None) == 429
+
+
+def _is_retryable(error: Exception) -> bool:
+    groq = sys.modules.get("groq")  # Not imported yet means it cannot be a Groq error
+    if groq is not None and isinstance(error, (groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+class CallScheduler:
+    """
+    Shared gate for provider calls:
+    - token bucket matching the Groq quota, granted in priority order
+    - exponential backoff with full jitter, honoring Retry-After
+    - optional hedging: if a call is slower than `hedge_after`, a duplicate
+      is fired and whichever finishes first wins
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: Optional[float] = None,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 20.0,
+        hedge_after: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bucket = TokenBucket(rate_per_minute, burst, clock=clock)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = None
+        self._loop = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def _acquire(self, priority: int):
+        """Wait for a token; higher-priority waiters are always served first."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Conditions are bound to the loop they were first used on
+            self._cond = asyncio.Condition()
+            self._loop = loop
+            self._waiters = []
+        cond = self._cond
+
+        entry = (priority, next(self._seq))
+        async with cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    if self._waiters[0] == entry:
+                        wait = self.bucket.delay()
+                        if wait <= 0:
+                            self.bucket.consume()
+                            heapq.heappop(self._waiters)
+                            cond.notify_all()
+                            return
+                        try:
+                            await asyncio.wait_for(cond.wait(), timeout=wait)
+                        except asyncio.TimeoutError:
+                            pass
+                    else:
+                        await cond.wait()
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                    cond.notify_all()
+                raise
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            # Everyone sharing the quota should back off, not just this caller
+            self.bucket.pause(retry_after)
+            delay = max(delay, retry_after)
+        return delay
+
+    async def _hedged(self, call: Callable[[], Awaitable]):
+        first = asyncio.ensure_future(call())
+        pending = {first}
+        error = None
+        # Everything, the first wait included, is inside the try: a caller
+        # cancelled at any point must not leave a call running on the quota
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            if done or not self.bucket.try_consume():
+                # Fast enough, or no spare quota to spend on a duplicate
+                return await first
+
+            FALLBACKS.inc(kind="llm_hedge")
+            pending.add(asyncio.ensure_future(call()))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def run(self, call: Callable[[], Awaitable], priority: int = PRIORITY_LIVE, hedge: bool = False):
+        """
+        Run `call` (a zero-arg coroutine factory) under the quota, retrying
+        transient failures. Non-retryable errors are raised immediately.
+        """
+        attempt = 0
+        while True:
+            await self._acquire(priority)
+            try:
+                if hedge and self.hedge_after > 0:
+                    return await self._hedged(call)
+                return await call()
+            except Exception as e:
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                print(f"[Groq] Transient error ({e.__class__.__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+                FALLBACKS.inc(kind="llm_retry")
+                attempt += 1
+                await asyncio.sleep(delay)
+
+
+class UsageTracker:
+    """
+    Token usage and latency per (kind, source, target), from the `usage`
+    block of each completion. Also feeds observed output/input ratios back
+    into the max_tokens estimate.
+    """
+
+    def __init__(self, ratio_alpha: float = 0.2):
+        self.ratio_alpha = ratio_alpha
+        self._entries = {}
+        self._ratios = {}
+
+    def record(self, kind: str, source_language: str, target_language: str, response, latency: float, input_chars: int = 0):
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+
+        key = (kind, source_language, target_language)
+        entry = self._entries.setdefault(key, {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "latency_total": 0.0, "queue_time_total": 0.0,
+        })
+        entry["calls"] += 1
+        entry["prompt_tokens"] += prompt_tokens
+        entry["completion_tokens"] += completion_tokens
+        entry["latency_total"] += latency
+        entry["queue_time_total"] += getattr(usage, "queue_time", 0) or 0
+
+        if kind == "translation" and input_chars and completion_tokens:
+            pair = (source_language, target_language)
+            ratio = completion_tokens / input_chars
+            previous = self._ratios.get(pair)
+            self._ratios[pair] = ratio if previous is None else previous + self.ratio_alpha * (ratio - previous)
+
+    def observed_ratio(self, source_language: str, target_language: str) -> float:
+        return self._ratios.get((source_language, target_language), 0.0)
+
+    def snapshot(self) -> list:
+        return [
+            {
+                "kind": kind,
+                "source_language": src,
+                "target_language": tgt,
+                "calls": e["calls"],
+                "prompt_tokens": e["prompt_tokens"],
+                "completion_tokens": e["completion_tokens"],
+                "avg_latency": e["latency_total"] / e["calls"],
+                "avg_queue_time": e["queue_time_total"] / e["calls"],
+            }
+            for (kind, src, tgt), e in sorted(self._entries.items())
+        ]
+
+
+usage_tracker = UsageTracker()
+
+
+class TranslationCache:
+    """
+    LRU of finished translations keyed by (prompt version, glossary
+    generation, source, target, role, text). Fan-out looks up every target
+    language of a message in one pass and only calls the model for misses.
+    Entries are (translated text, model that produced it).
+    """
+
+    def __init__(self, max_entries: int = TRANSLATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[str, Optional[str]]]" = OrderedDict()
+
+    def _key(self, text: str, source_language: str, target_language: str, role: str) -> tuple:
+        return (TRANSLATION_PROMPT_VERSION, glossary_store.generation, source_language, target_language, role, text)
+
+    def get(self, text: str, source_language: str, target_language: str, role: str) -> Optional[Tuple[str, Optional[str]]]:
+        key = self._key(text, source_language, target_language, role)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        TRANSLATION_CACHE.inc(result="hit" if entry is not None else "miss")
+        return entry
+
+    def get_many(
+        self, text: str, source_language: str, target_languages: Iterable[str], role: str,
+    ) -> Dict[str, Tuple[str, Optional[str]]]:
+        """Cached (translation, model) of `text` for each target language (misses are left out)."""
+        found = {}
+        for target_language in target_languages:
+            entry = self.get(text, source_language, target_language, role)
+            if entry is not None:
+                found[target_language] = entry
+        return found
+
+    def clear(self):
+        self._entries.clear()
+
+    def put(self, text: str, source_language: str, target_language: str, role: str, translated: str, model: Optional[str] = None):
+        if self.max_entries <= 0:
+            return
+        key = self._key(text, source_language, target_language, role)
+        self._entries[key] = (translated, model)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+translation_cache = TranslationCache()
+
+# Chat completions and Whisper have separate Groq quotas
+chat_scheduler = CallScheduler(GROQ_CHAT_RPM, max_retries=GROQ_MAX_RETRIES, hedge_after=GROQ_HEDGE_AFTER)
+whisper_scheduler = CallScheduler(GROQ_WHISPER_RPM, max_retries=GROQ_MAX_RETRIES)
+
+
+def _annotate_usage(span, response):
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        span.set_attribute("llm.prompt_tokens", getattr(usage, "prompt_tokens", None))
+        span.set_attribute("llm.completion_tokens", getattr(usage, "completion_tokens", None))
+        span.set_attribute("llm.queue_time", getattr(usage, "queue_time", None))
 
 
 # ============================================================
 # 1. TRANSLATION SERVICE
 # ============================================================
+
+# --- Model routing ---
+# Clinical vocabulary that makes an utterance "dense": English stems and
+# medical suffixes. Glossary terms and dosages (locked by the glossary)
+# count too and cover the other languages. Overlaps are counted twice,
+# which only errs towards the large model.
+_CLINICAL_TERMS_RE = re.compile(
+    r"\b(?:\w+(?:itis|ectomy|otomy|ostomy|emia|aemia|osis|pathy|plasty|scopy|algia)"
+    r"|dos(?:e|es|age|ing)|mg|mcg|ml|tablets?|capsules?|inject\w*|infusion|prescri\w+|diagnos\w+"
+    r"|allerg\w+|antibiotic\w*|insulin|chemo\w*|an(?:a)?esthe\w+|biopsy|malignan\w+|tumou?rs?"
+    r"|contraindicat\w+|hypertension|diabet\w+|cardiac|arrhythmia|embolism|stroke|seizures?"
+    r"|sepsis|fractures?|intravenous|mri|ecg|ekg|x-rays?|ultrasound|pregnan\w+|h(?:a)?emoglobin"
+    r"|cholesterol|thyroid|renal|hepatic|dialysis|surg\w+|overdose|side effects?)\b",
+    re.IGNORECASE,
+)
+# Chinese/Japanese are written without spaces: about two characters per word
+_UNSPACED_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff]")
+
+# Languages Llama 3.1 8B is officially tuned for
+FAST_MODEL_LANGUAGES = ["en", "es", "fr", "de", "pt", "hi"]
+
+# First matching rule wins; a limit left out does not constrain. The last
+# rule should match everything. Routes name the rule in stats and metrics.
+DEFAULT_ROUTING_POLICY = [
+    # "Yes", "Thank you", "Good morning" in any language pair
+    {"route": "fast-short", "model": FAST_TRANSLATION_MODEL, "max_words": 3, "max_medical_terms": 0},
+    # Short plain sentences between well-supported languages
+    {"route": "fast", "model": FAST_TRANSLATION_MODEL, "max_words": 20, "max_medical_terms": 0,
+     "languages": FAST_MODEL_LANGUAGES},
+    # Everything clinical, long or in a lower-resource language
+    {"route": "large", "model": TRANSLATION_MODEL},
+]
+
+
+class RouteFeatures(NamedTuple):
+    words: int
+    medical_terms: int
+    medical_density: float  # medical terms per word
+
+
+class RouteRule(NamedTuple):
+    route: str
+    model: str
+    max_words: Optional[int] = None
+    max_medical_terms: Optional[int] = None
+    max_medical_density: Optional[float] = None
+    languages: Optional[frozenset] = None  # Source and target must both be in it
+
+    def matches(self, features: RouteFeatures, source_language: str, target_language: str) -> bool:
+        if self.max_words is not None and features.words > self.max_words:
+            return False
+        if self.max_medical_terms is not None and features.medical_terms > self.max_medical_terms:
+            return False
+        if self.max_medical_density is not None and features.medical_density > self.max_medical_density:
+            return False
+        if self.languages is not None and not {source_language, target_language} <= self.languages:
+            return False
+        return True
+
+
+class RoutingDecision(NamedTuple):
+    route: str
+    model: str
+    features: RouteFeatures
+
+
+def parse_routing_policy(rules: List[dict]) -> List[RouteRule]:
+    """Validate a policy table (list of dicts as in DEFAULT_ROUTING_POLICY)."""
+    if not rules:
+        raise ValueError("Routing policy needs at least one rule")
+    parsed = []
+    for rule in rules:
+        unknown = set(rule) - set(RouteRule._fields)
+        if unknown or "route" not in rule or "model" not in rule:
+            raise ValueError(f"Invalid routing rule {rule!r}: needs route and model, unknown keys {sorted(unknown)}")
+        languages = rule.get("languages")
+        parsed.append(RouteRule(**{**rule, "languages": frozenset(languages) if languages is not None else None}))
+    return parsed
+
+
+def load_routing_policy(value: str = TRANSLATION_ROUTING_POLICY) -> List[RouteRule]:
+    """The policy from TRANSLATION_ROUTING_POLICY (inline JSON or a file path), else the default."""
+    if not value.strip():
+        return parse_routing_policy(DEFAULT_ROUTING_POLICY)
+    if value.lstrip().startswith("["):
+        return parse_routing_policy(json.loads(value))
+    with open(value, encoding="utf-8") as f:
+        return parse_routing_policy(json.load(f))
+
+
+routing_policy = load_routing_policy()
+
+
+def route_features(text: str, locked_terms: int = 0) -> RouteFeatures:
+    words = max(1, len(text.split()) + len(_UNSPACED_RE.findall(text)) // 2)
+    medical_terms = locked_terms + len(_CLINICAL_TERMS_RE.findall(text))
+    return RouteFeatures(words, medical_terms, medical_terms / words)
+
+
+def route_translation(
+    text: str,
+    source_language: str,
+    target_language: str,
+    locked_terms: int = 0,
+    policy: Optional[List[RouteRule]] = None,
+) -> RoutingDecision:
+    """Pick the model for one translation. `locked_terms`: glossary terms/dosages found in `text`."""
+    features = route_features(text, locked_terms)
+    if not TRANSLATION_ROUTING and policy is None:
+        return RoutingDecision("large", TRANSLATION_MODEL, features)
+    for rule in policy or routing_policy:
+        if rule.matches(features, source_language, target_language):
+            return RoutingDecision(rule.route, rule.model, features)
+    return RoutingDecision("large", TRANSLATION_MODEL, features)
+
+
+class RouteStats:
+    """Calls, fallbacks and recent latency percentiles per (route, model)."""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._entries = {}
+
+    def record(self, route: str, model: str, latency: float, fallback: bool = False):
+        TRANSLATION_ROUTE_LATENCY.observe(latency, route=route, model=model)
+        entry = self._entries.setdefault((route, model), {
+            "calls": 0, "fallbacks": 0, "latency_total": 0.0, "recent": deque(maxlen=self.window),
+        })
+        entry["calls"] += 1
+        entry["fallbacks"] += int(fallback)
+        entry["latency_total"] += latency
+        entry["recent"].append(latency)
+
+    def snapshot(self) -> list:
+        routes = []
+        for (route, model), e in sorted(self._entries.items()):
+            recent = sorted(e["recent"])
+            routes.append({
+                "route": route,
+                "model": model,
+                "calls": e["calls"],
+                "fallbacks": e["fallbacks"],
+                "avg_latency": e["latency_total"] / e["calls"],
+                "p50_latency": recent[len(recent) // 2],
+                "p95_latency": recent[min(len(recent) - 1, int(len(recent) * 0.95))],
+            })
+        return routes
+
+
+route_stats = RouteStats()
+
+
 async def translate_message(
     text: str,
     source_language: str,
     target_language: str,
-    role: str = "doctor"
+    role: str = "doctor",
+    priority: int = PRIORITY_LIVE,
+    lookup_cache: bool = True,
 ) -> str:
     """
     Translate a message between doctor and patient with medical context awareness.
+    Pass lookup_cache=False when the caller already checked translation_cache.
+    """
+    translated, _ = await translate_with_model(text, source_language, target_language, role, priority, lookup_cache)
+    return translated
+
+
+async def translate_with_model(
+    text: str,
+    source_language: str,
+    target_language: str,
+    role: str = "doctor",
+    priority: int = PRIORITY_LIVE,
+    lookup_cache: bool = True,
+) -> Tuple[str, Optional[str]]:
+    """
+    translate_message, also returning the model that produced the text
+    ("glossary" for phrase-bank hits, None when nothing was translated).
     """
     if source_language == target_language:
-        return text
+        return text, None
+
+    with tracer.start_span(
+        "translate_message",
+        **{"translation.source": source_language, "translation.target": target_language, "translation.role": role},
+    ) as span:
+        cached = translation_cache.get(text, source_language, target_language, role) if lookup_cache else None
+        span.set_attribute("translation.cached", cached is not None)
+        if cached is not None:
+            return cached
+        translated, model = await _translate(text, source_language, target_language, role, priority, span)
+        translation_cache.put(text, source_language, target_language, role, translated, model)
+        return translated, model
+
+
+async def _translate(
+    text: str, source_language: str, target_language: str, role: str, priority: int, span,
+) -> Tuple[str, str]:
+    # Glossary: whole-phrase hits need no LLM call; known terms/dosages are locked
+    glossary = await glossary_store.load(source_language, target_language)
+    prepared = glossary_store.prepare(text, source_language, target_language, glossary)
+    span.set_attribute("glossary.phrase_hit", prepared.translation is not None)
+    span.set_attribute("glossary.locked_terms", len(prepared.locked))
+    if prepared.translation is not None:
+        return prepared.translation, "glossary"
+
+    decision = route_translation(text, source_language, target_language, locked_terms=len(prepared.locked))
+    span.set_attribute("translation.route", decision.route)
+    span.set_attribute("translation.model", decision.model)
+    span.set_attribute("translation.medical_terms", decision.features.medical_terms)
+
+    try:
+        start = time.perf_counter()
+        try:
+            translated = await _translate_prepared(prepared, text, source_language, target_language, role, priority, decision.model)
+        except Exception as e:
+            if decision.model == TRANSLATION_MODEL or _is_quota_error(e):
+                raise  # A 429 (retries already spent) would only double the load on the large model
+            # The small model failed (or is unavailable) — the large one still answers
+            print(f"Route '{decision.route}' failed on {decision.model}, retrying on {TRANSLATION_MODEL}: {e}")
+            FALLBACKS.inc(kind="route_fallback")
+            translated = await _translate_prepared(prepared, text, source_language, target_language, role, priority, TRANSLATION_MODEL)
+            route_stats.record(decision.route, TRANSLATION_MODEL, time.perf_counter() - start, fallback=True)
+            return translated, TRANSLATION_MODEL
+        route_stats.record(decision.route, decision.model, time.perf_counter() - start)
+        return translated, decision.model
 
-    source_name = SUPPORTED_LANGUAGES.get(source_language, source_language)
-    target_name = SUPPORTED_LANGUAGES.get(target_language, target_language)
+    except Exception as e:
+        print(f"Translation error: {e}")
+        raise Exception(f"Translation failed: {str(e)}")
 
-    # Role-aware system prompt for medical accuracy
-    system_prompt = f"""You are a professional medical interpreter specializing in doctor-patient communication.
 
-CRITICAL RULES:
-1. Translate the following message from {source_name} to {target_name}.
-2. Preserve ALL medical terminology accurately. Use proper medical terms in the target language.
-3. If the speaker is a PATIENT: use simple, clear language that a layperson would understand.
-4. If the speaker is a DOCTOR: maintain professional medical terminology.
-5. Preserve the emotional tone and urgency of the original message.
-6. NEVER add, remove, or modify any medical information.
-7. If a medical term has no direct translation, keep it in the original language and add a brief explanation in parentheses.
-8. Return ONLY the translated text. No explanations, no notes, no prefixes.
+async def _translate_prepared(
+    prepared, text: str, source_language: str, target_language: str, role: str, priority: int, model: str,
+) -> str:
+    if prepared.locked:
+        locked_prompt = get_translation_prompt(source_language, target_language, role, locked=True)
+        translated = prepared.restore(
+            await _complete_translation(locked_prompt, prepared.text, source_language, target_language, priority, model)
+        )
+        if translated is not None:
+            return translated
+        # The model dropped a locked token — translate the raw text instead
+        FALLBACKS.inc(kind="glossary_unlock")
+    system_prompt = get_translation_prompt(source_language, target_language, role)
+    return await _complete_translation(system_prompt, text, source_language, target_language, priority, model)
 
-Speaker role: {role.upper()}"""
 
-    try:
-        response = client.chat.completions.create(
-            model=TRANSLATION_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text}
-            ],
-            temperature=0.2,  # Low temp for accuracy
-            max_tokens=2048,
+async def _complete_translation(
+    system_prompt: str,
+    text: str,
+    source_language: str,
+    target_language: str,
+    priority: int,
+    model: str = TRANSLATION_MODEL,
+) -> str:
+    max_tokens = estimate_max_tokens(
+        text, source_language, target_language,
+        observed_ratio=usage_tracker.observed_ratio(source_language, target_language),
+    )
+
+    async def _call(budget: int):
+        start = time.perf_counter()
+        with tracer.start_span("groq.chat.completions", **{"llm.model": model, "llm.max_tokens": budget}) as span:
+            response = await chat_scheduler.run(
+                lambda: get_client().chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": text}
+                    ],
+                    temperature=0.2,  # Low temp for accuracy
+                    max_tokens=budget,
+                ),
+                priority=priority,
+                hedge=priority == PRIORITY_LIVE,
+            )
+            _annotate_usage(span, response)
+        usage_tracker.record(
+            "translation", source_language, target_language, response,
+            time.perf_counter() - start, input_chars=len(text),
         )
-        translated = response.choices[0].message.content.strip()
+        return response
 
-        # Clean up any unwanted prefixes the model might add
-        unwanted_prefixes = ["Translation:", "Translated:", "Here's the translation:", "Here is the translation:"]
-        for prefix in unwanted_prefixes:
-            if translated.lower().startswith(prefix.lower()):
-                translated = translated[len(prefix):].strip()
+    response = await _call(max_tokens)
+    if response.choices[0].finish_reason == "length" and max_tokens < MAX_MAX_TOKENS:
+        # Budget estimate was too tight — never return a truncated translation
+        FALLBACKS.inc(kind="max_tokens_retry")
+        response = await _call(MAX_MAX_TOKENS)
+    translated = response.choices[0].message.content.strip()
 
-        return translated
+    # Clean up any unwanted prefixes the model might add
+    unwanted_prefixes = ["Translation:", "Translated:", "Here's the translation:", "Here is the translation:"]
+    for prefix in unwanted_prefixes:
+        if translated.lower().startswith(prefix.lower()):
+            translated = translated[len(prefix):].strip()
 
-    except Exception as e:
-        print(f"Translation error: {e}")
-        raise Exception(f"Translation failed: {str(e)}")
+    return translated
 
 
 # ============================================================
 # 2. LANGUAGE DETECTION SERVICE
 # ============================================================
-async def detect_language(text: str) -> str:
+async def detect_language(text: str, priority: int = PRIORITY_LIVE) -> str:
     """
     Auto-detect the language of the input text.
     Returns language code (e.g., 'en', 'hi', 'es').
+
+    Uses the local identifier first and only escalates to the LLM when it
+    is unsure; if the LLM is unavailable, the local best guess is returned.
     """
+    with tracer.start_span("detect_language") as span:
+        guess = identify_language(text)
+        span.set_attribute("language_id.local", guess.language)
+        span.set_attribute("language_id.confidence", round(guess.confidence, 3))
+        if guess.confidence >= LANGUAGE_ID_THRESHOLD:
+            return guess.language
+
+        FALLBACKS.inc(kind="language_id_llm")
+        detected = await detect_language_llm(text, priority=priority)
+        return detected or guess.language
+
+
+_LANGUAGE_NAME_TO_CODE = {name.lower(): code for code, name in SUPPORTED_LANGUAGES.items()}
+
+
+async def resolve_source_language(text: str, source_language: Optional[str], priority: int = PRIORITY_LIVE) -> str:
+    """
+    Turn a client/Whisper language value into a supported code.
+    Accepts codes as-is, maps Whisper language names ('hindi' → 'hi'),
+    and runs detection for 'auto' or anything unrecognized.
+    """
+    if source_language in SUPPORTED_LANGUAGES:
+        return source_language
+    code = _LANGUAGE_NAME_TO_CODE.get((source_language or "").lower())
+    if code:
+        return code
+    return await detect_language(text, priority=priority)
+
+
+async def detect_language_llm(text: str, priority: int = PRIORITY_LIVE) -> Optional[str]:
+    """LLM language detection. Returns None if the model fails or answers with an unknown code."""
     try:
-        response = client.chat.completions.create(
-            model=TRANSLATION_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": """Detect the language of the given text. 
+        start = time.perf_counter()
+        with tracer.start_span("groq.chat.completions", **{"llm.model": TRANSLATION_MODEL, "llm.kind": "detection"}) as span:
+            response = await chat_scheduler.run(
+                lambda: get_client().chat.completions.create(
+                    model=TRANSLATION_MODEL,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": """Detect the language of the given text. 
 Return ONLY the ISO 639-1 two-letter language code (e.g., 'en', 'hi', 'es', 'fr', 'de', 'zh', 'ar', 'ja', 'ko', 'bn', 'ta', 'te', 'ur').
 Return ONLY the code, nothing else."""
-                },
-                {"role": "user", "content": text}
-            ],
-            temperature=0,
-            max_tokens=10,
-        )
+                        },
+                        {"role": "user", "content": text}
+                    ],
+                    temperature=0,
+                    max_tokens=10,
+                ),
+                priority=priority,
+            )
+            _annotate_usage(span, response)
+        usage_tracker.record("detection", "auto", "-", response, time.perf_counter() - start)
         detected = response.choices[0].message.content.strip().lower()
         # Validate it's a known language code
         if detected in SUPPORTED_LANGUAGES:
             return detected
-        return "en"  # Default fallback
+        return None
     except Exception as e:
         print(f"Language detection error: {e}")
-        return "en"
+        return None
 
 
 # ============================================================
 # 3. MEDICAL SUMMARY SERVICE
 # ============================================================
-async def generate_medical_summary(messages: list) -> str:
+async def generate_medical_summary(messages: list, priority: int = PRIORITY_SUMMARY) -> str:
     """
     Generate a structured medical summary from conversation messages.
     Extracts: symptoms, diagnoses, medications, follow-up actions.
@@ -149,15 +792,22 @@ RULES:
 - Keep the summary concise but comprehensive."""
 
     try:
-        response = client.chat.completions.create(
-            model=SUMMARY_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Please summarize this doctor-patient conversation:\n\n{conversation_text}"}
-            ],
-            temperature=0.3,
-            max_tokens=2048,
-        )
+        start = time.perf_counter()
+        with tracer.start_span("groq.chat.completions", **{"llm.model": SUMMARY_MODEL, "llm.kind": "summary"}) as span:
+            response = await chat_scheduler.run(
+                lambda: get_client().chat.completions.create(
+                    model=SUMMARY_MODEL,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": f"Please summarize this doctor-patient conversation:\n\n{conversation_text}"}
+                    ],
+                    temperature=0.3,
+                    max_tokens=2048,
+                ),
+                priority=priority,
+            )
+            _annotate_usage(span, response)
+        usage_tracker.record("summary", "-", "-", response, time.perf_counter() - start)
         return response.choices[0].message.content.strip()
 
     except Exception as e:
@@ -168,12 +818,13 @@ RULES:
 # ============================================================
 # 4. AUDIO TRANSCRIPTION SERVICE (Whisper)
 # ============================================================
-async def transcribe_audio(file_path: str, language: Optional[str] = None) -> dict:
+async def transcribe_audio(file_path: str, language: Optional[str] = None, priority: int = PRIORITY_LIVE) -> dict:
     """
     Transcribe audio using Groq's Whisper large-v3.
     Returns transcribed text and detected language.
     """
-    try:
+    async def _transcribe():
+        # Re-open per attempt so retries upload the whole file again
         with open(file_path, "rb") as audio_file:
             params = {
                 "model": WHISPER_MODEL,
@@ -183,7 +834,11 @@ async def transcribe_audio(file_path: str, language: Optional[str] = None) -> di
             if language:
                 params["language"] = language
 
-            transcription = client.audio.transcriptions.create(**params)
+            return await get_client().audio.transcriptions.create(**params)
+
+    try:
+        with tracer.start_span("groq.audio.transcriptions", **{"llm.model": WHISPER_MODEL, "audio.language_hint": language}):
+            transcription = await whisper_scheduler.run(_transcribe, priority=priority)
 
         return {
             "text": transcription.text,
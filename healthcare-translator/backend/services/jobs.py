@@ -0,0 +1,461 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Conversation, Job, JobStatusEnum, Message, MessageTranslation
+from schemas import SUPPORTED_LANGUAGES
+from services.groq_service import translate_with_model, PRIORITY_SUMMARY, PRIORITY_BULK
+from services.summary_service import summarize_conversation
+from services.archive import ensure_hot_async
+from services.tts_service import text_to_speech, AUDIO_DIR as TTS_AUDIO_DIR, MESSAGE_AUDIO_PREFIX
+from services.phrase_bank import build_phrase_bank, AUDIO_PREFIX as PHRASE_BANK_AUDIO_PREFIX
+from ws_manager import manager
+from admission import admission_controller
+from metrics import registry, JOB_DURATION
+from tracing import tracer
+
+# Background jobs: a DB-backed queue (survives restarts) drained by an
+# in-process pool of asyncio workers. Each job kind has its own concurrency
+# limit, and enqueueing a job identical to one that is still pending or
+# running returns the existing job instead of a duplicate.
+#
+# Assumes a single API process owns the queue: on startup, jobs left
+# "running" by a previous process are put back to "pending".
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2.0"))  # seconds; enqueue also wakes workers
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+JOB_PROGRESS_INTERVAL = 0.5  # seconds between progress writes/events
+
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "exports")
+
+ACTIVE_STATUSES = (JobStatusEnum.pending, JobStatusEnum.running)
+
+
+def job_to_dict(job: Job, deduplicated: bool = False) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "conversation_id": job.conversation_id,
+        "status": job.status.value,
+        "progress": job.progress,
+        "params": json.loads(job.params or "{}"),
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "deduplicated": deduplicated,
+    }
+
+
+def _event(job: Job) -> dict:
+    """WebSocket payload for job progress/completion."""
+    data = job_to_dict(job)
+    for key in ("created_at", "started_at", "finished_at"):
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    return {"type": "job", "job": data}
+
+
+def _dedup_key(kind: str, conversation_id: Optional[str], params: dict) -> str:
+    raw = json.dumps([kind, conversation_id, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class JobContext:
+    """What a job handler gets: the job, its own DB session and a progress reporter."""
+
+    def __init__(self, queue: "JobQueue", db: Session, job: Job):
+        self.queue = queue
+        self.db = db
+        self.job = job
+        self.params: dict = json.loads(job.params or "{}")
+        self._last_progress = 0.0
+
+    @property
+    def conversation_id(self) -> Optional[str]:
+        return self.job.conversation_id
+
+    async def progress(self, done: int, total: int):
+        """Record progress (throttled) and push it to the conversation room."""
+        now = time.monotonic()
+        if done < total and now - self._last_progress < JOB_PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        self.job.progress = int(100 * done / total) if total else 100
+        self.db.commit()
+        await self.queue.publish(self.job)
+
+
+Handler = Callable[[JobContext], Awaitable[dict]]
+
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.handlers: Dict[str, Handler] = {}
+        self.limits: Dict[str, int] = {}
+        self._running: Dict[str, int] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._enqueue_lock = threading.Lock()  # Sync endpoints enqueue from the threadpool
+
+    def register(self, kind: str, concurrency: int = 1):
+        """Decorator registering an async handler for a job kind."""
+        def decorator(fn: Handler) -> Handler:
+            self.handlers[kind] = fn
+            self.limits[kind] = concurrency
+            self._running.setdefault(kind, 0)
+            return fn
+        return decorator
+
+    # --- Producer side ---
+    def enqueue(self, db: Session, kind: str, conversation_id: Optional[str] = None, params: Optional[dict] = None) -> Tuple[Job, bool]:
+        """
+        Queue a job. Returns (job, created); if an identical job is already
+        pending or running, that job is returned with created=False.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        params = params or {}
+        key = _dedup_key(kind, conversation_id, params)
+
+        with self._enqueue_lock:
+            existing = db.query(Job).filter(
+                Job.dedup_key == key, Job.status.in_(ACTIVE_STATUSES)
+            ).first()
+            if existing:
+                return existing, False
+
+            job = Job(
+                kind=kind,
+                conversation_id=conversation_id,
+                params=json.dumps(params, sort_keys=True, ensure_ascii=False),
+                dedup_key=key,
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+
+        print(f"[Jobs] Queued {kind} job {job.id}")
+        self._notify()
+        return job, True
+
+    def _notify(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def publish(self, job: Job):
+        if job.conversation_id:
+            await manager.broadcast_to_room(job.conversation_id, _event(job))
+
+    # --- Worker side ---
+    def start(self):
+        """Recover interrupted jobs and start the worker pool (call from the running loop)."""
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._recover()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"[Jobs] Started {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        self._wakeup = None
+
+    def _recover(self):
+        db = SessionLocal()
+        try:
+            count = db.query(Job).filter(Job.status == JobStatusEnum.running).update(
+                {"status": JobStatusEnum.pending}, synchronize_session=False
+            )
+            db.commit()
+            if count:
+                print(f"[Jobs] Re-queued {count} interrupted job(s)")
+        except Exception as e:
+            print(f"[Jobs] Recovery skipped: {e}")
+        finally:
+            db.close()
+
+    def _claim_next(self) -> Optional[Tuple[str, str]]:
+        """Atomically move the oldest pending job whose kind has a free slot to running."""
+        free = [k for k, limit in self.limits.items() if self._running.get(k, 0) < limit]
+        if not free:
+            return None
+        db = SessionLocal()
+        try:
+            candidates = db.query(Job.id, Job.kind).filter(
+                Job.status == JobStatusEnum.pending, Job.kind.in_(free)
+            ).order_by(Job.created_at.asc()).limit(20).all()
+            for job_id, kind in candidates:
+                claimed = db.query(Job).filter(
+                    Job.id == job_id, Job.status == JobStatusEnum.pending
+                ).update({
+                    "status": JobStatusEnum.running,
+                    "started_at": datetime.now(timezone.utc),
+                    "attempts": Job.attempts + 1,
+                    "error": None,
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    self._running[kind] = self._running.get(kind, 0) + 1
+                    return job_id, kind
+            return None
+        finally:
+            db.close()
+
+    async def _worker(self, n: int):
+        while True:
+            if admission_controller.under_pressure():
+                # Live traffic is queueing: leave background work until it drains
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                claimed = self._claim_next()
+            except Exception as e:
+                print(f"[Jobs] Worker {n} could not claim a job: {e}")
+                claimed = None
+
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job_id, kind = claimed
+            try:
+                await self._execute(job_id)
+            finally:
+                self._running[kind] -= 1
+                self._wakeup.set()  # A slot for this kind just freed up
+
+    async def _execute(self, job_id: str):
+        db = SessionLocal()
+        start = time.perf_counter()
+        job = db.get(Job, job_id)
+        kind = job.kind
+        try:
+            await self.publish(job)
+            with tracer.start_span("job.run", **{"job.kind": kind, "job.id": job_id, "job.attempt": job.attempts}):
+                result = await self.handlers[kind](JobContext(self, db, job))
+            job.status = JobStatusEnum.succeeded
+            job.result = json.dumps(result or {}, ensure_ascii=False, default=str)
+            job.progress = 100
+        except Exception as e:
+            db.rollback()
+            job = db.get(Job, job_id)
+            job.error = str(e)[:2000]
+            # Bad params / missing conversation won't fix themselves; provider errors might
+            retryable = not isinstance(e, (ValueError, LookupError)) and job.attempts < JOB_MAX_ATTEMPTS
+            job.status = JobStatusEnum.pending if retryable else JobStatusEnum.failed
+            print(f"[Jobs] {kind} job {job_id} failed (attempt {job.attempts}): {e}")
+        finally:
+            if job.status != JobStatusEnum.pending:
+                job.finished_at = datetime.now(timezone.utc)
+                JOB_DURATION.observe(time.perf_counter() - start, kind=kind, status=job.status.value)
+            db.commit()
+            await self.publish(job)
+            db.close()
+
+    def running_count(self) -> int:
+        return sum(self._running.values())
+
+
+job_queue = JobQueue()
+
+registry.gauge("jobs_running", "Background jobs currently executing in this process.", job_queue.running_count)
+
+
+# ============================================================
+# JOB HANDLERS
+# ============================================================
+async def _conversation_messages(ctx: JobContext) -> List[Message]:
+    conv = ctx.db.get(Conversation, ctx.conversation_id)
+    if conv is None or conv.deleted_at is not None:
+        raise LookupError("Conversation not found")
+    await ensure_hot_async(ctx.db, conv)
+    return ctx.db.query(Message).filter(
+        Message.conversation_id == ctx.conversation_id
+    ).order_by(Message.created_at.asc()).all()
+
+
+@job_queue.register("summary", concurrency=2)
+async def run_summary(ctx: JobContext) -> dict:
+    summary, cached = await summarize_conversation(ctx.db, ctx.conversation_id, priority=PRIORITY_SUMMARY)
+    return {"summary_id": summary.id, "summary_text": summary.summary_text, "cached": cached}
+
+
+@job_queue.register("bulk_translate", concurrency=1)
+async def run_bulk_translate(ctx: JobContext) -> dict:
+    """Translate every message of the conversation into params["target_language"]."""
+    target_language = ctx.params.get("target_language")
+    if not target_language:
+        raise ValueError("bulk_translate requires params.target_language")
+
+    messages = await _conversation_messages(ctx)
+    stored = {
+        t.message_id: t for t in ctx.db.query(MessageTranslation).filter(
+            MessageTranslation.message_id.in_([m.id for m in messages]),
+            MessageTranslation.language == target_language,
+        )
+    }
+    translations = []
+    for i, msg in enumerate(messages):
+        if msg.original_language == target_language:
+            text = msg.original_text
+        else:
+            text, model = await translate_with_model(
+                text=msg.original_text,
+                source_language=msg.original_language,
+                target_language=target_language,
+                role=msg.role.value,
+                priority=PRIORITY_BULK,
+            )
+            # Keep it as the message's rendering in that language (GET /messages?language=)
+            row = stored.get(msg.id)
+            if row is None:
+                ctx.db.add(MessageTranslation(
+                    message_id=msg.id, language=target_language, translated_text=text, translation_model=model,
+                ))
+            elif row.translated_text != text:
+                row.translated_text, row.translation_model, row.tts_audio_path = text, model, None
+        translations.append({"message_id": msg.id, "translated_text": text})
+        await ctx.progress(i + 1, len(messages))
+    ctx.db.commit()
+    return {"target_language": target_language, "translations": translations}
+
+
+@job_queue.register("re_tts", concurrency=1)
+async def run_re_tts(ctx: JobContext) -> dict:
+    """
+    Regenerate TTS audio for translated messages: the counterpart language
+    (Message.tts_audio_path) and every listener language (MessageTranslation
+    rows). By default only missing audio (e.g. TTS failed at send time);
+    params.only_missing=false redoes all of it and deletes the files it
+    replaces (never shared phrase-bank audio).
+    """
+    only_missing = ctx.params.get("only_missing", True)
+    messages = await _conversation_messages(ctx)
+    translations: Dict[str, List[MessageTranslation]] = {}
+    for t in ctx.db.query(MessageTranslation).join(Message).filter(Message.conversation_id == ctx.conversation_id):
+        translations.setdefault(t.message_id, []).append(t)
+
+    regenerated = failed = 0
+    for i, msg in enumerate(messages):
+        listener_role = "patient" if msg.role.value == "doctor" else "doctor"
+        # language → (text, rows voiced with it); the counterpart row shares the message's file
+        voiced: Dict[str, Tuple[str, list]] = {}
+        if _voiceable(msg.translated_text):
+            voiced[msg.target_language or "en"] = (msg.translated_text, [msg])
+        for t in translations.get(msg.id, []):
+            if _voiceable(t.translated_text):
+                voiced.setdefault(t.language, (t.translated_text, []))[1].append(t)
+
+        superseded = set()
+        for language, (text, rows) in voiced.items():
+            existing = next((row.tts_audio_path for row in rows if row.tts_audio_path), None)
+            if only_missing and existing:
+                for row in rows:
+                    row.tts_audio_path = row.tts_audio_path or existing  # Share what the language already has
+                continue
+            try:
+                filename = await text_to_speech(text=text, language=language, role=listener_role, prefix=MESSAGE_AUDIO_PREFIX)
+            except Exception as e:
+                print(f"[Jobs] re_tts failed for message {msg.id} ({language}): {e}")
+                failed += 1
+                continue
+            superseded.update(row.tts_audio_path for row in rows if row.tts_audio_path)
+            for row in rows:
+                row.tts_audio_path = filename
+            regenerated += 1
+        ctx.db.commit()
+        _remove_tts_audio(superseded)
+        await ctx.progress(i + 1, len(messages))
+    return {"regenerated": regenerated, "failed": failed}
+
+
+def _voiceable(text: Optional[str]) -> bool:
+    return bool(text) and not text.startswith("[Translation")
+
+
+def _remove_tts_audio(filenames):
+    """Delete TTS files a re_tts run replaced (committed first; bank audio is shared and kept)."""
+    for filename in filenames:
+        name = os.path.basename(filename)
+        if name.startswith(PHRASE_BANK_AUDIO_PREFIX):
+            continue
+        try:
+            os.remove(os.path.join(TTS_AUDIO_DIR, name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[Jobs] Could not remove replaced audio {name}: {e}")
+
+
+@job_queue.register("export", concurrency=2)
+async def run_export(ctx: JobContext) -> dict:
+    """Write the conversation transcript to EXPORT_DIR as JSON (default) or plain text."""
+    fmt = ctx.params.get("format", "json")
+    if fmt not in ("json", "txt"):
+        raise ValueError("export format must be 'json' or 'txt'")
+
+    messages = await _conversation_messages(ctx)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    filename = f"{ctx.job.id}.{fmt}"
+    path = os.path.join(EXPORT_DIR, filename)
+
+    if fmt == "json":
+        rows = [{
+            "id": m.id,
+            "role": m.role.value,
+            "original_text": m.original_text,
+            "original_language": m.original_language,
+            "translated_text": m.translated_text,
+            "target_language": m.target_language,
+            "created_at": m.created_at.isoformat() if m.created_at else None,
+        } for m in messages]
+        content = json.dumps({"conversation_id": ctx.conversation_id, "messages": rows}, ensure_ascii=False, indent=2)
+    else:
+        lines = []
+        for m in messages:
+            label = "Doctor" if m.role.value == "doctor" else "Patient"
+            lines.append(f"[{m.created_at:%Y-%m-%d %H:%M}] {label} ({m.original_language}): {m.original_text}")
+            if m.translated_text:
+                lines.append(f"    → ({m.target_language}) {m.translated_text}")
+        content = "\n".join(lines) + "\n"
+
+    await asyncio.to_thread(_write_file, path, content)
+    await ctx.progress(1, 1)
+    return {"filename": filename, "format": fmt, "messages": len(messages)}
+
+
+def _write_file(path: str, content: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+@job_queue.register("phrase_bank", concurrency=1)
+async def run_phrase_bank(ctx: JobContext) -> dict:
+    """Translate and voice every phrase-bank phrase into params["languages"] (default: all supported)."""
+    languages = ctx.params.get("languages") or list(SUPPORTED_LANGUAGES)
+    unsupported = [code for code in languages if code not in SUPPORTED_LANGUAGES]
+    if unsupported:
+        raise ValueError(f"Unsupported language(s): {', '.join(unsupported)}")
+    return await build_phrase_bank(ctx.db, languages, rebuild=bool(ctx.params.get("rebuild")), progress=ctx.progress)
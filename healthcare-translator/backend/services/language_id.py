@@ -0,0 +1,294 @@
+import math
+import re
+import bisect
+import unicodedata
+from collections import Counter
+from typing import Dict, NamedTuple
+
+# ============================================================
+# LOCAL LANGUAGE IDENTIFICATION (CPU-only, no network)
+# ============================================================
+# Most of our 20 languages are identified by their script alone. Only
+# Latin (en/es/fr/de/pt), Devanagari (hi/mr) and Arabic script (ar/ur)
+# need a second step: character-trigram profiles and marker tables.
+
+
+class LanguageGuess(NamedTuple):
+    language: str
+    confidence: float  # 0..1
+    method: str  # "script" | "markers" | "ngram" | "empty"
+
+
+# --- Script detection ---
+# (start, end, script) — sorted by start for bisect lookup
+_SCRIPT_RANGES = sorted([
+    (0x0400, 0x04FF, "cyrillic"),
+    (0x0600, 0x06FF, "arabic"),
+    (0x0750, 0x077F, "arabic"),
+    (0x0900, 0x097F, "devanagari"),
+    (0x0980, 0x09FF, "bengali"),
+    (0x0A00, 0x0A7F, "gurmukhi"),
+    (0x0A80, 0x0AFF, "gujarati"),
+    (0x0B80, 0x0BFF, "tamil"),
+    (0x0C00, 0x0C7F, "telugu"),
+    (0x0C80, 0x0CFF, "kannada"),
+    (0x0D00, 0x0D7F, "malayalam"),
+    (0x1100, 0x11FF, "hangul"),
+    (0x3040, 0x30FF, "kana"),
+    (0x3130, 0x318F, "hangul"),
+    (0x31F0, 0x31FF, "kana"),
+    (0x3400, 0x4DBF, "han"),
+    (0x4E00, 0x9FFF, "han"),
+    (0xAC00, 0xD7AF, "hangul"),
+    (0xF900, 0xFAFF, "han"),
+    (0xFB50, 0xFDFF, "arabic"),
+    (0xFE70, 0xFEFF, "arabic"),
+    (0xFF66, 0xFF9F, "kana"),
+])
+_RANGE_STARTS = [r[0] for r in _SCRIPT_RANGES]
+
+# Scripts used by exactly one of our supported languages
+SCRIPT_LANGUAGE = {
+    "bengali": "bn",
+    "gurmukhi": "pa",
+    "gujarati": "gu",
+    "tamil": "ta",
+    "telugu": "te",
+    "kannada": "kn",
+    "malayalam": "ml",
+    "cyrillic": "ru",
+    "hangul": "ko",
+    "kana": "ja",
+    "han": "zh",
+}
+
+
+def _script_of(ch: str) -> str:
+    cp = ord(ch)
+    if cp < 0x250:
+        return "latin" if ch.isalpha() else ""
+    idx = bisect.bisect_right(_RANGE_STARTS, cp) - 1
+    if idx >= 0:
+        start, end, script = _SCRIPT_RANGES[idx]
+        if cp <= end:
+            return script
+    return ""
+
+
+def script_histogram(text: str) -> Counter:
+    """Count letters per script, ignoring digits, punctuation and spaces."""
+    counts = Counter()
+    for ch in text:
+        script = _script_of(ch)
+        if script:
+            counts[script] += 1
+    return counts
+
+
+# --- Devanagari: Hindi vs Marathi ---
+_HINDI_MARKERS = {
+    "है", "हैं", "था", "थी", "थे", "और", "का", "की", "के", "में", "नहीं", "मुझे",
+    "आप", "को", "से", "यह", "वह", "क्या", "कि", "हूँ", "हूं", "रहा", "रही", "लिए", "भी",
+}
+_MARATHI_MARKERS = {
+    "आहे", "आहेत", "आणि", "नाही", "मला", "तुम्ही", "तुम्हाला", "काय", "होते", "होता",
+    "आम्ही", "माझे", "माझी", "माझा", "हे", "ते", "पण", "कसे", "करा", "झाले", "येथे", "साठी",
+}
+
+_MARATHI_SUFFIXES = ("ाला", "ाचा", "ाची", "ाचे", "ीत", "ात", "ून")
+
+# --- Arabic script: Arabic vs Urdu ---
+_URDU_LETTERS = set("ٹڈڑںےہھکگپچیۓ")
+_ARABIC_LETTERS = set("ةيكىأإؤ")
+
+
+def _marker_confidence(a: float, b: float) -> float:
+    """Confidence for the larger of two marker scores; 0.5 when there is no evidence."""
+    total = a + b
+    if total == 0:
+        return 0.5
+    evidence = min(1.0, total / 3.0)  # a single marker is weaker evidence than three
+    return 0.5 + 0.5 * (abs(a - b) / total) * evidence
+
+
+_WORD_SPLIT = re.compile(r"[\s\d.,!?;:()\"'\-।॥؟،۔]+")
+
+
+def _words(text: str):
+    # Not \w+: Indic vowel signs are combining marks and would split words
+    return [w for w in _WORD_SPLIT.split(text.lower()) if w]
+
+
+def _devanagari(text: str) -> LanguageGuess:
+    words = _words(text)
+    hi = sum(1 for w in words if w in _HINDI_MARKERS)
+    mr = sum(1 for w in words if w in _MARATHI_MARKERS)
+    # Marathi case endings attach to the word (Hindi uses separate postpositions)
+    mr += 0.5 * sum(1 for w in words if len(w) > 3 and w.endswith(_MARATHI_SUFFIXES))
+    mr += text.count("ळ")  # retroflex lateral: common in Marathi, absent in Hindi
+    lang = "mr" if mr > hi else "hi"
+    return LanguageGuess(lang, _marker_confidence(hi, mr), "markers")
+
+
+def _arabic_script(text: str) -> LanguageGuess:
+    ur = sum(1 for ch in text if ch in _URDU_LETTERS)
+    ar = sum(1 for ch in text if ch in _ARABIC_LETTERS)
+    lang = "ur" if ur > ar else "ar"
+    return LanguageGuess(lang, _marker_confidence(ar, ur), "markers")
+
+
+# --- Latin script: character trigram profiles ---
+# Small seed corpora in the register we actually see: clinical dialogue and
+# short conversational replies. Profiles are built once at import time.
+_LATIN_SEEDS: Dict[str, str] = {
+    "en": """
+        Hello doctor, I have had a headache and a high fever since yesterday.
+        How long have you been feeling this pain? Does it hurt when I press here?
+        Please take one tablet twice a day after meals for five days.
+        I am allergic to penicillin. My blood pressure is usually normal.
+        Are you taking any other medicine at the moment? Yes. No. Thank you. Okay.
+        We need to do a blood test and an x-ray of your chest.
+        The patient should come back for a follow-up appointment next week.
+        I feel dizzy and tired, and I cannot sleep at night. What is the dosage?
+        Please breathe deeply. Where does it hurt the most? Good morning, thanks.
+        You should drink plenty of water and rest. Is there any history of diabetes?
+        """,
+    "es": """
+        Hola doctor, tengo dolor de cabeza y fiebre alta desde ayer.
+        ¿Cuánto tiempo lleva sintiendo este dolor? ¿Le duele cuando presiono aquí?
+        Tome una pastilla dos veces al día después de las comidas durante cinco días.
+        Soy alérgico a la penicilina. Mi presión arterial normalmente es normal.
+        ¿Está tomando algún otro medicamento en este momento? Sí. No. Gracias. Vale.
+        Necesitamos hacer un análisis de sangre y una radiografía del pecho.
+        El paciente debe volver para una cita de seguimiento la próxima semana.
+        Me siento mareado y cansado, y no puedo dormir por la noche. ¿Cuál es la dosis?
+        Respire profundamente. ¿Dónde le duele más? Buenos días, muchas gracias.
+        Debe beber mucha agua y descansar. ¿Hay antecedentes de diabetes en la familia?
+        """,
+    "fr": """
+        Bonjour docteur, j'ai mal à la tête et une forte fièvre depuis hier.
+        Depuis combien de temps ressentez-vous cette douleur ? Avez-vous mal quand j'appuie ici ?
+        Prenez un comprimé deux fois par jour après les repas pendant cinq jours.
+        Je suis allergique à la pénicilline. Ma tension artérielle est habituellement normale.
+        Prenez-vous d'autres médicaments en ce moment ? Oui. Non. Merci. D'accord.
+        Nous devons faire une prise de sang et une radiographie des poumons.
+        Le patient doit revenir pour un rendez-vous de suivi la semaine prochaine.
+        J'ai des vertiges, je suis fatigué et je ne peux pas dormir la nuit. Quelle est la dose ?
+        Respirez profondément. Où avez-vous le plus mal ? Bonjour, merci beaucoup.
+        Vous devez boire beaucoup d'eau et vous reposer. Y a-t-il des antécédents de diabète ?
+        """,
+    "de": """
+        Hallo Herr Doktor, ich habe seit gestern Kopfschmerzen und hohes Fieber.
+        Wie lange haben Sie diese Schmerzen schon? Tut es weh, wenn ich hier drücke?
+        Nehmen Sie fünf Tage lang zweimal täglich eine Tablette nach dem Essen.
+        Ich bin allergisch gegen Penicillin. Mein Blutdruck ist normalerweise normal.
+        Nehmen Sie zurzeit andere Medikamente ein? Ja. Nein. Danke. Gut, in Ordnung.
+        Wir müssen eine Blutuntersuchung und eine Röntgenaufnahme der Brust machen.
+        Der Patient sollte nächste Woche zu einem Kontrolltermin wiederkommen.
+        Mir ist schwindelig und ich bin müde, und ich kann nachts nicht schlafen. Wie ist die Dosierung?
+        Bitte atmen Sie tief ein. Wo tut es am meisten weh? Guten Morgen, vielen Dank.
+        Sie sollten viel Wasser trinken und sich ausruhen. Gibt es Diabetes in der Familie?
+        """,
+    "pt": """
+        Olá doutor, estou com dor de cabeça e febre alta desde ontem.
+        Há quanto tempo você sente essa dor? Dói quando eu aperto aqui?
+        Tome um comprimido duas vezes ao dia depois das refeições durante cinco dias.
+        Sou alérgico à penicilina. Minha pressão arterial normalmente é normal.
+        Você está tomando algum outro remédio no momento? Sim. Não. Obrigado. Obrigada. Tudo bem.
+        Precisamos fazer um exame de sangue e uma radiografia do tórax.
+        O paciente deve voltar para uma consulta de acompanhamento na próxima semana.
+        Estou tonto e cansado, e não consigo dormir à noite. Qual é a dosagem?
+        Respire fundo. Onde dói mais? Bom dia, muito obrigado.
+        Você deve beber bastante água e descansar. Há histórico de diabetes na família?
+        """,
+}
+
+
+def _normalize_latin(text: str) -> str:
+    text = unicodedata.normalize("NFC", text.lower())
+    return " " + re.sub(r"[^\w]+|\d+", " ", text).strip() + " "
+
+
+# Known trigrams a Latin-script guess needs before its confidence is not scaled
+# down ("Paracetamol 500 mg" has 7 and would otherwise come out Spanish at 0.9)
+LATIN_MIN_KNOWN_TRIGRAMS = 12
+
+
+def _trigrams(text: str):
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+
+class TrigramModel:
+    """Add-one smoothed character trigram model over a fixed set of languages."""
+
+    def __init__(self, seeds: Dict[str, str]):
+        counts = {lang: Counter(_trigrams(_normalize_latin(seed))) for lang, seed in seeds.items()}
+        vocab = set()
+        for c in counts.values():
+            vocab.update(c)
+        v = len(vocab) + 1
+        self.languages = list(seeds)
+        self._logprob = {}
+        self._unseen = {}
+        for lang, c in counts.items():
+            total = sum(c.values()) + v
+            self._logprob[lang] = {g: math.log((n + 1) / total) for g, n in c.items()}
+            self._unseen[lang] = math.log(1 / total)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        grams = _trigrams(_normalize_latin(text))
+        out = {}
+        for lang in self.languages:
+            table = self._logprob[lang]
+            unseen = self._unseen[lang]
+            out[lang] = sum(table.get(g, unseen) for g in grams)
+        return out
+
+    def classify(self, text: str) -> LanguageGuess:
+        scores = self.scores(text)
+        best = max(scores, key=scores.get)
+        top = scores[best]
+        # Posterior under a uniform prior (log-sum-exp for stability)
+        norm = sum(math.exp(s - top) for s in scores.values())
+        # The posterior saturates after a handful of trigrams, even when they are
+        # mostly unknown ones from a drug or brand name: scale it by how many of the
+        # text's trigrams the winning profile actually knows
+        table = self._logprob[best]
+        known = sum(1 for g in _trigrams(_normalize_latin(text)) if g in table)
+        evidence = min(1.0, known / LATIN_MIN_KNOWN_TRIGRAMS)
+        return LanguageGuess(best, evidence / norm, "ngram")
+
+
+_latin_model = TrigramModel(_LATIN_SEEDS)
+
+
+def identify_language(text: str) -> LanguageGuess:
+    """
+    Identify the language of `text` locally.
+    Returns a LanguageGuess; callers should escalate when confidence is low.
+    """
+    hist = script_histogram(text)
+    letters = sum(hist.values())
+    if not letters:
+        return LanguageGuess("en", 0.0, "empty")
+
+    # Japanese mixes kana with Han; any kana means Japanese
+    if hist.get("kana"):
+        return LanguageGuess("ja", min(1.0, 0.9 + hist["kana"] / letters), "script")
+
+    script, count = hist.most_common(1)[0]
+    share = count / letters
+
+    if script == "latin":
+        guess = _latin_model.classify(text)
+        return LanguageGuess(guess.language, guess.confidence * share, guess.method)
+    if script == "devanagari":
+        guess = _devanagari(text)
+    elif script == "arabic":
+        guess = _arabic_script(text)
+    elif script in SCRIPT_LANGUAGE:
+        guess = LanguageGuess(SCRIPT_LANGUAGE[script], 0.99, "script")
+    else:
+        return LanguageGuess("en", 0.0, "empty")
+
+    return LanguageGuess(guess.language, guess.confidence * share, guess.method)
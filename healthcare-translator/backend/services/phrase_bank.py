@@ -0,0 +1,318 @@
+import os
+import time
+import asyncio
+import threading
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy.orm import Session
+from services.glossary import normalize_phrase
+from services.groq_service import translate_with_model, PRIORITY_BULK
+from services.tts_service import registry as tts_registry, DOCTOR_VOICE_OVERRIDE
+from metrics import registry
+
+# ============================================================
+# PHRASE BANK (precomputed translations + TTS for standard phrases)
+# ============================================================
+# Administrators list canonical phrases ("Take one tablet twice a day").
+# A "phrase_bank" job translates each one into every supported language
+# and voices it in both voices ahead of time. A live message that
+# normalizes to a bank phrase (case, spacing and trailing punctuation
+# ignored, like glossary phrase hits) is answered from the bank: no
+# translation call and no TTS call for the languages it covers.
+
+PHRASE_BANK_ENABLED = os.getenv("PHRASE_BANK_ENABLED", "true").lower() != "false"
+# Translation / TTS calls in flight while building the bank
+PHRASE_BANK_CONCURRENCY = int(os.getenv("PHRASE_BANK_CONCURRENCY", "8"))
+# Other workers pick up bank changes after at most this many seconds
+PHRASE_BANK_RELOAD_INTERVAL = float(os.getenv("PHRASE_BANK_RELOAD_INTERVAL", "300"))
+
+PHRASE_BANK_MODEL = "phrase_bank"  # translation_model of messages served from the bank
+# Bank audio is shared by every message that used the phrase; the reclaimer
+# must never delete it along with one conversation
+AUDIO_PREFIX = "bank_"
+
+LOOKUPS = registry.counter(
+    "phrase_bank_lookups_total",
+    "Live messages checked against the phrase bank, by outcome (hit, miss).",
+    ["outcome"],
+)
+SAVED_CALLS = registry.counter(
+    "phrase_bank_saved_calls_total",
+    "Translation and TTS calls answered from the phrase bank.",
+    ["kind"],
+)
+
+
+class BankEntry(NamedTuple):
+    translated_text: str
+    audio: Dict[str, Optional[str]]  # voice role ("doctor", "patient") → filename
+
+
+def voice_roles(language: str) -> List[str]:
+    """Voices to synthesize: the patient voice, plus a doctor voice where one differs."""
+    return ["patient", "doctor"] if language in DOCTOR_VOICE_OVERRIDE else ["patient"]
+
+
+def audio_filename(phrase_id: str, language: str, voice: str) -> str:
+    return f"{AUDIO_PREFIX}{phrase_id}_{language}_{voice}.mp3"
+
+
+class PhraseBank:
+    """In-memory index of the bank, loaded lazily from the DB, plus hit-rate counters."""
+
+    def __init__(self, session_factory=None, enabled: bool = PHRASE_BANK_ENABLED,
+                 reload_interval: float = PHRASE_BANK_RELOAD_INTERVAL):
+        self._session_factory = session_factory
+        self.enabled = enabled
+        self.reload_interval = reload_interval
+        # (role, source language, normalized text) → (phrase id, language → entry)
+        self._index: Optional[Dict[Tuple[str, str, str], Tuple[str, Dict[str, BankEntry]]]] = None
+        self._texts: Dict[str, str] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._reloading: Optional[asyncio.Task] = None
+        self.lookups = 0
+        self.hits = 0
+        self.saved_translations = 0
+        self.saved_tts = 0
+        self.needed_translations = 0  # Languages a hit still had to translate (not in the bank yet)
+        self.phrase_hits: Counter = Counter()
+
+    def _load(self) -> Dict[Tuple[str, str, str], Tuple[str, Dict[str, BankEntry]]]:
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        from models import PhraseBankPhrase, PhraseBankEntry
+
+        db = self._session_factory()
+        try:
+            index, texts = {}, {}
+            for phrase in db.query(PhraseBankPhrase).all():
+                index[(phrase.role, phrase.source_language, phrase.normalized)] = (phrase.id, {})
+                texts[phrase.id] = phrase.text
+            by_id = {phrase_id: entries for phrase_id, entries in index.values()}
+            for e in db.query(PhraseBankEntry).filter(PhraseBankEntry.translated_text.isnot(None)):
+                if e.phrase_id in by_id:
+                    by_id[e.phrase_id][e.language] = BankEntry(
+                        e.translated_text,
+                        {"doctor": e.doctor_audio_path or e.patient_audio_path, "patient": e.patient_audio_path},
+                    )
+            self._texts = texts
+            return index
+        finally:
+            db.close()
+
+    def _stale(self) -> bool:
+        return self._index is None or time.monotonic() - self._loaded_at > self.reload_interval
+
+    def _reload(self):
+        """Load the index from the DB (blocking: a worker thread when called from async code)."""
+        with self._lock:
+            if not self._stale():
+                return  # Another thread reloaded it while we waited
+            try:
+                self._index = self._load()
+            except Exception as e:
+                # Never let the bank break translation; retry on the next message
+                print(f"[PhraseBank] Could not load the phrase bank: {e}")
+                return
+            self._loaded_at = time.monotonic()
+
+    def _reload_done(self, task: asyncio.Task):
+        self._reloading = None
+        if not task.cancelled():
+            task.exception()  # _reload() logs its own errors
+
+    def index(self) -> Dict[Tuple[str, str, str], Tuple[str, Dict[str, BankEntry]]]:
+        """
+        The current index. On the event loop a stale index is served as is
+        ({} before the first load) while a reload runs in a worker thread;
+        thread callers (the reclaimer) reload in place and get the fresh one.
+        """
+        if self._stale():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._reload()
+            else:
+                if self._reloading is None:
+                    self._reloading = loop.create_task(asyncio.to_thread(self._reload))
+                    self._reloading.add_done_callback(self._reload_done)
+        return self._index or {}
+
+    def invalidate(self):
+        """Reload from the DB on next use (after phrases or entries change); the old index is served until then."""
+        self._loaded_at = float("-inf")
+
+    async def refresh(self):
+        """Reload now, off the event loop, and wait for it."""
+        self.invalidate()
+        await asyncio.to_thread(self._reload)
+
+    def serve(self, text: str, source_language: str, role: str, languages: List[str], with_tts: bool) -> Dict[str, dict]:
+        """
+        Fan-out entries ({"translated_text", "model", "tts_audio_path"}) for
+        every language in `languages` the bank has for this message; {} if it
+        is not a bank phrase. Audio is in the listener's voice (the other role).
+        """
+        if not self.enabled:
+            return {}
+        found = self.index().get((role, source_language, normalize_phrase(text)))
+        self.lookups += 1
+        if found is None:
+            LOOKUPS.inc(outcome="miss")
+            return {}
+        phrase_id, entries = found
+        LOOKUPS.inc(outcome="hit")
+        self.hits += 1
+        self.phrase_hits[phrase_id] += 1
+
+        listener = "patient" if role == "doctor" else "doctor"
+        served = {}
+        for language in languages:
+            entry = entries.get(language)
+            if entry is None:
+                continue
+            audio = entry.audio.get(listener) if with_tts else None
+            served[language] = {"translated_text": entry.translated_text, "model": PHRASE_BANK_MODEL, "tts_audio_path": audio}
+            if audio:
+                self.saved_tts += 1
+        self.saved_translations += len(served)
+        self.needed_translations += len(languages) - len(served)
+        SAVED_CALLS.inc(len(served), kind="translation")
+        SAVED_CALLS.inc(sum(1 for e in served.values() if e["tts_audio_path"]), kind="tts")
+        return served
+
+    def banked_languages(self, text: str, source_language: str, role: str) -> set:
+        """Languages serve() would answer for this text (no hit counted)."""
+        if not self.enabled:
+            return set()
+        found = self.index().get((role, source_language, normalize_phrase(text)))
+        return set(found[1]) if found else set()
+
+    def referenced_audio(self) -> set:
+        """Every audio filename the bank owns (for the orphan sweep)."""
+        return {
+            path
+            for _, entries in self.index().values()
+            for entry in entries.values()
+            for path in entry.audio.values()
+            if path
+        }
+
+    def stats(self, languages: Optional[List[str]] = None) -> dict:
+        index = self.index()
+        phrases = list(index.values())
+        coverage = {}
+        for language in languages or sorted({code for _, entries in phrases for code in entries}):
+            translated = sum(1 for _, entries in phrases if language in entries)
+            voiced = sum(
+                1 for _, entries in phrases
+                if language in entries and all(entries[language].audio.get(v) for v in ("doctor", "patient"))
+            )
+            coverage[language] = {"translated": translated, "voiced": voiced}
+        return {
+            "enabled": self.enabled,
+            "phrases": len(phrases),
+            "coverage": coverage,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else None,
+            "saved_translation_calls": self.saved_translations,
+            "saved_tts_calls": self.saved_tts,
+            "uncovered_languages_on_hits": self.needed_translations,
+            "top_phrases": [
+                {"phrase_id": phrase_id, "text": self._texts.get(phrase_id), "hits": hits}
+                for phrase_id, hits in self.phrase_hits.most_common(10)
+            ],
+        }
+
+
+async def build_phrase_bank(
+    db: Session,
+    languages: List[str],
+    rebuild: bool = False,
+    progress: Optional[Callable[[int, int], Awaitable[None]]] = None,
+    concurrency: int = PHRASE_BANK_CONCURRENCY,
+) -> dict:
+    """
+    Translate every bank phrase into `languages` and voice it in each voice,
+    PHRASE_BANK_CONCURRENCY calls at a time. Existing translations and audio
+    are kept unless `rebuild`. Returns counts of the work done.
+
+    Results are staged in plain objects and written in one commit at the end:
+    `progress` may commit `db` (the job row) while calls are in flight, and
+    must neither persist half-built entries nor expire the ORM rows in use.
+    """
+    from types import SimpleNamespace
+    from models import PhraseBankPhrase, PhraseBankEntry
+    from services.fanout import is_failed
+
+    columns = ("translated_text", "translation_model", "doctor_audio_path", "patient_audio_path")
+    phrases = [
+        SimpleNamespace(id=p.id, text=p.text, source_language=p.source_language, role=p.role)
+        for p in db.query(PhraseBankPhrase).all()
+    ]
+    staged = {
+        (e.phrase_id, e.language): SimpleNamespace(**{c: getattr(e, c) for c in columns})
+        for e in db.query(PhraseBankEntry).all()
+    }
+    work = [(p, language) for p in phrases for language in languages if language != p.source_language]
+    gate = asyncio.Semaphore(concurrency)
+    counts = {"phrases": len(phrases), "languages": len(languages), "translated": 0, "voiced": 0, "failed": 0}
+    done = 0
+
+    async def fill(phrase, language: str):
+        nonlocal done
+        entry = staged.setdefault((phrase.id, language), SimpleNamespace(**dict.fromkeys(columns)))
+        try:
+            if rebuild or not entry.translated_text:
+                async with gate:
+                    translated, model = await translate_with_model(
+                        text=phrase.text,
+                        source_language=phrase.source_language,
+                        target_language=language,
+                        role=phrase.role,
+                        priority=PRIORITY_BULK,
+                        lookup_cache=False,
+                    )
+                if is_failed(translated):
+                    raise RuntimeError(translated)
+                entry.translated_text, entry.translation_model = translated, model
+                entry.doctor_audio_path = entry.patient_audio_path = None  # Stale audio of the old text
+                counts["translated"] += 1
+            for voice in voice_roles(language):
+                column = f"{voice}_audio_path"
+                if rebuild or not getattr(entry, column):
+                    async with gate:
+                        filename = await tts_registry.synthesize(
+                            entry.translated_text, language, voice, filename=audio_filename(phrase.id, language, voice),
+                        )
+                    setattr(entry, column, filename)
+                    counts["voiced"] += 1
+        except Exception as e:
+            counts["failed"] += 1
+            print(f"[PhraseBank] '{phrase.text}' → {language} failed: {e}")
+        done += 1
+        if progress is not None:
+            await progress(done, len(work))
+
+    await asyncio.gather(*(fill(p, language) for p, language in work))
+    existing = {(e.phrase_id, e.language): e for e in db.query(PhraseBankEntry).all()}
+    live = {phrase_id for (phrase_id,) in db.query(PhraseBankPhrase.id)}  # Phrases deleted meanwhile are skipped
+    for (phrase_id, language), values in staged.items():
+        if phrase_id not in live:
+            continue
+        entry = existing.get((phrase_id, language))
+        if entry is None:
+            entry = PhraseBankEntry(phrase_id=phrase_id, language=language)
+            db.add(entry)
+        for column in columns:
+            setattr(entry, column, getattr(values, column))
+    db.commit()
+    await phrase_bank.refresh()
+    return counts
+
+
+# Singleton shared by the fan-out path and the phrase bank router
+phrase_bank = PhraseBank()
@@ -0,0 +1,103 @@
+import math
+from typing import Dict, Tuple
+from schemas import SUPPORTED_LANGUAGES
+
+# ============================================================
+# TRANSLATION PROMPT TEMPLATES
+# ============================================================
+# Prompts are rendered once per (source, target, role) at import time.
+# Bump TRANSLATION_PROMPT_VERSION whenever the wording changes so anything
+# caching translations can key on it and drop stale entries.
+
+TRANSLATION_PROMPT_VERSION = "tr-3"
+
+_TRANSLATION_TEMPLATE = """You are a professional medical interpreter for doctor-patient conversations.
+Translate the user's message from {source} to {target}. The speaker is the {role}.
+Rules:
+- Never add, remove or change medical information, and add no advice of your own.
+- Keep every number, dosage and unit exactly as written.
+- Keep every negation ("no", "not", "never"); never reverse the meaning.
+- {role_rule}
+- Keep the tone and urgency.
+- If a medical term has no direct equivalent, keep it and explain it briefly in parentheses.
+- Output only the translation."""
+
+_ROLE_RULES = {
+    "doctor": "Keep precise, professional medical terminology.",
+    "patient": "Use simple, clear words a layperson understands.",
+}
+
+LOCKED_TOKEN_RULE = "\n- Tokens like ⟦T1⟧ are already translated: copy them unchanged."
+
+
+def _render(source_language: str, target_language: str, role: str) -> Tuple[str, str]:
+    prompt = _TRANSLATION_TEMPLATE.format(
+        source=SUPPORTED_LANGUAGES.get(source_language, source_language),
+        target=SUPPORTED_LANGUAGES.get(target_language, target_language),
+        role=role,
+        role_rule=_ROLE_RULES.get(role, _ROLE_RULES["doctor"]),
+    )
+    return prompt, prompt + LOCKED_TOKEN_RULE
+
+
+# (source, target, role) → (plain prompt, prompt with locked-token rule)
+_PROMPTS: Dict[Tuple[str, str, str], Tuple[str, str]] = {
+    (src, tgt, role): _render(src, tgt, role)
+    for src in SUPPORTED_LANGUAGES
+    for tgt in SUPPORTED_LANGUAGES
+    if src != tgt
+    for role in _ROLE_RULES
+}
+
+
+def get_translation_prompt(source_language: str, target_language: str, role: str, locked: bool = False) -> str:
+    key = (source_language, target_language, role)
+    prompts = _PROMPTS.get(key)
+    if prompts is None:
+        # Unsupported code slipped through — render and keep it
+        prompts = _PROMPTS[key] = _render(source_language, target_language, role)
+    return prompts[1] if locked else prompts[0]
+
+
+# ============================================================
+# OUTPUT BUDGET (max_tokens)
+# ============================================================
+# Llama 3 tokens per character, by script. Latin text packs ~4 chars per
+# token; Indic, Arabic and CJK scripts are much less efficient.
+_TOKENS_PER_CHAR = {
+    "en": 0.27, "es": 0.3, "fr": 0.3, "de": 0.3, "pt": 0.3,
+    "ru": 0.35, "ar": 0.5, "ur": 0.55,
+    "hi": 0.6, "mr": 0.7, "bn": 0.8, "pa": 0.8, "gu": 0.8,
+    "ta": 0.8, "te": 0.8, "kn": 0.9, "ml": 0.9,
+    "zh": 0.9, "ja": 0.9, "ko": 0.7,
+}
+
+# Characters needed for the same content, relative to English
+_LENGTH_FACTOR = {
+    "en": 1.0, "es": 1.15, "fr": 1.2, "de": 1.2, "pt": 1.15,
+    "ru": 1.1, "ar": 0.95, "ur": 1.0,
+    "hi": 1.0, "mr": 1.0, "bn": 1.0, "pa": 1.0, "gu": 1.0,
+    "ta": 1.2, "te": 1.1, "kn": 1.15, "ml": 1.2,
+    "zh": 0.35, "ja": 0.5, "ko": 0.45,
+}
+
+MIN_MAX_TOKENS = 48
+MAX_MAX_TOKENS = 2048
+
+
+def estimate_max_tokens(text: str, source_language: str, target_language: str, observed_ratio: float = 0.0) -> int:
+    """
+    Output token budget for translating `text`: the expected translation
+    length with 2x headroom. `observed_ratio` (completion tokens per input
+    char seen for this pair) raises the estimate when real data says so.
+    """
+    chars = len(text)
+    prior = (
+        _TOKENS_PER_CHAR.get(target_language, 1.0)
+        * _LENGTH_FACTOR.get(target_language, 1.0)
+        / _LENGTH_FACTOR.get(source_language, 1.0)
+    )
+    ratio = max(prior, observed_ratio)
+    # Parenthesized explanations of untranslatable terms need some slack too
+    budget = math.ceil(chars * ratio * 2) + 32
+    return max(MIN_MAX_TOKENS, min(MAX_MAX_TOKENS, budget))
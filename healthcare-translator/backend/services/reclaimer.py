@@ -0,0 +1,315 @@
+"""
+Background reclamation of deleted conversations.
+
+DELETE /api/conversations/{id} only sets Conversation.deleted_at; from then
+on the conversation is hidden everywhere (lists, search, lookups 404). The
+Reclaimer then removes what it owned, one short transaction per batch:
+message translations and messages, summaries, a cold-storage archive
+(services/archive.py), export jobs and their files, and the original and
+TTS audio files, and finally the conversation row. Files are unlinked only
+after the rows referencing them are committed, paced to
+RECLAIM_FILES_PER_SECOND so a large delete does not saturate the disk.
+
+sweep_orphans() is the one-off cleanup for what deletes used to leave
+behind: rows whose parent is gone and audio/export files nothing refers
+to (run it with `python reclaim.py --orphans`). Only audio the app names
+as its own is swept (message TTS, uploads, phrase-bank audio, by
+prefix): standalone /api/tts output and any other file in the audio
+directories is left alone.
+"""
+import os
+import json
+import time
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import delete, select
+from database import SessionLocal
+from models import (
+    Conversation, Message, MessageTranslation, ConversationSummary,
+    ConversationArchive, ArchiveSearchTerm, Job, JobStatusEnum,
+)
+from services.archive import decode_payload, delete_archive
+from services.tts_service import AUDIO_DIR as TTS_AUDIO_DIR, MESSAGE_AUDIO_PREFIX
+from services.jobs import EXPORT_DIR
+from services.phrase_bank import phrase_bank, AUDIO_PREFIX as PHRASE_BANK_AUDIO_PREFIX
+from routers.audio import AUDIO_DIR as UPLOAD_AUDIO_DIR, UPLOAD_AUDIO_PREFIX
+from metrics import registry
+
+RECLAIM_BATCH_SIZE = int(os.getenv("RECLAIM_BATCH_SIZE", "200"))  # Messages deleted per transaction
+RECLAIM_INTERVAL = float(os.getenv("RECLAIM_INTERVAL", "60"))  # Seconds between passes (deletes wake it early)
+RECLAIM_FILES_PER_SECOND = float(os.getenv("RECLAIM_FILES_PER_SECOND", "50"))  # 0 = unpaced
+# Files younger than this are never treated as orphans (their row may not be committed yet)
+RECLAIM_ORPHAN_GRACE = float(os.getenv("RECLAIM_ORPHAN_GRACE", "3600"))
+
+# Uploaded originals and TTS output live in different directories
+AUDIO_DIRS = list(dict.fromkeys([TTS_AUDIO_DIR, UPLOAD_AUDIO_DIR]))
+# Audio files the orphan sweep may remove: only names the app gives its own files
+OWNED_AUDIO_PREFIXES = (MESSAGE_AUDIO_PREFIX, UPLOAD_AUDIO_PREFIX, PHRASE_BANK_AUDIO_PREFIX)
+
+RECLAIMED_BYTES = registry.counter(
+    "reclaim_bytes_total",
+    "Bytes freed on disk by the reclaimer, by file kind (audio, export).",
+    ["kind"],
+)
+RECLAIMED_ROWS = registry.counter(
+    "reclaim_rows_total",
+    "Database rows removed by the reclaimer, by table.",
+    ["table"],
+)
+
+
+class Reclaimer:
+    """Removes soft-deleted conversations and their files in the background."""
+
+    def __init__(
+        self,
+        batch_size: int = RECLAIM_BATCH_SIZE,
+        interval: float = RECLAIM_INTERVAL,
+        files_per_second: float = RECLAIM_FILES_PER_SECOND,
+        audio_dirs: Optional[List[str]] = None,
+        export_dir: str = EXPORT_DIR,
+    ):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.files_per_second = files_per_second
+        self.audio_dirs = audio_dirs or AUDIO_DIRS
+        self.export_dir = export_dir
+        self.reclaimed_bytes = 0
+        self.reclaimed_files = 0
+        self.reclaimed_conversations = 0
+        self._next_unlink = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def stats(self) -> dict:
+        return {
+            "conversations": self.reclaimed_conversations,
+            "files": self.reclaimed_files,
+            "bytes": self.reclaimed_bytes,
+        }
+
+    # --- Files ---
+    def _pace(self):
+        if self.files_per_second <= 0:
+            return
+        now = time.monotonic()
+        if self._next_unlink > now:
+            time.sleep(self._next_unlink - now)
+        self._next_unlink = max(now, self._next_unlink) + 1 / self.files_per_second
+
+    def _unlink(self, path: str, kind: str, dry_run: bool = False) -> int:
+        """Remove one file; returns the bytes freed (0 if it was already gone)."""
+        try:
+            size = os.path.getsize(path)
+            if not dry_run:
+                self._pace()
+                os.remove(path)
+        except FileNotFoundError:
+            return 0
+        except OSError as e:
+            print(f"[Reclaim] Could not remove {path}: {e}")
+            return 0
+        if not dry_run:
+            RECLAIMED_BYTES.inc(size, kind=kind)
+            self.reclaimed_bytes += size
+            self.reclaimed_files += 1
+        return size
+
+    def remove_audio(self, filenames: Iterable[str]) -> int:
+        freed = 0
+        for filename in set(filenames):
+            name = os.path.basename(filename)  # Stored as bare names; never follow a path out of the audio dirs
+            if name.startswith(PHRASE_BANK_AUDIO_PREFIX):
+                continue  # Shared phrase-bank audio, not owned by the conversation
+            for directory in self.audio_dirs:
+                freed += self._unlink(os.path.join(directory, name), "audio")
+        return freed
+
+    # --- Deleted conversations ---
+    def pending(self) -> List[str]:
+        with SessionLocal() as db:
+            return db.execute(
+                select(Conversation.id).where(Conversation.deleted_at.isnot(None)).order_by(Conversation.deleted_at.asc())
+            ).scalars().all()
+
+    def reclaim_conversation(self, conversation_id: str) -> Optional[int]:
+        """
+        Remove a deleted conversation and everything it owns; returns the
+        bytes freed, or None if it has to wait (one of its jobs is running, or
+        a message was saved while it ran).
+        """
+        freed = 0
+        with SessionLocal() as db:
+            jobs = db.query(Job).filter(Job.conversation_id == conversation_id).all()
+            if any(job.status == JobStatusEnum.running for job in jobs):
+                return None
+            for job in jobs:
+                if job.kind == "export" and job.result:
+                    filename = json.loads(job.result).get("filename")
+                    if filename:
+                        freed += self._unlink(os.path.join(self.export_dir, os.path.basename(filename)), "export")
+            # A worker may have claimed one meanwhile: that row stays
+            db.execute(delete(Job.__table__).where(
+                Job.id.in_([job.id for job in jobs]), Job.status != JobStatusEnum.running,
+            ))
+            RECLAIMED_ROWS.inc(len(jobs), table="jobs")
+            db.commit()
+
+            while True:
+                batch = db.execute(
+                    select(Message.id, Message.audio_file_path, Message.tts_audio_path)
+                    .where(Message.conversation_id == conversation_id)
+                    .limit(self.batch_size)
+                ).all()
+                if not batch:
+                    break
+                message_ids = [row.id for row in batch]
+                files = {path for row in batch for path in (row.audio_file_path, row.tts_audio_path) if path}
+                files.update(path for path in db.execute(
+                    select(MessageTranslation.tts_audio_path).where(
+                        MessageTranslation.message_id.in_(message_ids),
+                        MessageTranslation.tts_audio_path.isnot(None),
+                    )
+                ).scalars())
+                translations = db.execute(
+                    delete(MessageTranslation.__table__).where(MessageTranslation.message_id.in_(message_ids))
+                ).rowcount
+                db.execute(delete(Message.__table__).where(Message.id.in_(message_ids)))
+                db.commit()
+                RECLAIMED_ROWS.inc(translations, table="message_translations")
+                RECLAIMED_ROWS.inc(len(message_ids), table="messages")
+                freed += self.remove_audio(files)
+
+            summaries = db.execute(
+                delete(ConversationSummary.__table__).where(ConversationSummary.conversation_id == conversation_id)
+            ).rowcount
+            RECLAIMED_ROWS.inc(summaries, table="conversation_summaries")
+
+            archive = db.get(ConversationArchive, conversation_id)
+            archived_files = decode_payload(archive).get("audio", []) if archive else []
+            delete_archive(db, conversation_id)
+            db.execute(delete(Conversation.__table__).where(Conversation.id == conversation_id))
+            if db.execute(select(Message.id).where(Message.conversation_id == conversation_id).limit(1)).first():
+                # Saved while the batches ran (the row lock was not held yet): next pass
+                db.rollback()
+                return None
+            db.commit()
+            RECLAIMED_ROWS.inc(table="conversations")
+            freed += self.remove_audio(archived_files)
+
+        self.reclaimed_conversations += 1
+        print(f"[Reclaim] Conversation {conversation_id} reclaimed ({freed / 1024:.0f} KB freed)")
+        return freed
+
+    def run_once(self) -> int:
+        """Reclaim every deleted conversation that is ready; returns how many were."""
+        done = 0
+        for conversation_id in self.pending():
+            try:
+                if self.reclaim_conversation(conversation_id) is not None:
+                    done += 1
+            except Exception as e:
+                print(f"[Reclaim] Failed to reclaim {conversation_id}: {e}")
+        return done
+
+    # --- Orphans ---
+    def sweep_orphans(self, dry_run: bool = False, grace: float = RECLAIM_ORPHAN_GRACE) -> Dict[str, int]:
+        """
+        Remove rows whose parent no longer exists, then audio and export
+        files no row refers to (older than `grace` seconds; audio only with
+        an OWNED_AUDIO_PREFIXES name). With dry_run nothing is deleted; the
+        counts say what would be.
+        """
+        report = {}
+        with SessionLocal() as db:
+            conversations = select(Conversation.id)
+            # Translations first: those of orphaned messages count as orphaned too
+            orphaned = [
+                ("message_translations", MessageTranslation.__table__,
+                 ~MessageTranslation.message_id.in_(select(Message.id).where(Message.conversation_id.in_(conversations)))),
+                ("messages", Message.__table__, ~Message.conversation_id.in_(conversations)),
+                ("conversation_summaries", ConversationSummary.__table__,
+                 ~ConversationSummary.conversation_id.in_(conversations)),
+                ("archive_search_terms", ArchiveSearchTerm.__table__, ~ArchiveSearchTerm.conversation_id.in_(conversations)),
+                ("conversation_archives", ConversationArchive.__table__,
+                 ~ConversationArchive.conversation_id.in_(conversations)),
+            ]
+            for name, table, where in orphaned:
+                if dry_run:
+                    report[name] = db.query(table).filter(where).count()
+                else:
+                    report[name] = db.execute(delete(table).where(where)).rowcount
+                    RECLAIMED_ROWS.inc(report[name], table=name)
+            db.commit()
+
+            referenced = self._referenced_audio(db)
+            exports = {
+                json.loads(result).get("filename")
+                for result in db.execute(select(Job.result).where(Job.kind == "export", Job.result.isnot(None))).scalars()
+            }
+
+        cutoff = time.time() - grace
+        files = bytes_ = 0
+        for directory, keep, kind in [*[(d, referenced, "audio") for d in self.audio_dirs], (self.export_dir, exports, "export")]:
+            if not os.path.isdir(directory):
+                continue
+            for entry in os.scandir(directory):
+                if not entry.is_file() or entry.name.startswith(".") or entry.name in keep or entry.stat().st_mtime > cutoff:
+                    continue
+                if kind == "audio" and not entry.name.startswith(OWNED_AUDIO_PREFIXES):
+                    continue  # /api/tts output, files from before the prefixes, fixtures
+                freed = self._unlink(entry.path, kind, dry_run=dry_run)
+                files += 1
+                bytes_ += freed
+        report["files"] = files
+        report["bytes"] = bytes_
+        return report
+
+    @staticmethod
+    def _referenced_audio(db) -> Set[str]:
+        referenced: Set[str] = set()
+        for column in (Message.audio_file_path, Message.tts_audio_path, MessageTranslation.tts_audio_path):
+            referenced.update(db.execute(select(column).where(column.isnot(None)).distinct()).scalars())
+        for archive in db.execute(select(ConversationArchive)).scalars():
+            referenced.update(decode_payload(archive).get("audio", []))
+            db.expunge(archive)
+        phrase_bank.invalidate()  # Fresh from the DB, not the cached index
+        referenced.update(phrase_bank.referenced_audio())
+        return {os.path.basename(path) for path in referenced}
+
+    # --- Background task ---
+    def wake(self):
+        """Start a pass now (called after a delete)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception as e:
+                print(f"[Reclaim] Pass failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+# Singleton started by the app lifespan
+reclaimer = Reclaimer()
+
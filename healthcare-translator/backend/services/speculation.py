@@ -0,0 +1,278 @@
+import os
+import time
+import asyncio
+from collections import Counter
+from typing import Awaitable, Dict, Iterable, List, Optional, Tuple
+from services.groq_service import translate_with_model, PRIORITY_SUMMARY
+from services.phrase_bank import phrase_bank
+from metrics import registry
+
+# ============================================================
+# SPECULATIVE TRANSLATION OF DRAFTS
+# ============================================================
+# While the speaker types, clients may send {"type": "draft", ...} frames
+# (debounced, see routers/websocket.py). Each draft is translated as a
+# whole in the background into the room's listener languages; a new draft
+# cancels the calls of the previous one that are still in flight. On send,
+# fan_out reuses those calls, finished or still running, only when the
+# draft is exactly the final text (whitespace aside). Anything else is
+# translated in one call as usual: translating a message piecewise would
+# lose the context that pronouns, negations and dosages carry across
+# sentences. Finished translations of earlier drafts stay in the
+# translation cache, so sending one of them unchanged is still a cache hit.
+
+SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "true").lower() != "false"
+# Shorter drafts are not speculated
+SPECULATION_MIN_CHARS = int(os.getenv("SPECULATION_MIN_CHARS", "8"))
+SPECULATION_MAX_CHARS = int(os.getenv("SPECULATION_MAX_CHARS", "1000"))  # Longer drafts are not speculated
+SPECULATION_MAX_INFLIGHT = int(os.getenv("SPECULATION_MAX_INFLIGHT", "8"))  # Speculative calls per socket
+
+# Behind live sends in the Groq quota, ahead of bulk jobs
+PRIORITY_SPECULATIVE = PRIORITY_SUMMARY
+
+SPECULATIVE_CALLS = registry.counter(
+    "speculation_calls_total",
+    "Speculative sentence translations by outcome (used, discarded = finished but never sent, cancelled).",
+    ["outcome"],
+)
+SPECULATIVE_MESSAGES = registry.counter(
+    "speculation_messages_total",
+    "Sent messages that had drafts, by outcome (full, partial, miss).",
+    ["outcome"],
+)
+SPECULATION_SAVED = registry.histogram(
+    "speculation_saved_seconds",
+    "Translation time already done when the message was sent (slowest reused language).",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0),
+)
+
+# (source language, role, normalized text, target language)
+CallKey = Tuple[str, str, str, str]
+
+
+def normalize_draft(text: str) -> str:
+    """Whitespace-collapsed text: a draft is reused only if this equals the sent message's."""
+    return " ".join(text.split())
+
+
+class SpeculationStats:
+    """Process-wide counters behind /api/usage (the Prometheus series carry the same numbers)."""
+
+    def __init__(self):
+        self.drafts = 0
+        self.calls: Counter = Counter()
+        self.messages: Counter = Counter()
+        self.saved_seconds = 0.0
+
+    def call(self, outcome: str, count: int = 1):
+        if count:
+            SPECULATIVE_CALLS.inc(count, outcome=outcome)
+            self.calls[outcome] += count
+
+    def message(self, outcome: str, saved: Optional[float] = None):
+        SPECULATIVE_MESSAGES.inc(outcome=outcome)
+        self.messages[outcome] += 1
+        if saved is not None:
+            SPECULATION_SAVED.observe(saved)
+            self.saved_seconds += saved
+
+    def snapshot(self) -> dict:
+        calls = sum(self.calls.values())
+        wasted = self.calls["discarded"] + self.calls["cancelled"]
+        return {
+            "enabled": SPECULATION_ENABLED,
+            "drafts": self.drafts,
+            "calls": dict(self.calls),
+            "wasted_calls": wasted,
+            "waste_rate": round(wasted / calls, 4) if calls else None,
+            "messages": dict(self.messages),
+            "saved_seconds": round(self.saved_seconds, 3),
+        }
+
+
+class _Call:
+    """One speculative translation of one draft into one language."""
+
+    __slots__ = ("task", "started", "finished")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        task.add_done_callback(self._done)
+
+    def _done(self, task: asyncio.Task):
+        self.finished = time.monotonic()
+        if not task.cancelled():
+            task.exception()  # Retrieved here; the send path falls back to a fresh call
+
+    def drop(self, stats: SpeculationStats):
+        if self.task.done():
+            stats.call("discarded")
+        else:
+            self.task.cancel()
+            stats.call("cancelled")
+
+
+class DraftSession:
+    """The speculative calls of one socket's current draft."""
+
+    def __init__(self, enabled: bool = SPECULATION_ENABLED, max_inflight: int = SPECULATION_MAX_INFLIGHT,
+                 min_chars: int = SPECULATION_MIN_CHARS, max_chars: int = SPECULATION_MAX_CHARS):
+        self.enabled = enabled
+        self.max_inflight = max_inflight
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._calls: Dict[CallKey, _Call] = {}
+        self._pending: Optional[asyncio.Task] = None
+
+    def prepare(self, work: Awaitable[None]):
+        """
+        Run a draft's setup (language detection, room lookup, then update())
+        in the background so it never stalls the socket's receive loop. A
+        newer draft, a send or a reset cancels it.
+        """
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = asyncio.get_running_loop().create_task(work)
+        self._pending.add_done_callback(self._prepared)
+
+    def _prepared(self, task: asyncio.Task):
+        if self._pending is task:
+            self._pending = None
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[Speculation] Draft setup failed: {task.exception()}")
+
+    def _targets(self, source_language: str, languages: Iterable[str]) -> List[str]:
+        return [code for code in dict.fromkeys(languages) if code and code != source_language]
+
+    def update(self, text: str, source_language: str, role: str, languages: Iterable[str]) -> int:
+        """
+        Speculate on a new draft: cancel the calls of the previous text,
+        start calls for this one. Returns how many calls were started.
+        """
+        if not self.enabled:
+            return 0
+        stats.drafts += 1
+        targets = self._targets(source_language, languages)
+        banked = phrase_bank.banked_languages(text, source_language, role)
+        normalized = normalize_draft(text)
+        wanted: List[CallKey] = []
+        if self.min_chars <= len(normalized) <= self.max_chars:
+            wanted = [
+                (source_language, role, normalized, language)
+                for language in targets
+                if language not in banked  # Served from the bank on send anyway
+            ]
+        keep = set(wanted)
+        for key in [key for key in self._calls if key not in keep]:
+            self._calls.pop(key).drop(stats)
+
+        started = 0
+        for key in wanted:
+            if key in self._calls:
+                continue
+            if sum(1 for call in self._calls.values() if not call.task.done()) >= self.max_inflight:
+                break  # The next draft picks up the rest
+            self._calls[key] = _Call(asyncio.get_running_loop().create_task(self._translate(*key)))
+            started += 1
+        return started
+
+    @staticmethod
+    async def _translate(source_language: str, role: str, text: str, language: str) -> Tuple[str, Optional[str]]:
+        return await translate_with_model(
+            text=text,
+            source_language=source_language,
+            target_language=language,
+            role=role,
+            priority=PRIORITY_SPECULATIVE,
+        )
+
+    def claim(self, text: str, source_language: str, role: str, languages: Iterable[str]) -> Optional["Speculation"]:
+        """
+        Hand the calls of a draft that is exactly the sent message to a
+        Speculation (None if there are none) and drop the rest. The session
+        is empty afterwards.
+        """
+        if not self._calls:
+            self.reset()
+            return None
+        normalized = normalize_draft(text)
+        targets = self._targets(source_language, languages)
+        keys = {(source_language, role, normalized, language) for language in targets}
+        claimed = {key: self._calls.pop(key) for key in keys if key in self._calls}
+        self.reset()
+        if not claimed:
+            stats.message("miss")
+            return None
+        return Speculation(text, source_language, role, claimed, full=len(claimed) == len(keys))
+
+    def reset(self):
+        """Drop every call (draft cleared, message sent, socket closed)."""
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        for call in self._calls.values():
+            call.drop(stats)
+        self._calls.clear()
+
+
+class Speculation:
+    """Speculative calls claimed by one sent message; used by fan_out."""
+
+    def __init__(self, text: str, source_language: str, role: str, calls: Dict[CallKey, _Call], full: bool):
+        self.text = text
+        self.source_language = source_language
+        self.role = role
+        self.full = full
+        self.sent_at = time.monotonic()
+        self._calls = {key[3]: call for key, call in calls.items()}  # language → call
+        self._used = set()
+        self._head_starts: Dict[str, float] = {}  # language → speculative work done before send
+
+    def covers(self, language: str) -> bool:
+        return language in self._calls
+
+    async def translate(self, language: str, priority: int) -> Tuple[str, Optional[str]]:
+        """
+        The message in `language`: the draft's translation (awaiting it if
+        still running) or, if that failed, a fresh call for the whole text.
+        """
+        from services.fanout import is_failed
+
+        call = self._calls.get(language)
+        if call is not None:
+            try:
+                translated, model = await call.task
+            except Exception:
+                translated, model = None, None
+            if not is_failed(translated):
+                self._used.add(language)
+                self._head_starts[language] = min(call.finished or self.sent_at, self.sent_at) - call.started
+                return translated, model
+        return await translate_with_model(
+            text=self.text,
+            source_language=self.source_language,
+            target_language=language,
+            role=self.role,
+            priority=priority,
+            lookup_cache=False,
+        )
+
+    def settle(self):
+        """Record the outcome once fan_out is done; unused calls count as waste."""
+        for language, call in self._calls.items():
+            if language in self._used:
+                stats.call("used")
+            else:
+                call.drop(stats)
+        if not self._used:
+            stats.message("miss")
+            return
+        # The broadcast waits for the slowest language, so only the smallest head start is saved for sure
+        saved = min(self._head_starts.values())
+        stats.message("full" if self.full and len(self._used) == len(self._calls) else "partial", saved)
+
+
+# Process-wide counters for /api/usage
+stats = SpeculationStats()
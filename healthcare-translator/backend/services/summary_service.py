@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+from typing import Dict, List, Tuple
+from sqlalchemy.orm import Session
+from models import Conversation, Message, ConversationSummary
+from services.groq_service import generate_medical_summary, PRIORITY_SUMMARY, SUMMARY_MODEL
+from services.archive import ensure_hot_async
+from metrics import SUMMARY_CACHE
+
+# Bump when the summary prompt changes, so old summaries stop matching
+SUMMARY_VERSION = "sum-1"
+
+# fingerprint → in-flight generation, shared by concurrent requests
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def content_fingerprint(messages: List[Message]) -> str:
+    """Hash of everything the summary prompt sees (ids, texts), plus model and prompt version."""
+    h = hashlib.sha256(f"{SUMMARY_VERSION}\x1f{SUMMARY_MODEL}".encode("utf-8"))
+    for msg in messages:
+        for part in (msg.id, msg.role.value, msg.original_text, msg.translated_text or ""):
+            h.update(b"\x1e")
+            h.update(part.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _cached_summary(db: Session, conversation_id: str, fingerprint: str):
+    return db.query(ConversationSummary).filter(
+        ConversationSummary.conversation_id == conversation_id,
+        ConversationSummary.content_fingerprint == fingerprint,
+    ).order_by(ConversationSummary.created_at.desc()).first()
+
+
+async def _generate(fingerprint: str, messages: List[Message], priority: int) -> Tuple[str, bool]:
+    """Run the LLM call once per fingerprint; concurrent callers await the same future."""
+    future = _inflight.get(fingerprint)
+    if future is not None:
+        SUMMARY_CACHE.inc(result="coalesced")
+        return await asyncio.shield(future), True
+
+    SUMMARY_CACHE.inc(result="miss")
+    future = asyncio.ensure_future(generate_medical_summary(messages, priority=priority))
+    _inflight[fingerprint] = future
+    future.add_done_callback(lambda _: _inflight.pop(fingerprint, None))
+    return await asyncio.shield(future), False
+
+
+async def summarize_conversation(
+    db: Session, conversation_id: str, priority: int = PRIORITY_SUMMARY
+) -> Tuple[ConversationSummary, bool]:
+    """
+    Return (summary, cached) for a conversation. Shared by the summary
+    endpoint and the background job queue.
+
+    If a summary of exactly the current messages exists it is returned with
+    cached=True; otherwise a new one is generated and stored.
+
+    Raises LookupError if the conversation does not exist and ValueError if
+    it has no messages.
+    """
+    conv = db.query(Conversation).filter(Conversation.id == conversation_id, Conversation.deleted_at.is_(None)).first()
+    if not conv:
+        raise LookupError("Conversation not found")
+    await ensure_hot_async(db, conv)
+
+    messages = db.query(Message).filter(
+        Message.conversation_id == conversation_id
+    ).order_by(Message.created_at.asc(), Message.id.asc()).all()
+
+    if not messages:
+        raise ValueError("No messages to summarize")
+
+    fingerprint = content_fingerprint(messages)
+    existing = _cached_summary(db, conversation_id, fingerprint)
+    if existing:
+        SUMMARY_CACHE.inc(result="hit")
+        return existing, True
+
+    summary_text, coalesced = await _generate(fingerprint, messages, priority)
+
+    # A coalesced caller may find the row the leading caller just stored
+    if coalesced:
+        existing = _cached_summary(db, conversation_id, fingerprint)
+        if existing:
+            return existing, True
+
+    summary = ConversationSummary(
+        conversation_id=conversation_id,
+        summary_text=summary_text,
+        content_fingerprint=fingerprint,
+        first_message_id=messages[0].id,
+        last_message_id=messages[-1].id,
+        message_count=len(messages),
+    )
+    db.add(summary)
+    db.commit()
+    db.refresh(summary)
+    return summary, False
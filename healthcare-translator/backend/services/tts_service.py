@@ -1,8 +1,11 @@
 import os
+import time
 import uuid
-import edge_tts
 import asyncio
-from gtts import gTTS
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from metrics import TTS_ENGINE_LATENCY, FALLBACKS
+from tracing import tracer
 
 AUDIO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "audio_files")
 os.makedirs(AUDIO_DIR, exist_ok=True)
@@ -46,42 +49,381 @@ DOCTOR_VOICE_OVERRIDE = {
     "ko": "ko-KR-InJoonNeural",
 }
 
+# Filename prefixes: audio of chat messages (owned, and removed, with the
+# conversation) vs standalone /api/tts output (never swept by the reclaimer)
+MESSAGE_AUDIO_PREFIX = "msg_"
+TTS_AUDIO_PREFIX = "tts_"
+
+# Language code → gTTS language code (gTTS has no doctor/patient voices)
+GTTS_LANG_MAP = {code: code for code in VOICE_MAP}
+GTTS_LANG_MAP["zh"] = "zh-CN"
+
+
+# ============================================================
+# 1. CIRCUIT BREAKER + ROLLING STATS
+# ============================================================
+class CircuitBreaker:
+    """
+    Per-engine circuit breaker.
+
+    closed    → requests flow, failures are counted
+    open      → requests are rejected until reset_timeout elapses
+    half_open → a single probe request is let through; success closes, failure re-opens
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent to the engine right now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._consecutive_failures += 1
+        self._probe_in_flight = False
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+
+    def release_probe(self):
+        """The probe ended without an outcome (cancelled): let the next request probe instead."""
+        self._probe_in_flight = False
+
+    def trip(self):
+        """Force the breaker open (e.g. rolling error rate too high)."""
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+
+
+class EngineStats:
+    """Rolling window of (latency, ok) samples for a single engine (or engine and language)."""
+
+    def __init__(self, window: int = 50):
+        self._samples = deque(maxlen=window)
+
+    def record(self, latency: float, ok: bool):
+        self._samples.append((latency, ok))
+
+    @property
+    def count(self) -> int:
+        return len(self._samples)
+
+    @property
+    def error_rate(self) -> float:
+        if not self._samples:
+            return 0.0
+        return sum(1 for _, ok in self._samples if not ok) / len(self._samples)
+
+    @property
+    def avg_latency(self) -> Optional[float]:
+        """Mean latency of successful calls, or None when there is no data yet."""
+        latencies = [lat for lat, ok in self._samples if ok]
+        if not latencies:
+            return None
+        return sum(latencies) / len(latencies)
+
+
+# ============================================================
+# 2. TTS ENGINES
+# ============================================================
+class TTSEngine:
+    """
+    Base class for a TTS backend. Subclasses implement `synthesize`
+    and describe which languages/voices they support.
+    """
+
+    name = "base"
+
+    def __init__(
+        self,
+        priority: int = 0,
+        timeout: float = 15.0,
+        breaker: Optional[CircuitBreaker] = None,
+        window: int = 50,
+    ):
+        self.priority = priority  # Lower = preferred when there is no latency data
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.window = window
+        self.stats = EngineStats(window=window)  # All languages: error rate and breaker trips
+        self._language_stats: Dict[str, EngineStats] = {}  # Per language: routing
+
+    def stats_for(self, language: str) -> EngineStats:
+        stats = self._language_stats.get(language)
+        if stats is None:
+            stats = self._language_stats[language] = EngineStats(window=self.window)
+        return stats
+
+    def record(self, language: str, latency: float, ok: bool):
+        self.stats.record(latency, ok)
+        self.stats_for(language).record(latency, ok)
+
+    def supports(self, language: str) -> bool:
+        return True
+
+    def voice_for(self, language: str, role: str) -> Optional[str]:
+        return None
+
+    def preload(self):
+        """Import the engine's client library ahead of the first request (optional warm-up)."""
+
+    async def synthesize(self, text: str, language: str, role: str, file_path: str):
+        raise NotImplementedError
+
+
+class EdgeTTSEngine(TTSEngine):
+    """High-quality Microsoft neural voices with distinct doctor/patient voices."""
+
+    name = "edge-tts"
+
+    def __init__(
+        self,
+        voice_map: Optional[Dict[str, str]] = None,
+        doctor_voice_override: Optional[Dict[str, str]] = None,
+        default_voice: str = "en-US-JennyNeural",
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.voice_map = voice_map if voice_map is not None else VOICE_MAP
+        self.doctor_voice_override = (
+            doctor_voice_override if doctor_voice_override is not None else DOCTOR_VOICE_OVERRIDE
+        )
+        self.default_voice = default_voice
+
+    def supports(self, language: str) -> bool:
+        return language in self.voice_map
+
+    def voice_for(self, language: str, role: str) -> Optional[str]:
+        if role == "doctor" and language in self.doctor_voice_override:
+            return self.doctor_voice_override[language]
+        return self.voice_map.get(language, self.default_voice)
+
+    def preload(self):
+        import edge_tts  # noqa: F401 - pulls in aiohttp, ~150 ms at import
+
+    async def synthesize(self, text: str, language: str, role: str, file_path: str):
+        import edge_tts
+        communicate = edge_tts.Communicate(text, self.voice_for(language, role))
+        await communicate.save(file_path)
+
+
+class GTTSEngine(TTSEngine):
+    """Reliable Google TTS fallback (single voice per language)."""
+
+    name = "gtts"
+
+    def __init__(self, lang_map: Optional[Dict[str, str]] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.lang_map = lang_map if lang_map is not None else GTTS_LANG_MAP
+
+    def supports(self, language: str) -> bool:
+        return language in self.lang_map
+
+    def voice_for(self, language: str, role: str) -> Optional[str]:
+        return self.lang_map.get(language)
+
+    def preload(self):
+        import gtts  # noqa: F401 - pulls in requests, ~90 ms at import
+
+    async def synthesize(self, text: str, language: str, role: str, file_path: str):
+        from gtts import gTTS
+        # gTTS is blocking (HTTP via requests) — keep it off the event loop
+        def _save():
+            gTTS(text=text, lang=self.voice_for(language, role)).save(file_path)
+
+        await asyncio.to_thread(_save)
+
+
+# ============================================================
+# 3. ENGINE REGISTRY (health-aware routing)
+# ============================================================
+class TTSEngineRegistry:
+    """
+    Routes each TTS request to the fastest healthy engine for the language.
+    Engines whose circuit breaker is open are skipped entirely, so an outage
+    costs one timeout per reset window instead of one per request.
+    """
+
+    def __init__(
+        self,
+        engines: Optional[List[TTSEngine]] = None,
+        audio_dir: str = AUDIO_DIR,
+        max_error_rate: float = 0.5,
+        min_samples: int = 10,
+        explore_every: int = 20,
+    ):
+        self.engines: List[TTSEngine] = list(engines or [])
+        self.audio_dir = audio_dir
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        # Every Nth request per language uses priority order, so a demoted
+        # engine (e.g. edge-tts after an outage) gets re-measured
+        self.explore_every = explore_every
+        self._requests: Dict[str, int] = {}
+
+    def register(self, engine: TTSEngine):
+        self.engines.append(engine)
+
+    def get(self, name: str) -> Optional[TTSEngine]:
+        for engine in self.engines:
+            if engine.name == name:
+                return engine
+        return None
+
+    def rank(self, language: str) -> List[TTSEngine]:
+        """
+        Engines supporting `language`, fastest first for that language (an
+        engine can be quick for one voice and slow for another). Until any
+        engine has latency data for the language the configured priority
+        order is used; afterwards, unmeasured engines go last (except on
+        periodic exploration requests).
+        """
+        supported = [e for e in self.engines if e.supports(language)]
+
+        def sort_key(engine: TTSEngine):
+            latency = engine.stats_for(language).avg_latency
+            return (latency is None, latency or 0.0, engine.priority)
+
+        count = self._requests.get(language, 0) + 1
+        self._requests[language] = count
+        measured = [e for e in supported if e.stats_for(language).avg_latency is not None]
+        if not measured or (self.explore_every and count % self.explore_every == 0):
+            return sorted(supported, key=lambda e: e.priority)
+        return sorted(supported, key=sort_key)
+
+    async def _attempt(self, engine: TTSEngine, text: str, language: str, role: str, file_path: str) -> bool:
+        start = time.perf_counter()
+        try:
+            with tracer.start_span("tts.engine", **{"tts.engine": engine.name, "tts.language": language}):
+                await asyncio.wait_for(
+                    engine.synthesize(text, language, role, file_path),
+                    timeout=engine.timeout,
+                )
+        except asyncio.CancelledError:
+            # Not the engine's fault (client gone, caller timed out), but a
+            # half-open probe must be released or the breaker never closes
+            engine.breaker.release_probe()
+            raise
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            engine.record(language, elapsed, ok=False)
+            TTS_ENGINE_LATENCY.observe(elapsed, engine=engine.name, outcome="error")
+            engine.breaker.record_failure()
+            if (
+                engine.stats.count >= self.min_samples
+                and engine.stats.error_rate >= self.max_error_rate
+            ):
+                engine.breaker.trip()
+            print(f"[TTS] {engine.name} failed for '{language}': {e!r} (breaker: {engine.breaker.state})")
+            return False
+
+        elapsed = time.perf_counter() - start
+        engine.record(language, elapsed, ok=True)
+        TTS_ENGINE_LATENCY.observe(elapsed, engine=engine.name, outcome="ok")
+        engine.breaker.record_success()
+        return True
+
+    async def synthesize(self, text: str, language: str, role: str = "patient", filename: Optional[str] = None) -> str:
+        """Synthesize `text` and return the generated filename (relative to audio_dir)."""
+        filename = filename or f"tts_{uuid.uuid4()}.mp3"
+        file_path = os.path.join(self.audio_dir, filename)
+
+        for i, engine in enumerate(self.rank(language)):
+            if not engine.breaker.allow_request():
+                continue
+            if await self._attempt(engine, text, language, role, file_path):
+                if i > 0:
+                    FALLBACKS.inc(kind="tts_engine")
+                return filename
+
+        raise Exception(f"No healthy TTS engine available for '{language}'")
+
+    def preload(self):
+        for engine in self.engines:
+            try:
+                engine.preload()
+            except Exception as e:
+                print(f"[TTS] Preload of {engine.name} failed: {e}")
+
+    def status(self) -> List[dict]:
+        """Snapshot of every engine's health, for diagnostics endpoints."""
+        return [
+            {
+                "engine": e.name,
+                "state": e.breaker.state,
+                "avg_latency": e.stats.avg_latency,
+                "error_rate": e.stats.error_rate,
+                "samples": e.stats.count,
+                "avg_latency_by_language": {
+                    language: stats.avg_latency for language, stats in sorted(e._language_stats.items())
+                },
+            }
+            for e in self.engines
+        ]
+
+
+# Singleton registry: edge-tts preferred until measurements say otherwise
+registry = TTSEngineRegistry([
+    EdgeTTSEngine(priority=0),
+    GTTSEngine(priority=1),
+])
+
 
 async def text_to_speech(
     text: str,
     language: str,
     role: str = "patient",
+    prefix: str = TTS_AUDIO_PREFIX,
 ) -> str:
-    # Select voice for edge-tts
-    if role == "doctor" and language in DOCTOR_VOICE_OVERRIDE:
-        voice = DOCTOR_VOICE_OVERRIDE[language]
-    else:
-        voice = VOICE_MAP.get(language, "en-US-JennyNeural")
+    """Voice `text`; returns the filename (`prefix` + uuid; MESSAGE_AUDIO_PREFIX for message audio)."""
+    with tracer.start_span("text_to_speech", **{"tts.language": language, "tts.role": role}):
+        return await _text_to_speech(text, language, role, f"{prefix}{uuid.uuid4()}.mp3")
 
-    filename = f"tts_{uuid.uuid4()}.mp3"
-    file_path = os.path.join(AUDIO_DIR, filename)
 
+async def _text_to_speech(text: str, language: str, role: str, filename: str) -> str:
     try:
-        # ATTEMPT 1: High-quality Edge TTS
-        communicate = edge_tts.Communicate(text, voice)
-        await communicate.save(file_path)
-        return filename
+        return await registry.synthesize(text, language, role, filename=filename)
     except Exception as e:
-        print(f"Edge TTS error (likely 403): {e}. Trying gTTS fallback...")
-        
+        if language == "en":
+            raise Exception(f"Text-to-speech completely failed: {str(e)}")
+        print(f"Critical TTS failure: {e}")
+        FALLBACKS.inc(kind="tts_english")
+        # Final fallback to English if no engine could voice the target language
         try:
-            # ATTEMPT 2: Reliable Google TTS Fallback
-            # gTTS expects simple codes like 'hi' or 'en'
-            tts = gTTS(text=text, lang=language)
-            tts.save(file_path)
-            print(f"Successfully generated audio via gTTS: {filename}")
-            return filename
-        except Exception as e2:
-            print(f"Critical TTS failure: {e2}")
-            # Final fallback to English if the target language fails in gTTS too
-            try:
-                tts = gTTS(text=text, lang='en')
-                tts.save(file_path)
-                return filename
-            except:
-                raise Exception(f"Text-to-speech completely failed: {str(e2)}")
\ No newline at end of file
+            return await registry.synthesize(text, "en", role, filename=filename)
+        except Exception:
+            raise Exception(f"Text-to-speech completely failed: {str(e)}")
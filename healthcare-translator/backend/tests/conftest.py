@@ -0,0 +1,10 @@
+import os
+import sys
+import tempfile
+
+# Configuration is read at import time: point everything at a throwaway database
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='meditranslate-tests-')}/test.db"
+os.environ.setdefault("DB_INIT_ON_STARTUP", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
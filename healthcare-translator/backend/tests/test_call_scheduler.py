@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from database import init_db
+from services import groq_service
+from services.groq_service import CallScheduler, FAST_TRANSLATION_MODEL, TRANSLATION_MODEL
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class Unavailable(Exception):
+    status_code = 503
+
+
+def test_cancelled_caller_cancels_the_first_hedged_call():
+    scheduler = CallScheduler(rate_per_minute=6000, hedge_after=5.0)
+    calls = []
+
+    async def slow_call():
+        calls.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    async def run():
+        caller = asyncio.ensure_future(scheduler.run(slow_call, hedge=True))
+        await asyncio.sleep(0.05)  # Inside the initial hedge_after wait
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await asyncio.sleep(0)
+        return calls[0].cancelled()  # Checked before asyncio.run cancels leftovers itself
+
+    assert asyncio.run(run())
+
+
+def fake_models(monkeypatch, error: Exception):
+    """Small model raises `error`; the large one answers."""
+    models = []
+
+    async def translate_prepared(prepared, text, source_language, target_language, role, priority, model):
+        models.append(model)
+        if model == FAST_TRANSLATION_MODEL:
+            raise error
+        return "hola"
+
+    monkeypatch.setattr(groq_service, "_translate_prepared", translate_prepared)
+    return models
+
+
+def translate():
+    return asyncio.run(groq_service.translate_with_model(
+        text="thank you", source_language="en", target_language="es", role="patient", lookup_cache=False,
+    ))
+
+
+def test_route_falls_back_to_large_model_on_errors(monkeypatch):
+    init_db()
+    models = fake_models(monkeypatch, Unavailable("down"))
+    assert translate() == ("hola", TRANSLATION_MODEL)
+    assert models == [FAST_TRANSLATION_MODEL, TRANSLATION_MODEL]
+
+
+def test_route_does_not_fall_back_on_rate_limits(monkeypatch):
+    init_db()
+    models = fake_models(monkeypatch, RateLimited("429"))
+    with pytest.raises(Exception, match="Translation failed"):
+        translate()
+    assert models == [FAST_TRANSLATION_MODEL]
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from responses import CompressionMiddleware, FastJSONResponse, accepted_encodings, brotli
+
+needs_brotli = pytest.mark.skipif(brotli is None, reason="brotli not installed")
+
+PAYLOAD = {"messages": [{"id": i, "original_text": "The patient has fever since Monday"} for i in range(100)]}
+
+app = FastAPI(default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+
+@app.get("/api/messages")
+def messages():
+    return PAYLOAD
+
+
+@app.get("/api/small")
+def small():
+    return {"ok": True}
+
+
+@app.get("/api/stream")
+def stream():
+    return StreamingResponse(iter([b"chunk " * 200, b"more " * 200]), media_type="text/plain")
+
+
+@app.get("/api/audio/clip.mp3")
+def audio():
+    return {"not": "compressed", "padding": "x" * 2000}
+
+
+client = TestClient(app)
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.8") == {"gzip"}
+    assert accepted_encodings("") == set()
+
+
+@needs_brotli
+def test_brotli_when_accepted():
+    response = client.get("/api/messages", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.json() == PAYLOAD
+
+
+def test_gzip_without_br():
+    response = client.get("/api/messages", headers={"Accept-Encoding": "gzip, br;q=0"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json() == PAYLOAD
+
+
+def test_small_and_audio_responses_are_not_compressed():
+    assert "content-encoding" not in client.get("/api/small", headers={"Accept-Encoding": "br"}).headers
+    assert "content-encoding" not in client.get("/api/audio/clip.mp3", headers={"Accept-Encoding": "br"}).headers
+
+
+@needs_brotli
+def test_streaming_brotli():
+    response = client.get("/api/stream", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert "content-length" not in response.headers
+    assert response.text == "chunk " * 200 + "more " * 200
@@ -0,0 +1,39 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from database import init_db, SessionLocal
+from models import GlossaryTerm
+from services.glossary import glossary_store
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    init_db()
+    return TestClient(main.app)  # No lifespan: no background workers needed
+
+
+def test_case_variants_are_one_term(client):
+    with SessionLocal() as db:  # As stored before terms were normalized
+        db.add(GlossaryTerm(source_language="en", target_language="fr", source_term="Paracetamol", target_term="a"))
+        db.add(GlossaryTerm(source_language="en", target_language="fr", source_term="paracetamol", target_term="b"))
+        db.commit()
+
+    response = client.post("/api/glossary/", json=[
+        {"source_language": "en", "target_language": "fr", "source_term": "PARACETAMOL ", "target_term": "paracétamol"},
+        {"source_language": "en", "target_language": "fr", "source_term": "Blood  Pressure.", "target_term": "tension"},
+        {"source_language": "en", "target_language": "fr", "source_term": "blood pressure", "target_term": "tension artérielle"},
+    ])
+    assert response.status_code == 200
+    terms = {t["source_term"]: t["target_term"] for t in client.get("/api/glossary/?source_language=en&target_language=fr").json()}
+    assert terms == {"paracetamol": "paracétamol", "blood pressure": "tension artérielle"}
+
+
+def test_load_compiles_pair_for_async_callers(client):
+    client.post("/api/glossary/", json=[
+        {"source_language": "en", "target_language": "de", "source_term": "Ibuprofen", "target_term": "Ibuprofen"},
+    ])
+    glossary = asyncio.run(glossary_store.load("en", "de"))
+    prepared = glossary_store.prepare("Take IBUPROFEN 200 mg", "en", "de", glossary)
+    assert prepared.text == "Take ⟦T1⟧ ⟦T2⟧"
+    assert prepared.locked == {"⟦T1⟧": "Ibuprofen", "⟦T2⟧": "200 mg"}
@@ -0,0 +1,28 @@
+import pytest
+from services.language_id import identify_language
+
+THRESHOLD = 0.8  # LANGUAGE_ID_THRESHOLD default in services/groq_service.py
+
+
+@pytest.mark.parametrize("text", [
+    "Paracetamol 500 mg",
+    "Take Lipitor 20 mg",
+    "Ibuprofen 400 mg",
+    "Covid test",
+    "मुझे Paracetamol 500 mg चाहिए",
+])
+def test_brand_names_and_short_mixed_inputs_are_escalated(text):
+    assert identify_language(text).confidence < THRESHOLD
+
+
+@pytest.mark.parametrize("language, text", [
+    ("en", "thank you doctor"),
+    ("en", "Metformin 850 mg twice daily"),
+    ("fr", "merci beaucoup docteur"),
+    ("pt", "muito obrigada doutora"),
+    ("de", "vielen Dank Frau Doktor"),
+])
+def test_ordinary_phrases_stay_confident(language, text):
+    guess = identify_language(text)
+    assert guess.language == language
+    assert guess.confidence >= THRESHOLD
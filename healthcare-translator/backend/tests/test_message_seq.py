@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from database import init_db, SessionLocal
+from db_writer import GroupCommitWriter
+from models import Conversation, Message, RoleEnum
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    init_db()
+
+
+def new_conversation() -> str:
+    with SessionLocal() as db:
+        conv = Conversation(title="seq")
+        db.add(conv)
+        db.commit()
+        return conv.id
+
+
+def add_message(conversation_id: str, text: str):
+    def op(session):
+        message = Message(
+            conversation_id=conversation_id, role=RoleEnum.doctor,
+            original_text=text, original_language="en",
+        )
+        session.add(message)
+        return message
+    return op
+
+
+@pytest.mark.parametrize("group_commit", [False, True])
+def test_concurrent_writers_get_distinct_seqs(group_commit):
+    conversation_id = new_conversation()
+    writer = GroupCommitWriter(enabled=group_commit)
+
+    async def run():
+        return await asyncio.gather(*(writer.submit(add_message(conversation_id, f"m{i}")) for i in range(40)))
+
+    messages = asyncio.run(run())
+    assert sorted(m.seq for m in messages) == list(range(1, 41))
+
+
+def test_seq_continues_after_existing_messages():
+    conversation_id = new_conversation()
+    writer = GroupCommitWriter(enabled=False)
+
+    async def run(n):
+        return await asyncio.gather(*(writer.submit(add_message(conversation_id, f"m{i}")) for i in range(n)))
+
+    asyncio.run(run(3))
+    with SessionLocal() as db:
+        db.query(Conversation).filter(Conversation.id == conversation_id).update({"last_seq": None})
+        db.commit()  # As on a database from before last_seq existed
+    later = asyncio.run(run(2))
+    assert sorted(m.seq for m in later) == [4, 5]
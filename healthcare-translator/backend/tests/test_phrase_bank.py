@@ -0,0 +1,61 @@
+import asyncio
+import threading
+from services.phrase_bank import PhraseBank
+
+
+class SlowLoader:
+    """Stands in for PhraseBank._load: returns the next index once released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.loads = 0
+
+    def __call__(self):
+        self.release.wait(5)
+        self.loads += 1
+        return {("doctor", "en", f"version {self.loads}"): ("p", {})}
+
+
+def test_event_loop_serves_stale_index_while_reloading():
+    bank = PhraseBank()
+    bank._load = loader = SlowLoader()
+    loader.release.set()
+    assert list(bank.index()) == [("doctor", "en", "version 1")]  # No loop: loads in place
+    loader.release.clear()
+    bank.invalidate()
+
+    async def on_the_loop():
+        assert list(bank.index()) == [("doctor", "en", "version 1")]  # Stale, without blocking
+        assert list(bank.index()) == [("doctor", "en", "version 1")]
+        loader.release.set()
+        await bank._reloading
+        return list(bank.index())
+
+    assert asyncio.run(on_the_loop()) == [("doctor", "en", "version 2")]
+    assert loader.loads == 2  # One background reload for both lookups
+
+
+def test_first_lookup_on_the_loop_is_a_miss_not_a_wait():
+    bank = PhraseBank()
+    bank._load = loader = SlowLoader()
+
+    async def on_the_loop():
+        assert bank.index() == {}
+        loader.release.set()
+        await bank.refresh()
+        return len(bank.index())
+
+    assert asyncio.run(on_the_loop()) == 1
+
+
+def test_failed_reload_keeps_the_old_index():
+    bank = PhraseBank()
+    bank._load = lambda: {("doctor", "en", "hello"): ("p", {})}
+    bank.index()
+
+    def broken():
+        raise RuntimeError("database is locked")
+
+    bank._load = broken
+    bank.invalidate()
+    assert list(bank.index()) == [("doctor", "en", "hello")]
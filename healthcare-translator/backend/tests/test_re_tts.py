@@ -0,0 +1,88 @@
+import os
+import json
+import asyncio
+import pytest
+from database import init_db, SessionLocal
+from models import Conversation, Job, Message, MessageTranslation, RoleEnum
+from services import jobs
+from services.jobs import JobContext, run_re_tts
+
+
+class FakeQueue:
+    async def publish(self, job):
+        pass
+
+
+@pytest.fixture
+def audio_dir(tmp_path, monkeypatch):
+    """TTS that writes msg_<language>_<n>.mp3 files into a temp audio dir."""
+    voiced = []
+
+    async def text_to_speech(text, language, role="patient", prefix="tts_"):
+        voiced.append(language)
+        name = f"{prefix}{language}_{len(voiced)}.mp3"
+        (tmp_path / name).write_bytes(b"mp3")
+        return name
+
+    monkeypatch.setattr(jobs, "text_to_speech", text_to_speech)
+    monkeypatch.setattr(jobs, "TTS_AUDIO_DIR", str(tmp_path))
+    return tmp_path
+
+
+def seed(audio_dir) -> str:
+    """A doctor message to hi (audio shared with its hi row), fr voiced from the phrase bank, de unvoiced."""
+    init_db()
+    for name in ("old_hi.mp3", "bank_x_fr_patient.mp3"):
+        (audio_dir / name).write_bytes(b"old")
+    with SessionLocal() as db:
+        conv = Conversation(title="re_tts")
+        db.add(conv)
+        db.flush()
+        message = Message(
+            conversation_id=conv.id, role=RoleEnum.doctor, original_text="rest", original_language="en",
+            translated_text="आराम", target_language="hi", tts_audio_path="old_hi.mp3",
+        )
+        db.add(message)
+        db.add_all([
+            MessageTranslation(message=message, language="hi", translated_text="आराम", tts_audio_path="old_hi.mp3"),
+            MessageTranslation(message=message, language="fr", translated_text="repos", tts_audio_path="bank_x_fr_patient.mp3"),
+            MessageTranslation(message=message, language="de", translated_text="Ruhe", tts_audio_path=None),
+            MessageTranslation(message=message, language="ar", translated_text="[Translation error: x]"),
+        ])
+        db.commit()
+        return conv.id
+
+
+def run(conversation_id: str, params: dict) -> dict:
+    with SessionLocal() as db:
+        job = Job(kind="re_tts", conversation_id=conversation_id, params=json.dumps(params), dedup_key=f"t{params}")
+        db.add(job)
+        db.commit()
+        return asyncio.run(run_re_tts(JobContext(FakeQueue(), db, job)))
+
+
+def audio(conversation_id: str) -> dict:
+    with SessionLocal() as db:
+        message = db.query(Message).filter(Message.conversation_id == conversation_id).one()
+        rows = {t.language: t.tts_audio_path for t in message.translations}
+        return {"message": message.tts_audio_path, **rows}
+
+
+def test_only_missing_voices_listener_languages(audio_dir):
+    conversation_id = seed(audio_dir)
+    assert run(conversation_id, {}) == {"regenerated": 1, "failed": 0}
+    paths = audio(conversation_id)
+    assert paths["de"] == "msg_de_1.mp3"
+    assert paths["message"] == paths["hi"] == "old_hi.mp3" and paths["fr"] == "bank_x_fr_patient.mp3"
+    assert paths["ar"] is None
+
+
+def test_redo_all_replaces_and_deletes_old_audio(audio_dir):
+    conversation_id = seed(audio_dir)
+    assert run(conversation_id, {"only_missing": False}) == {"regenerated": 3, "failed": 0}
+    paths = audio(conversation_id)
+    assert paths["message"] == paths["hi"] and paths["hi"].startswith("msg_hi_")
+    assert paths["fr"].startswith("msg_fr_") and paths["de"].startswith("msg_de_")
+    left = set(os.listdir(audio_dir))
+    assert "old_hi.mp3" not in left
+    assert "bank_x_fr_patient.mp3" in left  # Shared by every message that used the phrase
@@ -0,0 +1,50 @@
+import os
+import asyncio
+from datetime import datetime
+import pytest
+from database import init_db, SessionLocal
+from db_writer import GroupCommitWriter
+from models import Conversation, ConversationDeleted, Message, RoleEnum
+from services.reclaimer import Reclaimer
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    init_db()
+
+
+def touch(directory, name: str) -> str:
+    with open(os.path.join(directory, name), "wb") as f:
+        f.write(b"x" * 10)
+    return name
+
+
+def test_orphan_sweep_only_removes_owned_audio(tmp_path):
+    tts, uploads, exports = tmp_path / "tts", tmp_path / "uploads", tmp_path / "exports"
+    for directory in (tts, uploads, exports):
+        directory.mkdir()
+    owned = [touch(tts, "msg_orphan.mp3"), touch(uploads, "upload_orphan.webm")]
+    foreign = [touch(tts, "tts_standalone.mp3"), touch(uploads, "5ab48089.webm")]
+    reclaimer = Reclaimer(files_per_second=0, audio_dirs=[str(tts), str(uploads)], export_dir=str(exports))
+
+    report = reclaimer.sweep_orphans(grace=0)
+    remaining = set(os.listdir(tts)) | set(os.listdir(uploads))
+    assert report["files"] == 2
+    assert remaining == set(foreign)
+    assert not remaining & set(owned)
+
+
+def test_message_is_not_saved_into_a_deleted_conversation():
+    with SessionLocal() as db:
+        conv = Conversation(title="late", deleted_at=datetime.utcnow())
+        db.add(conv)
+        db.commit()
+        conversation_id = conv.id
+
+    def save(session):
+        session.add(Message(conversation_id=conversation_id, role=RoleEnum.doctor, original_text="x", original_language="en"))
+
+    with pytest.raises(ConversationDeleted):
+        asyncio.run(GroupCommitWriter(enabled=True).submit(save))
+    with SessionLocal() as db:
+        assert db.query(Message).filter(Message.conversation_id == conversation_id).count() == 0
@@ -0,0 +1,75 @@
+import asyncio
+from services import speculation
+from services.speculation import DraftSession
+
+
+def fake_provider(monkeypatch, delay: float = 0.0):
+    """Replace the provider with one that records the texts it was asked to translate."""
+    calls = []
+
+    async def translate_with_model(text, source_language, target_language, role, priority, lookup_cache=True):
+        calls.append(text)
+        await asyncio.sleep(delay)
+        return f"[{target_language}] {text}", "fake"
+
+    monkeypatch.setattr(speculation, "translate_with_model", translate_with_model)
+    return calls
+
+
+def test_draft_matching_the_message_is_reused(monkeypatch):
+    calls = fake_provider(monkeypatch)
+
+    async def run():
+        drafts = DraftSession()
+        drafts.update("Take it twice a day. Not with food.", "en", "doctor", ["hi"])
+        spec = drafts.claim("Take it  twice a day. Not with food. ", "en", "doctor", ["hi"])
+        return await spec.translate("hi", priority=0)
+
+    assert asyncio.run(run()) == ("[hi] Take it twice a day. Not with food.", "fake")
+    assert calls == ["Take it twice a day. Not with food."]  # One call for the whole text
+
+
+def test_edited_message_is_not_translated_piecewise(monkeypatch):
+    fake_provider(monkeypatch)
+
+    async def run():
+        drafts = DraftSession()
+        drafts.update("Take it twice a day.", "en", "doctor", ["hi"])
+        return drafts.claim("Take it twice a day. Not with food.", "en", "doctor", ["hi"])
+
+    assert asyncio.run(run()) is None  # fan_out translates the full message in one call
+
+
+def test_new_draft_cancels_the_previous_one(monkeypatch):
+    fake_provider(monkeypatch, delay=1.0)
+
+    async def run():
+        drafts = DraftSession()
+        drafts.update("How are you feeling", "en", "doctor", ["hi"])
+        first = list(drafts._calls.values())[0].task
+        drafts.update("How are you feeling today?", "en", "doctor", ["hi"])
+        await asyncio.sleep(0)
+        cancelled = first.cancelled()
+        drafts.reset()
+        return cancelled
+
+    assert asyncio.run(run())
+
+
+def test_prepare_runs_in_the_background_and_send_cancels_it():
+    async def run():
+        drafts = DraftSession()
+        started = asyncio.Event()
+
+        async def slow_detection():
+            started.set()
+            await asyncio.sleep(10)
+
+        drafts.prepare(slow_detection())
+        pending = drafts._pending
+        await started.wait()  # prepare() returned without waiting for it
+        assert drafts.claim("anything", "en", "doctor", ["hi"]) is None
+        await asyncio.sleep(0)
+        return pending.cancelled()
+
+    assert asyncio.run(run())
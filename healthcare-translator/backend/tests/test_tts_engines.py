@@ -0,0 +1,196 @@
+import asyncio
+import pytest
+from services import tts_service
+from services.tts_service import CircuitBreaker, TTSEngine, TTSEngineRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeEngine(TTSEngine):
+    """Engine whose failures, delay and supported languages are set by the test."""
+
+    def __init__(self, name: str, fail: bool = False, delay: float = 0.0, languages=None, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.fail = fail
+        self.delay = delay
+        self.languages = languages
+        self.calls = []
+
+    def supports(self, language: str) -> bool:
+        return self.languages is None or language in self.languages
+
+    async def synthesize(self, text: str, language: str, role: str, file_path: str):
+        self.calls.append(language)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+
+
+def synthesize(registry: TTSEngineRegistry, language: str = "hi") -> str:
+    return asyncio.run(registry.synthesize("hello", language, "patient"))
+
+
+# --- Circuit breaker ---
+def test_breaker_closed_open_half_open_closed():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 30
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()  # The single probe
+    assert not breaker.allow_request()  # Everyone else waits for it
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.allow_request()
+
+
+def test_failed_probe_reopens_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 15
+    assert not breaker.allow_request()  # The reset window restarts from the failed probe
+
+
+# --- Routing ---
+def test_rank_uses_priority_until_measured_then_latency(tmp_path):
+    primary = FakeEngine("primary", priority=0, delay=0.03)
+    fallback = FakeEngine("fallback", priority=1)
+    registry = TTSEngineRegistry([primary, fallback], audio_dir=str(tmp_path), explore_every=0)
+
+    assert registry.rank("hi") == [primary, fallback]
+    synthesize(registry)
+    fallback.record("hi", 0.001, ok=True)
+    assert registry.rank("hi") == [fallback, primary]  # Faster engine first
+
+
+def test_latency_is_ranked_per_language(tmp_path):
+    edge = FakeEngine("edge", priority=0)
+    gtts = FakeEngine("gtts", priority=1)
+    registry = TTSEngineRegistry([edge, gtts], audio_dir=str(tmp_path), explore_every=0)
+    edge.record("hi", 2.0, ok=True)
+    gtts.record("hi", 0.2, ok=True)
+    edge.record("fr", 0.1, ok=True)
+    gtts.record("fr", 0.3, ok=True)
+
+    assert registry.rank("hi") == [gtts, edge]
+    assert registry.rank("fr") == [edge, gtts]
+    assert registry.rank("de") == [edge, gtts]  # Unmeasured language: priority order
+
+
+def test_unmeasured_engines_go_last(tmp_path):
+    measured = FakeEngine("measured", priority=1)
+    unmeasured = FakeEngine("unmeasured", priority=0)
+    registry = TTSEngineRegistry([unmeasured, measured], audio_dir=str(tmp_path), explore_every=0)
+    measured.record("hi", 0.5, ok=True)
+    assert registry.rank("hi") == [measured, unmeasured]
+
+
+def test_explore_every_returns_priority_order(tmp_path):
+    slow = FakeEngine("slow", priority=0)
+    fast = FakeEngine("fast", priority=1)
+    for language in ("hi", "en"):
+        slow.record(language, 1.0, ok=True)
+        fast.record(language, 0.1, ok=True)
+    registry = TTSEngineRegistry([slow, fast], audio_dir=str(tmp_path), explore_every=3)
+
+    orders = [registry.rank("hi")[0].name for _ in range(6)]
+    assert orders == ["fast", "fast", "slow", "fast", "fast", "slow"]
+    assert registry.rank("en")[0].name == "fast"  # Counted per language
+
+
+def test_error_rate_trips_breaker(tmp_path):
+    flaky = FakeEngine("flaky", priority=0, breaker=CircuitBreaker(failure_threshold=100))
+    backup = FakeEngine("backup", priority=1)
+    registry = TTSEngineRegistry([flaky, backup], audio_dir=str(tmp_path), max_error_rate=0.5, min_samples=4)
+    for ok in (True, True, False):
+        flaky.record("hi", 0.01, ok=ok)
+
+    flaky.fail = True
+    synthesize(registry)  # 2 errors in 4 samples: 50%
+    assert flaky.breaker.state == CircuitBreaker.OPEN
+
+
+def test_cancelled_probe_releases_half_open_breaker(tmp_path):
+    clock = FakeClock()
+    engine = FakeEngine("engine", delay=10, breaker=CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock))
+    registry = TTSEngineRegistry([engine], audio_dir=str(tmp_path))
+    engine.breaker.record_failure()
+    clock.now = 30
+
+    async def cancelled_probe():
+        task = asyncio.ensure_future(registry.synthesize("hello", "hi", "patient"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancelled_probe())
+    assert engine.breaker.state == CircuitBreaker.HALF_OPEN
+    assert engine.breaker.allow_request()  # The next request can probe
+
+
+# --- Fallback ---
+def test_open_engines_are_skipped(tmp_path):
+    broken = FakeEngine("broken", priority=0, fail=True, breaker=CircuitBreaker(failure_threshold=1))
+    backup = FakeEngine("backup", priority=1)
+    registry = TTSEngineRegistry([broken, backup], audio_dir=str(tmp_path), explore_every=0)
+
+    synthesize(registry)
+    assert broken.breaker.state == CircuitBreaker.OPEN
+    synthesize(registry)
+    synthesize(registry)
+    assert len(broken.calls) == 1  # Only the call that opened it
+    assert len(backup.calls) == 3
+
+
+def test_timeout_counts_as_failure(tmp_path):
+    stuck = FakeEngine("stuck", priority=0, delay=1.0, timeout=0.05)
+    backup = FakeEngine("backup", priority=1)
+    registry = TTSEngineRegistry([stuck, backup], audio_dir=str(tmp_path))
+
+    filename = synthesize(registry)
+    assert filename.endswith(".mp3")
+    assert stuck.stats.error_rate == 1.0
+    assert backup.calls == ["hi"]
+
+
+def test_no_healthy_engine_raises(tmp_path):
+    registry = TTSEngineRegistry([FakeEngine("down", fail=True)], audio_dir=str(tmp_path))
+    with pytest.raises(Exception, match="No healthy TTS engine"):
+        synthesize(registry)
+
+
+def test_text_to_speech_falls_back_to_english(tmp_path, monkeypatch):
+    english_only = FakeEngine("english-only", languages={"en"})
+    monkeypatch.setattr(tts_service, "registry", TTSEngineRegistry([english_only], audio_dir=str(tmp_path)))
+
+    filename = asyncio.run(tts_service.text_to_speech("hello", "ta"))
+    assert filename.endswith(".mp3")
+    assert english_only.calls == ["en"]
+
+
+def test_text_to_speech_fails_when_english_fails_too(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_service, "registry", TTSEngineRegistry([FakeEngine("down", fail=True)], audio_dir=str(tmp_path)))
+    with pytest.raises(Exception, match="completely failed"):
+        asyncio.run(tts_service.text_to_speech("hello", "ta"))
@@ -0,0 +1,79 @@
+import asyncio
+from ws_manager import ConnectionManager, WS_CLOSE_IDLE
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+
+    async def send_text(self, frame):
+        self.sent.append(frame)
+
+    async def close(self, code=1000, reason=""):
+        self.closed = code
+
+
+def register(manager: ConnectionManager, websocket: FakeSocket, room: str = "room", seen: float = 0.0):
+    manager.active_connections.setdefault(room, []).append(websocket)
+    manager.rooms[websocket] = room
+    manager.last_seen[websocket] = seen
+
+
+def test_idle_socket_is_reaped():
+    manager = ConnectionManager(idle_timeout=1)
+    idle = FakeSocket()
+    register(manager, idle)
+    asyncio.run(manager.sweep())
+    assert idle.closed == WS_CLOSE_IDLE
+    assert manager.get_room_count("room") == 0
+
+
+def test_busy_socket_is_pinged_not_reaped():
+    manager = ConnectionManager(idle_timeout=1)
+    busy = FakeSocket()
+    register(manager, busy)
+    with manager.working(busy):
+        asyncio.run(manager.sweep())
+        assert busy.closed is None and busy.sent  # Still pinged
+    assert manager.get_room_count("room") == 1
+
+    asyncio.run(manager.sweep())
+    assert busy.closed is None  # Finishing the work counts as activity
+
+
+def test_nested_work_keeps_socket_busy():
+    manager = ConnectionManager(idle_timeout=1)
+    busy = FakeSocket()
+    register(manager, busy)
+    with manager.working(busy):
+        with manager.working(busy):
+            pass
+        manager.last_seen[busy] = 0.0
+        asyncio.run(manager.sweep())
+        assert busy.closed is None
+
+
+class StuckSocket(FakeSocket):
+    """Half-open peer: sends never complete."""
+
+    async def send_text(self, frame):
+        await asyncio.sleep(3600)
+
+
+def test_stuck_peer_does_not_hold_up_the_room():
+    manager = ConnectionManager(send_timeout=0.05)
+    stuck, ok = StuckSocket(), FakeSocket()
+    register(manager, stuck)
+    register(manager, ok)
+
+    async def broadcast():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await manager.broadcast_to_room("room", {"type": "system", "system_text": "hi"})
+        return loop.time() - started
+
+    assert asyncio.run(broadcast()) < 1
+    assert ok.sent and ok.closed is None
+    assert stuck.closed == WS_CLOSE_IDLE
+    assert manager.get_room_count("room") == 1
@@ -0,0 +1,182 @@
+import os
+import re
+import time
+import secrets
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+# OpenTelemetry-style tracing without the SDK dependency: spans carry W3C
+# trace/span ids, nest through contextvars (so they follow awaits), and are
+# handed to an exporter when they end.
+#
+# TRACING_EXPORTER = none (default) | console | memory (queryable via
+# /api/traces). The memory exporter is for local debugging only: span
+# attributes include conversation ids and /api/traces has no authentication.
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "5000"))
+
+_TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, attributes: Optional[dict] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.attributes["error.type"] = error.__class__.__name__
+        self.attributes["error.message"] = str(error)[:500]
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self._start) * 1000, 3)
+            tracer.exporter.export(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+# --- Exporters ---
+class InMemoryExporter:
+    """Keeps the most recent finished spans; used by /api/traces and offline checks."""
+
+    def __init__(self, max_spans: int = TRACE_BUFFER_SIZE):
+        self.spans = deque(maxlen=max_spans)
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+    def get_trace(self, trace_id: str) -> List[Span]:
+        return sorted((s for s in self.spans if s.trace_id == trace_id), key=lambda s: s.start_time)
+
+    def recent_traces(self, limit: int = 20) -> List[dict]:
+        """Root spans of the latest traces, newest first."""
+        roots = [s for s in reversed(self.spans) if s.parent_id is None]
+        return [s.to_dict() for s in roots[:limit]]
+
+    def clear(self):
+        self.spans.clear()
+
+
+class ConsoleExporter:
+    def export(self, span: Span):
+        parent = span.parent_id or "-"
+        print(f"[Trace] {span.trace_id} {span.span_id} parent={parent} {span.name} "
+              f"{span.duration_ms}ms {span.status} {span.attributes}")
+
+
+class NoopExporter:
+    def export(self, span: Span):
+        pass
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def current_trace_id(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.trace_id if span else None
+
+    def create_span(self, name: str, traceparent: Optional[str] = None, **attributes) -> Span:
+        """
+        Create a span without making it current (caller must call end()).
+        Parent is the current span, or the remote parent in `traceparent`.
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            return Span(name, parent.trace_id, parent.span_id, attributes)
+        match = _TRACEPARENT_RE.match(traceparent or "")
+        if match:
+            return Span(name, match.group(1), match.group(2), attributes)
+        return Span(name, secrets.token_hex(16), None, attributes)
+
+    @contextmanager
+    def start_span(self, name: str, traceparent: Optional[str] = None, **attributes):
+        """Start a child of the current span (or a new trace) and make it current."""
+        span = self.create_span(name, traceparent, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+
+def _make_exporter(kind: str):
+    if kind == "console":
+        return ConsoleExporter()
+    if kind == "none":
+        return NoopExporter()
+    return InMemoryExporter()
+
+
+tracer = Tracer(_make_exporter(TRACING_EXPORTER))
+
+
+# ============================================================
+# SQLALCHEMY INSTRUMENTATION
+# ============================================================
+def instrument_sqlalchemy(engine):
+    """Emit a `db.query` span for every statement executed on `engine`."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        span = tracer.create_span(
+            "db.query",
+            **{"db.system": engine.dialect.name, "db.statement": statement[:300]},
+        )
+        conn.info.setdefault("_trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("_trace_spans")
+        if spans:
+            span = spans.pop()
+            span.set_attribute("db.rowcount", getattr(cursor, "rowcount", -1))
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        spans = context.connection.info.get("_trace_spans") if context.connection is not None else None
+        if spans:
+            span = spans.pop()
+            span.record_error(context.original_exception)
+            span.end()
@@ -0,0 +1,102 @@
+import json
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple, Union
+from fastapi import WebSocket, WebSocketDisconnect
+
+# WebSocket wire encodings, negotiated per connection:
+#
+#   json     text frames; orjson when installed, stdlib json otherwise (default)
+#   msgpack  binary frames (needs `msgpack`); datetimes use the Timestamp extension
+#
+# Clients pick one with the Sec-WebSocket-Protocol header
+# ("meditranslate.json" / "meditranslate.msgpack") or ?encoding=json|msgpack.
+# Compression is permessage-deflate, negotiated by uvicorn itself.
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional encoding
+    msgpack = None
+
+SUBPROTOCOL_PREFIX = "meditranslate."
+DEFAULT_ENCODING = "json"
+
+Frame = Union[str, bytes]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _msgpack_default(value):
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)  # DB timestamps are stored as naive UTC
+        return msgpack.Timestamp.from_datetime(value)
+    return str(value)
+
+
+def encode_json(payload: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default).decode("utf-8")
+    return json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_msgpack(payload: dict) -> bytes:
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+
+ENCODERS = {"json": encode_json}
+if msgpack is not None:
+    ENCODERS["msgpack"] = encode_msgpack
+
+
+def available_encodings():
+    return list(ENCODERS)
+
+
+def encode(payload: dict, encoding: str = DEFAULT_ENCODING) -> Frame:
+    return ENCODERS.get(encoding, encode_json)(payload)
+
+
+def negotiate(websocket: WebSocket) -> Tuple[str, Optional[str]]:
+    """
+    Pick the encoding for a connection. Returns (encoding, subprotocol to
+    accept). Subprotocol offers win over the ?encoding= query parameter;
+    unknown or unavailable encodings fall back to JSON.
+    """
+    for offered in websocket.scope.get("subprotocols") or []:
+        if offered.startswith(SUBPROTOCOL_PREFIX):
+            name = offered[len(SUBPROTOCOL_PREFIX):]
+            if name in ENCODERS:
+                return name, offered
+    requested = websocket.query_params.get("encoding", DEFAULT_ENCODING)
+    return (requested if requested in ENCODERS else DEFAULT_ENCODING), None
+
+
+async def send_frame(websocket: WebSocket, frame: Frame):
+    """Send an already-encoded payload: str as a text frame, bytes as binary."""
+    if isinstance(frame, bytes):
+        await websocket.send_bytes(frame)
+    else:
+        await websocket.send_text(frame)
+
+
+async def receive_payload(websocket: WebSocket) -> Dict:
+    """Receive one client message: text frames are JSON, binary frames msgpack (or JSON bytes)."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    if text is not None:
+        return orjson.loads(text) if orjson is not None else json.loads(text)
+    data = message.get("bytes") or b""
+    if msgpack is not None and data[:1] not in (b"{", b"["):
+        return msgpack.unpackb(data, raw=False)
+    return json.loads(data)
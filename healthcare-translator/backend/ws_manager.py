@@ -1,58 +1,274 @@
+import os
+import time
+import asyncio
+from contextlib import contextmanager
 from fastapi import WebSocket
-from typing import Dict, List
-import json
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from metrics import registry, timed, ERRORS
+from tracing import tracer
+import ws_codec
+
+# Server pings every connection this often; clients answer {"type": "pong"}
+WS_HEARTBEAT_INTERVAL = float(os.getenv("WS_HEARTBEAT_INTERVAL", "20"))
+# A connection that sent nothing (not even a pong) for this long is reaped; 0 = never
+WS_IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "60"))
+# A broadcast frame not accepted by a peer within this many seconds drops
+# that peer, so one slow or half-open socket can't hold up the room
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+# Connection caps (per room / per worker process); extra sockets are closed with 1013
+WS_MAX_CONNECTIONS_PER_ROOM = int(os.getenv("WS_MAX_CONNECTIONS_PER_ROOM", "32"))
+WS_MAX_CONNECTIONS = int(os.getenv("WS_MAX_CONNECTIONS", "2000"))
+
+WS_CLOSE_TRY_AGAIN_LATER = 1013
+WS_CLOSE_IDLE = 4408
+
+WS_REAPED = registry.counter(
+    "ws_reaped_total",
+    "WebSocket connections closed by the server (idle timeout, failed ping, send timeout).",
+    ["reason"],
+)
+WS_REJECTED = registry.counter(
+    "ws_rejected_total",
+    "WebSocket connections refused by a connection cap (room, worker).",
+    ["reason"],
+)
 
 
 class ConnectionManager:
     """
     Manages WebSocket connections per conversation room.
     Enables real-time WhatsApp-like messaging between Doctor and Patient.
+
+    A heartbeat task pings every connection and reaps those that have been
+    silent for longer than `idle_timeout` (half-open mobile connections
+    never raise WebSocketDisconnect on their own). A connection whose
+    handler is busy with one of its messages (see `working`) is not read
+    meanwhile, so its pongs wait in the buffer; it is never reaped as idle.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        heartbeat_interval: float = WS_HEARTBEAT_INTERVAL,
+        idle_timeout: float = WS_IDLE_TIMEOUT,
+        max_per_room: int = WS_MAX_CONNECTIONS_PER_ROOM,
+        max_connections: int = WS_MAX_CONNECTIONS,
+        send_timeout: float = WS_SEND_TIMEOUT,
+    ):
+        self.heartbeat_interval = heartbeat_interval
+        self.send_timeout = send_timeout
+        self.idle_timeout = idle_timeout
+        self.max_per_room = max_per_room
+        self.max_connections = max_connections
         # { conversation_id: [websocket1, websocket2, ...] }
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        # Wire encoding negotiated by each connection (see ws_codec)
+        self.encodings: Dict[WebSocket, str] = {}
+        # Listening language of each connection (None: two-party client, gets the default view)
+        self.languages: Dict[WebSocket, Optional[str]] = {}
+        # Room and last inbound frame (monotonic) of each connection, for the reaper
+        self.rooms: Dict[WebSocket, str] = {}
+        self.last_seen: Dict[WebSocket, float] = {}
+        # Messages of each connection being handled right now
+        self.in_flight: Dict[WebSocket, int] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
 
-    async def connect(self, websocket: WebSocket, conversation_id: str):
-        """Accept and register a WebSocket connection to a conversation room."""
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, conversation_id: str, language: Optional[str] = None) -> bool:
+        """
+        Accept and register a WebSocket connection to a conversation room.
+        Returns False (socket closed with 1013 "try again later") when the
+        room or this worker is at its connection cap.
+        """
+        encoding, subprotocol = ws_codec.negotiate(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+        if self.get_room_count(conversation_id) >= self.max_per_room:
+            WS_REJECTED.inc(reason="room")
+            await websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER, reason="Room is full")
+            return False
+        if self.get_total_connections() >= self.max_connections:
+            WS_REJECTED.inc(reason="worker")
+            await websocket.close(code=WS_CLOSE_TRY_AGAIN_LATER, reason="Server is at capacity")
+            return False
+        self.encodings[websocket] = encoding
+        self.languages[websocket] = language
         if conversation_id not in self.active_connections:
             self.active_connections[conversation_id] = []
         self.active_connections[conversation_id].append(websocket)
+        self.rooms[websocket] = conversation_id
+        self.last_seen[websocket] = time.monotonic()
         print(f"[WS] Client connected to room: {conversation_id} | Total: {len(self.active_connections[conversation_id])}")
+        return True
+
+    def touch(self, websocket: WebSocket):
+        """Record inbound activity (any frame, including pongs)."""
+        if websocket in self.last_seen:
+            self.last_seen[websocket] = time.monotonic()
+
+    @contextmanager
+    def working(self, websocket: WebSocket):
+        """Mark the connection busy handling a frame (exempt from idle reaping) for the block."""
+        self.in_flight[websocket] = self.in_flight.get(websocket, 0) + 1
+        try:
+            yield
+        finally:
+            remaining = self.in_flight.get(websocket, 1) - 1
+            if remaining > 0:
+                self.in_flight[websocket] = remaining
+            else:
+                self.in_flight.pop(websocket, None)
+            self.touch(websocket)  # The idle clock starts when the handler reads again
 
     def disconnect(self, websocket: WebSocket, conversation_id: str):
         """Remove a WebSocket connection from a conversation room."""
-        if conversation_id in self.active_connections:
+        self.encodings.pop(websocket, None)
+        self.in_flight.pop(websocket, None)
+        self.languages.pop(websocket, None)
+        self.rooms.pop(websocket, None)
+        self.last_seen.pop(websocket, None)
+        if conversation_id in self.active_connections and websocket in self.active_connections[conversation_id]:
             self.active_connections[conversation_id].remove(websocket)
             if not self.active_connections[conversation_id]:
                 del self.active_connections[conversation_id]
             print(f"[WS] Client disconnected from room: {conversation_id}")
 
-    async def broadcast_to_room(self, conversation_id: str, message: dict):
-        """Broadcast a message to ALL clients in a conversation room."""
+    async def broadcast_to_room(
+        self,
+        conversation_id: str,
+        message: dict,
+        localize: Optional[Callable[[str], dict]] = None,
+    ):
+        """
+        Broadcast a message to ALL clients in a conversation room. The payload
+        is encoded once per (language, wire encoding) in use, not once per
+        connection. With `localize`, connections that declared a language get
+        localize(language) instead of `message`.
+
+        Frames go out to every connection concurrently, each bounded by
+        `send_timeout`: a peer that errors is dropped, one that times out is
+        reaped, and neither delays the others.
+        """
         if conversation_id in self.active_connections:
-            disconnected = []
-            for connection in self.active_connections[conversation_id]:
+            disconnected, slow = [], []
+            connections = list(self.active_connections[conversation_id])
+
+            async def send(connection: WebSocket, frame: ws_codec.Frame):
                 try:
-                    await connection.send_json(message)
+                    await asyncio.wait_for(ws_codec.send_frame(connection, frame), self.send_timeout)
+                except asyncio.TimeoutError:
+                    ERRORS.inc(stage="broadcast_send")
+                    slow.append(connection)
                 except Exception:
+                    ERRORS.inc(stage="broadcast_send")
                     disconnected.append(connection)
+
+            with timed("broadcast"), tracer.start_span("ws.broadcast", **{"ws.recipients": len(connections)}):
+                frames: Dict[Tuple[Optional[str], str], ws_codec.Frame] = {}
+                sends = []
+                for connection in connections:
+                    encoding = self.encodings.get(connection, ws_codec.DEFAULT_ENCODING)
+                    language = self.languages.get(connection) if localize is not None else None
+                    frame = frames.get((language, encoding))
+                    if frame is None:
+                        payload = message if language is None else localize(language)
+                        frame = frames[(language, encoding)] = ws_codec.encode(payload, encoding)
+                    sends.append(send(connection, frame))
+                await asyncio.gather(*sends)
             # Clean up broken connections
             for conn in disconnected:
-                self.active_connections[conversation_id].remove(conn)
+                self.disconnect(conn, conversation_id)
+            if slow:
+                await asyncio.gather(*(self._reap(conn, "send_timeout") for conn in slow))
 
     async def send_personal(self, websocket: WebSocket, message: dict):
         """Send a message to a specific client."""
         try:
-            await websocket.send_json(message)
+            encoding = self.encodings.get(websocket, ws_codec.DEFAULT_ENCODING)
+            await ws_codec.send_frame(websocket, ws_codec.encode(message, encoding))
         except Exception:
             pass
 
+    def room_languages(self, conversation_id: str) -> Set[str]:
+        """Languages declared by the connections currently in a room."""
+        return {
+            self.languages[ws] for ws in self.active_connections.get(conversation_id, [])
+            if self.languages.get(ws)
+        }
+
     def get_room_count(self, conversation_id: str) -> int:
         """Get number of connected clients in a room."""
         return len(self.active_connections.get(conversation_id, []))
 
+    def get_total_connections(self) -> int:
+        return sum(len(conns) for conns in self.active_connections.values())
+
+    async def close_room(self, conversation_id: str, code: int, reason: str):
+        """Disconnect every socket in the room (e.g. the conversation was deleted)."""
+        for websocket in list(self.active_connections.get(conversation_id, [])):
+            self.disconnect(websocket, conversation_id)
+            try:
+                await asyncio.wait_for(websocket.close(code=code, reason=reason), 5)
+            except Exception:
+                pass
+
+    # --- Heartbeat / idle reaping ---
+    def start(self):
+        if self.heartbeat_interval > 0 and (self._heartbeat is None or self._heartbeat.done()):
+            self._heartbeat = asyncio.get_running_loop().create_task(self._run_heartbeat())
+
+    async def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            try:
+                await self._heartbeat
+            except asyncio.CancelledError:
+                pass
+            self._heartbeat = None
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"[WS] Heartbeat sweep failed: {e}")
+
+    async def sweep(self):
+        """Reap connections idle past `idle_timeout` (unless busy); ping the rest."""
+        now = time.monotonic()
+        stale, ping = [], []
+        for websocket, seen in list(self.last_seen.items()):
+            if self.idle_timeout > 0 and now - seen > self.idle_timeout and websocket not in self.in_flight:
+                stale.append(websocket)
+            else:
+                ping.append(websocket)
+        for websocket in stale:
+            await self._reap(websocket, "idle")
+        frames: Dict[str, ws_codec.Frame] = {}
+        for websocket in ping:
+            encoding = self.encodings.get(websocket, ws_codec.DEFAULT_ENCODING)
+            frame = frames.get(encoding)
+            if frame is None:
+                frame = frames[encoding] = ws_codec.encode({"type": "ping"}, encoding)
+            try:
+                await asyncio.wait_for(ws_codec.send_frame(websocket, frame), self.heartbeat_interval)
+            except Exception:
+                await self._reap(websocket, "ping_failed")
+
+    async def _reap(self, websocket: WebSocket, reason: str):
+        """Drop the connection and close it without waiting long on the peer."""
+        conversation_id = self.rooms.get(websocket)
+        if conversation_id is None:
+            return  # Already gone
+        WS_REAPED.inc(reason=reason)
+        self.disconnect(websocket, conversation_id)
+        try:
+            # A half-open peer never acknowledges; don't wait on it
+            await asyncio.wait_for(websocket.close(code=WS_CLOSE_IDLE, reason="Idle timeout"), 5)
+        except Exception:
+            pass
+
 
 # Singleton instance
 manager = ConnectionManager()
+
+registry.gauge("ws_active_rooms", "Conversation rooms with at least one WebSocket.", lambda: len(manager.active_connections))
+registry.gauge("ws_active_connections", "Open WebSocket connections across all rooms.", manager.get_total_connections)
@@ -29,6 +29,9 @@ const LANGUAGES = [
   { code: "ur", name: "Urdu", flag: "🇵🇰" },
 ];
 
+// Pause in typing after which the draft is sent for speculative translation
+const DRAFT_DEBOUNCE_MS = 400;
+
 export default function ChatPage() {
   // State
   const [conversations, setConversations] = useState([]);
@@ -47,6 +50,8 @@ export default function ChatPage() {
 
   const wsRef = useRef(null);
   const chatEndRef = useRef(null);
+  const lastSeqRef = useRef(null);  // Highest message seq received, for resume after reconnect
+  const lastDraftRef = useRef("");  // Draft text the server last saw
 
   // Scroll to bottom on new message
   useEffect(() => {
@@ -63,28 +68,79 @@ export default function ChatPage() {
     if (!activeConv) return;
 
     // Load existing messages
+    lastSeqRef.current = null;
     loadMessages(activeConv.id);
 
-    // Connect WebSocket
+    let closedByUs = false;
+    let reconnectTimer = null;
+
+    const connect = () => {
+      wsRef.current = connectWebSocket(
+        activeConv.id,
+        (data) => {
+          if (data.type === "message") {
+            mergeMessages([data.message]);
+          } else if (data.type === "sync") {
+            mergeMessages(data.messages);
+            if (data.has_more) loadMessages(activeConv.id);
+          } else if (data.type === "system") {
+            setParticipants(data.participants || 0);
+          } else if (data.type === "error" && data.code === "overloaded" && data.retry) {
+            // Shed under load (not stored): resend once the server says to
+            setTimeout(() => sendWSMessage(wsRef.current, data.retry), data.retry_after * 1000);
+          }
+        },
+        (err) => console.error("WS Error:", err),
+        () => {
+          console.log("WS Closed");
+          // Dropped connection: reconnect and only fetch what was missed
+          if (!closedByUs) reconnectTimer = setTimeout(connect, 2000);
+        },
+        lastSeqRef.current
+      );
+    };
+
     if (wsRef.current) wsRef.current.close();
-    wsRef.current = connectWebSocket(
-      activeConv.id,
-      (data) => {
-        if (data.type === "message") {
-          setMessages((prev) => [...prev, data.message]);
-        } else if (data.type === "system") {
-          setParticipants(data.participants || 0);
-        }
-      },
-      (err) => console.error("WS Error:", err),
-      () => console.log("WS Closed")
-    );
+    connect();
 
     return () => {
+      closedByUs = true;
+      clearTimeout(reconnectTimer);
       if (wsRef.current) wsRef.current.close();
     };
   }, [activeConv?.id]);
 
+  // Send the draft once typing pauses: the server translates it ahead of send
+  useEffect(() => {
+    if (!activeConv || inputText === lastDraftRef.current) return;
+    const timer = setTimeout(() => {
+      lastDraftRef.current = inputText;
+      sendWSMessage(wsRef.current, {
+        type: "draft",
+        role: role,
+        content: inputText,
+        source_language: role === "doctor" ? doctorLang : patientLang,
+        target_language: role === "doctor" ? patientLang : doctorLang,
+      });
+    }, DRAFT_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [inputText, role, doctorLang, patientLang, activeConv?.id]);
+
+  // Append messages not seen yet (live + sync can overlap), keeping seq order
+  const mergeMessages = (incoming) => {
+    if (!incoming?.length) return;
+    for (const m of incoming) {
+      if (m.seq != null && (lastSeqRef.current == null || m.seq > lastSeqRef.current)) {
+        lastSeqRef.current = m.seq;
+      }
+    }
+    setMessages((prev) => {
+      const seen = new Set(prev.map((m) => m.id));
+      const fresh = incoming.filter((m) => !seen.has(m.id));
+      return fresh.length ? [...prev, ...fresh] : prev;
+    });
+  };
+
   // API calls
   const loadConversations = async () => {
     try {
@@ -99,6 +155,8 @@ export default function ChatPage() {
     try {
       const data = await getMessages(convId);
       setMessages(data);
+      const seqs = data.map((m) => m.seq).filter((s) => s != null);
+      if (seqs.length) lastSeqRef.current = Math.max(lastSeqRef.current ?? 0, ...seqs);
     } catch (err) {
       console.error("Failed to load messages:", err);
     }
@@ -136,6 +194,7 @@ export default function ChatPage() {
       target_language: tgtLang,
     });
 
+    lastDraftRef.current = "";  // Sending claimed the draft
     setInputText("");
     // Reset sending after a brief delay (WS will broadcast the message)
     setTimeout(() => setSending(false), 500);
@@ -147,7 +206,7 @@ export default function ChatPage() {
     try {
       const srcLang = role === "doctor" ? doctorLang : patientLang;
       const result = await uploadAudio(activeConv.id, audioBlob, role, srcLang);
-      setMessages((prev) => [...prev, result]);
+      mergeMessages([result]);
     } catch (err) {
       console.error("Audio upload failed:", err);
     } finally {
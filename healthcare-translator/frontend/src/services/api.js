@@ -117,8 +117,14 @@ export async function getLanguages() {
 // ============================================================
 // WEBSOCKET
 // ============================================================
-export function connectWebSocket(conversationId, onMessage, onError, onClose) {
-  const ws = new WebSocket(`${WS_BASE}/ws/${conversationId}`);
+// Pass the last seen message `seq` to receive a "sync" frame with everything missed
+export function connectWebSocket(conversationId, onMessage, onError, onClose, sinceSeq = null, language = null) {
+  // language: listen in one language only (multi-party rooms); omit for the doctor/patient view
+  const params = new URLSearchParams();
+  if (sinceSeq != null) params.set("since_seq", sinceSeq);
+  if (language) params.set("language", language);
+  const query = params.toString() ? `?${params}` : "";
+  const ws = new WebSocket(`${WS_BASE}/ws/${conversationId}${query}`);
 
   ws.onopen = () => {
     console.log(`[WS] Connected to room: ${conversationId}`);
@@ -127,6 +133,11 @@ export function connectWebSocket(conversationId, onMessage, onError, onClose) {
   ws.onmessage = (event) => {
     try {
       const data = JSON.parse(event.data);
+      if (data.type === "ping") {
+        // Server heartbeat: a socket that stays silent gets reaped as dead
+        ws.send(JSON.stringify({ type: "pong" }));
+        return;
+      }
       onMessage(data);
     } catch (e) {
       console.error("[WS] Parse error:", e);